@@ -0,0 +1,7 @@
+# API package
+
+from app.core.startup_profiler import STARTUP_PROFILE, startup_profiler
+
+if STARTUP_PROFILE:
+    # 尽早安装，统计后续所有模块的导入耗时
+    startup_profiler.install_import_hook()
@@ -0,0 +1,67 @@
+"""管理路由：线上 profiling，需要 `YAG_ADMIN_TOKEN`"""
+
+import asyncio
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from app.core.config import env_str
+from app.core.profiling import (
+    PROFILE_MAX_SECONDS,
+    ProfileFormat,
+    ProfilerBusyError,
+    function_timings,
+    sampling_profiler,
+)
+
+ADMIN_TOKEN = env_str("YAG_ADMIN_TOKEN", "")
+"""为空时管理路由一律返回 404"""
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+
+@router.post("/profile")
+async def profile_route(
+    seconds: float = Query(default=10.0, gt=0, le=PROFILE_MAX_SECONDS),
+    format: ProfileFormat = Query(default="speedscope"),
+) -> Response:
+    """对当前 worker 采样 `seconds` 秒，返回 speedscope 文件或 collapsed stack"""
+    try:
+        # 采样线程之外的事件循环照常处理请求，采到的就是线上真实负载
+        profile = await asyncio.to_thread(sampling_profiler.sample, seconds)
+    except ProfilerBusyError as exception:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exception))
+
+    filename = f"profile-{int(seconds)}s"
+    if format == "collapsed":
+        return PlainTextResponse(
+            profile.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="{filename}.txt"'},
+        )
+    return JSONResponse(
+        profile.speedscope(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.speedscope.json"'
+        },
+    )
+
+
+@router.put("/timings")
+async def timings_route(enabled: bool = Query()) -> dict:
+    """开关 `timed` 函数计时；结果见 /metrics 的 yag_function_seconds"""
+    function_timings.enabled = enabled
+    return {"enabled": function_timings.enabled}
@@ -1,14 +1,22 @@
+from contextlib import suppress
+
 from fastapi.responses import StreamingResponse, JSONResponse
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Body, Header, Query, Request, status
 
 from app.core.database import SessionDep
+from app.core.streaming import cancel_on_disconnect
 from app.api.youtube_articles.generate import (
+    BATCH_CONCURRENCY,
     Item,
     ItemWithTranscript,
     generate,
+    generate_batch,
+    plan_article,
     to_vercel_ai_sdk_generator,
 )
+from app.api.youtube_articles.jobs import ArticleJobPublic, article_jobs
 from app.lib.models.articles import ArticleFromTranscript, ArticleFromYoutubeUrl
+from app.lib.tools.youtube_info import YouTubeURL, check_transcript_admission
 
 router = APIRouter(prefix="/youtube-articles", tags=["youtube-articles"])
 
@@ -26,10 +34,85 @@ async def generate_route(item: Item | ItemWithTranscript) -> dict:
 
 
 @router.post("/api/youtube-articles/generate_stream")
-async def generate_stream_route(item: Item | ItemWithTranscript):
+async def generate_stream_route(
+    item: Item | ItemWithTranscript,
+    request: Request,
+    keep_running: bool = Query(
+        default=False, description="客户端断开后仍继续生成（结果写入缓存）"
+    ),
+):
     print(f"{item=}")
+
+    plan = None
+    if isinstance(item, Item):
+        # 开始 SSE 之前检查 transcript 限流：排队已满时直接返回 429
+        # 无效 URL 留给流内报错
+        with suppress(ValueError):
+            check_transcript_admission(YouTubeURL.of(item.youtube_url))
+    else:
+        # 超长输入在开始 SSE 之前返回 413，不产生 LLM 调用；plan 传给生成流复用
+        plan = plan_article(item.transcript, item.prompt)
+
+    return StreamingResponse(
+        cancel_on_disconnect(
+            request, to_vercel_ai_sdk_generator(item, keep_running, plan)
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "Cache-Control",
+        },
+    )
+
+
+@router.post("/api/youtube-articles/generate_batch")
+async def generate_batch_route(
+    items: list[Item | ItemWithTranscript] = Body(min_length=1, max_length=100),
+    concurrency: int = Query(default=BATCH_CONCURRENCY, ge=1, le=16),
+):
+    """批量生成文章，每完成一篇输出一行 NDJSON"""
+    return StreamingResponse(
+        generate_batch(items, concurrency),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.post(
+    "/api/youtube-articles/jobs",
+    response_model=ArticleJobPublic,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_job_route(item: Item | ItemWithTranscript) -> ArticleJobPublic:
+    """提交后台生成任务，生成过程不依赖客户端连接"""
+    job = await article_jobs.submit(item)
+    return ArticleJobPublic.model_validate(job, from_attributes=True)
+
+
+@router.get("/api/youtube-articles/jobs/{job_id}", response_model=ArticleJobPublic)
+async def read_job_route(job_id: str) -> ArticleJobPublic:
+    """查询任务状态与结果"""
+    job = await article_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return ArticleJobPublic.model_validate(job, from_attributes=True)
+
+
+@router.get("/api/youtube-articles/jobs/{job_id}/stream")
+async def stream_job_route(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    last_event_id: int | None = Header(default=None),
+):
+    """连接任务的实时 token 流；重连时通过 offset（已收到的字符数）或 Last-Event-ID 续传"""
+    if article_jobs.channel(job_id) is None and not await article_jobs.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
     return StreamingResponse(
-        to_vercel_ai_sdk_generator(item),
+        article_jobs.stream(job_id, last_event_id or offset),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
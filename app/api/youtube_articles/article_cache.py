@@ -0,0 +1,89 @@
+"""
+已完成文章的缓存：进程内 LRU（按字节数封顶）+ SQLite 两级缓存
+
+key 由 transcript、生效的 prompt、mode 和模型名共同决定，任一变化都会重新生成。
+"""
+
+import hashlib
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel
+
+from app.core.config import env_bool, env_float, env_int
+from app.core.metrics import observe_cache
+from app.lib.two_tier_cache import TwoTierCache
+
+ARTICLE_CACHE_ENABLED = env_bool("YAG_ARTICLE_CACHE", True)
+ARTICLE_CACHE_TTL = env_float("YAG_ARTICLE_CACHE_TTL", 30 * 24 * 3600)
+ARTICLE_CACHE_MEMORY_SIZE = env_int("YAG_ARTICLE_CACHE_MEMORY_SIZE", 128)
+"""进程内缓存的文章数；只保留最近用到的一小部分，其余从 SQLite 读取"""
+ARTICLE_CACHE_MEMORY_BYTES = env_int("YAG_ARTICLE_CACHE_MEMORY_BYTES", 32 * 1024 * 1024)
+ARTICLE_CACHE_DB_SIZE = env_int("YAG_ARTICLE_CACHE_DB_SIZE", 5_000)
+
+
+def article_cache_key(
+    transcript: str, prompt: str, mode: str | None, model: str
+) -> str:
+    """文章缓存 key：各部分用 NUL 分隔后取 sha256"""
+    parts = (transcript, prompt, mode or "", model)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ArticleCacheEntry(SQLModel, table=True):
+    """SQLite 中的文章缓存记录"""
+
+    __tablename__ = "article_cache"
+
+    key: str = Field(primary_key=True, description="缓存 key（sha256）")
+    article: str = Field(description="生成的文章")
+    created_at: float = Field(index=True, description="写入时间（时间戳）")
+    accessed_at: float = Field(index=True, description="最近访问时间（时间戳）")
+
+
+class ArticleCache(TwoTierCache[str]):
+    """两级文章缓存；`enabled` 为 False 时不读不写"""
+
+    name = "article_cache"
+    entry_model = ArticleCacheEntry
+    value_field = "article"
+    weight_unit = "bytes"
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None = None,
+        memory_size: int = ARTICLE_CACHE_MEMORY_SIZE,
+        memory_bytes: int = ARTICLE_CACHE_MEMORY_BYTES,
+        db_size: int = ARTICLE_CACHE_DB_SIZE,
+        ttl: float = ARTICLE_CACHE_TTL,
+        enabled: bool = ARTICLE_CACHE_ENABLED,
+    ):
+        super().__init__(
+            engine,
+            memory_size=memory_size,
+            memory_weight=memory_bytes,
+            weigher=lambda article: len(article.encode("utf-8")),
+            db_size=db_size,
+            ttl=ttl,
+        )
+        self.enabled = enabled
+
+    async def get(self, key: str) -> str | None:
+        """读取缓存；未命中返回 None"""
+        if not self.enabled:
+            return None
+        return await super().get(key)
+
+    async def set(self, key: str, article: str) -> None:
+        """写入两级缓存，并按 TTL / 容量淘汰 SQLite 中的旧记录"""
+        if not self.enabled or not article:
+            return
+        await super().set(key, article)
+
+
+article_cache = ArticleCache()
+"""应用级文章缓存"""
+
+observe_cache("article", article_cache)
+
+
+__all__ = ["ArticleCache", "ArticleCacheEntry", "article_cache", "article_cache_key"]
@@ -0,0 +1,62 @@
+"""
+测试用的假 LLM 基类：用按固定节奏输出的假模型代替 ARK，供生成相关的测试共用
+"""
+
+import unittest
+import unittest.mock
+from typing import Any, AsyncIterator, ClassVar
+
+from langchain_core.outputs import ChatGenerationChunk
+
+from app.api.youtube_articles import generate
+from app.api.youtube_articles.article_cache import ArticleCache
+from app.lib import llms
+from app.lib.fake_llm import FakeStreamingChatModel
+
+
+class CountingFakeModel(FakeStreamingChatModel):
+    """记录同时进行中的流的假模型"""
+
+    active: ClassVar[int] = 0
+    peak: ClassVar[int] = 0
+
+    async def _astream(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        cls = type(self)
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            async for chunk in super()._astream(*args, **kwargs):
+                yield chunk
+        finally:
+            cls.active -= 1
+
+
+class FakeLLMTestCase(unittest.IsolatedAsyncioTestCase):
+    """用假模型代替 ARK，并关闭文章缓存"""
+
+    def setUp(self):
+        CountingFakeModel.active = CountingFakeModel.peak = 0
+        self.model = CountingFakeModel(
+            model_name="fake:batch",
+            time_to_first_token=0.02,
+            tokens_per_second=0,
+            output_tokens=5,
+        )
+        patches = [
+            unittest.mock.patch.object(
+                llms, "ROUTED_MODELS", [(llms.CHAT_MODEL, lambda: self.model)]
+            ),
+            unittest.mock.patch.object(
+                generate, "article_cache", ArticleCache(enabled=False)
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        generate._chains.clear()
+        self.addCleanup(generate._chains.clear)
+
+
+__all__ = ["CountingFakeModel", "FakeLLMTestCase"]
@@ -1,71 +1,242 @@
 from sqlalchemy import alias
+import asyncio
+import logging
 import os
+import hashlib
 import json
+import time
 import uuid
-from typing import AsyncIterator, Union
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Literal, Sequence, Union
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessageChunk, SystemMessage
+from langchain_core.messages import AIMessageChunk
+from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    HumanMessagePromptTemplate,
-    PromptTemplate,
-)
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable
-from langsmith import Client
 from pydantic import BaseModel, ConfigDict, Field
 
-from app.lib.llms import chatModel
-from app.lib.tools.youtube_info import fetch_transcript, YouTubeURL
+from app.api.youtube_articles.article_cache import article_cache, article_cache_key
+from app.api.youtube_articles.long_transcript import (
+    chunk_entries,
+    chunk_text,
+    map_reduce_stream,
+)
+from app.core.config import env_int
+from app.core.metrics import (
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TOKENS_SAVED,
+    LLM_TOKENS_STREAMED,
+    SSE_STREAMS_ACTIVE,
+)
+from app.core.profiling import timed
+from app.core.tracing import current_trace, record, span
+from app.lib.broadcast import BroadcastHub
+from app.lib.llms import OUTPUT_RESERVE_TOKENS, get_chat_model, route_model
+from app.lib.lru_cache import LRUCache
+from app.lib.prompt_registry import PromptSpec, prompt_registry
+from app.lib.sse import DONE, VercelSSEEncoder, coalesce
+from app.lib.tokens import InputTooLongError, estimate_tokens
+from app.lib.tools.youtube_info import (
+    fetch_transcript_data,
+    YouTubeURL,
+)
+from app.lib.youtube_models import TranscriptData
 
-client = Client()
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 verbose = os.getenv("YAG_VERBOSE") == "True"
 
+BATCH_CONCURRENCY = env_int("YAG_BATCH_CONCURRENCY", 4)
+MAX_INPUT_TOKENS = env_int("YAG_MAX_INPUT_TOKENS", 400_000)
+PROMPT_CACHE_SIZE = env_int("YAG_PROMPT_CACHE_SIZE", 128)
+"""编译好的自定义 prompt（及其 chain）最多缓存的数量"""
+
+PromptMode = Literal["override", "prepend", "append"]
+"""自定义 prompt 的模式：全量覆盖系统提示词，或放到系统提示词之前/之后"""
+DEFAULT_PROMPT_MODE: PromptMode = "append"
+
 
 def enhance_prompt(
-    original_prompt: PromptTemplate, custom_system_prompt: str
+    spec: PromptSpec, custom_prompt: str, mode: PromptMode = DEFAULT_PROMPT_MODE
 ) -> ChatPromptTemplate:
-    """增强原始提示词，添加自定义系统提示"""
-
-    system_message = SystemMessage(content=custom_system_prompt)
-    # 将原始 PromptTemplate 转换为 HumanMessage
-    human_message = HumanMessagePromptTemplate.from_template(original_prompt.template)
-    # 创建 ChatPromptTemplate
-    chat_prompt = ChatPromptTemplate.from_messages([system_message, human_message])
-    chat_prompt.input_variables = original_prompt.input_variables
+    """
+    把用户的 prompt 合并进系统提示词
+
+    用户 prompt 只作为系统消息的文本，不作为模板解析；
+    human 模板（transcript 的位置）保持不变。
+    """
+    if mode == "override":
+        system = custom_prompt
+    elif mode == "prepend":
+        system = f"{custom_prompt}\n{spec.system}"
+    else:
+        system = f"{spec.system}\n{custom_prompt}"
 
-    return chat_prompt
+    return replace(spec, system=system).compile()
 
 
+# 本地 prompt 注册表（app/prompts），启动时不联网；来源：
 # https://smith.langchain.com/hub/muhsinbashir/youtube-transcript-to-article
 # muhsinbashir/youtube-transcript-to-article：Convert any Youtube Video Transcript into an Article ( SEO friendly )
-original_prompt: PromptTemplate = client.pull_prompt(
-    "muhsinbashir/youtube-transcript-to-article", include_model=True
+ARTICLE_PROMPT = "youtube-transcript-to-article"
+
+prompt: ChatPromptTemplate = prompt_registry.get(ARTICLE_PROMPT)
+
+# 长 transcript 的 map 阶段：提炼单个分段的要点
+map_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "你将看到一段较长 YouTube 视频转录文本中的一部分（时间范围：{label}）。"
+            "请用中文提炼这一段的要点，保留关键事实、数据、人名和观点，"
+            "不要写开头和结尾，不要使用标题。",
+        ),
+        ("human", "{transcript}"),
+    ]
+)
+
+PROMPT_TOKENS = estimate_tokens(prompt.pretty_repr())
+"""主 prompt 模板本身占用的 token 数（估算）"""
+
+# chain 在第一次请求时才构建（模型也在那时创建）；
+# 自定义 prompt 按 (mode, prompt) 的哈希缓存编译结果，chain 按 (模型名, 哈希) 缓存
+_custom_prompts: LRUCache[str, ChatPromptTemplate] = LRUCache(
+    max_size=PROMPT_CACHE_SIZE
 )
+_chains: LRUCache[tuple[str, str], Runnable] = LRUCache(max_size=PROMPT_CACHE_SIZE * 2)
+_map_chain: Runnable | None = None
+
+
+def _use_prompt(new_prompt: ChatPromptTemplate) -> None:
+    """后台从 LangSmith 刷新出新版本 prompt 时丢弃已构建的 prompt 与 chain"""
+    global prompt, PROMPT_TOKENS
+    prompt = new_prompt
+    PROMPT_TOKENS = estimate_tokens(prompt.pretty_repr())
+    _custom_prompts.clear()
+    _chains.clear()
+
+
+prompt_registry.on_change(ARTICLE_PROMPT, _use_prompt)
+
+
+def _custom_prompt_key(custom_prompt: str | None, mode: PromptMode | None) -> str:
+    """自定义 prompt 的缓存 key；没有自定义 prompt 时为空字符串"""
+    if not custom_prompt:
+        return ""
+    raw = f"{mode or DEFAULT_PROMPT_MODE}\0{custom_prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def article_prompt(
+    custom_prompt: str | None = None, mode: PromptMode | None = None
+) -> ChatPromptTemplate:
+    """生效的文章 prompt；相同的自定义 prompt 和 mode 只编译一次"""
+    key = _custom_prompt_key(custom_prompt, mode)
+    if not key:
+        return prompt
+
+    compiled = _custom_prompts.get(key)
+    if compiled is None:
+        compiled = enhance_prompt(
+            prompt_registry.spec(ARTICLE_PROMPT),
+            custom_prompt,
+            mode or DEFAULT_PROMPT_MODE,
+        )
+        _custom_prompts.set(key, compiled)
+    return compiled
+
+
+def chain_for(
+    model: BaseChatModel,
+    custom_prompt: str | None = None,
+    mode: PromptMode | None = None,
+) -> Runnable:
+    """路由到的模型（及自定义 prompt）对应的 chain"""
+    key = (
+        getattr(model, "model_name", repr(model)),
+        _custom_prompt_key(custom_prompt, mode),
+    )
+    chain = _chains.get(key)
+    if chain is None:
+        chain = article_prompt(custom_prompt, mode) | model
+        _chains.set(key, chain)
+    return chain
 
 
-# 添加自定义系统提示词
-custom_system_prompt = """
-请根据提供的 YouTube 视频转录文本，创作一篇 Markdown 格式文章。需要：
-1. 中文撰写
-2. 使用恰当的 markdown 格式标题层级(#、## 等，# 不应该跟标题。错误示例：“# 标题：Exclusive Or Operation的重要特性”，正确例子：“# Exclusive Or Operation的重要特性”)
-"""
+def get_chain() -> Runnable:
+    """默认模型的 chain"""
+    return chain_for(get_chat_model())
 
-chat_prompt = enhance_prompt(original_prompt, custom_system_prompt)
 
-prompt = chat_prompt
+def get_map_chain() -> Runnable:
+    """长 transcript map 阶段的 chain"""
+    global _map_chain
+    if _map_chain is None:
+        _map_chain = map_prompt | get_chat_model() | StrOutputParser()
+    return _map_chain
 
-chain: Runnable = prompt | chatModel
+
+@dataclass
+class ArticlePlan:
+    """生成前的预算规划：估算输入 token 并选择模型"""
+
+    input_tokens: int
+    model: BaseChatModel | None
+    """单次调用使用的模型；None 表示走 map-reduce"""
+
+    @property
+    def model_name(self) -> str:
+        if self.model is None:
+            return f"map-reduce:{get_chat_model().model_name}"
+        return getattr(self.model, "model_name", "")
+
+    def metadata(self) -> dict:
+        return {
+            "inputTokens": self.input_tokens,
+            "model": self.model_name,
+            "mapReduce": self.model is None,
+        }
+
+
+def plan_article(transcript: str, custom_prompt: str | None = None) -> ArticlePlan:
+    """
+    估算输入大小并选择最便宜、最快且放得下的模型
+
+    优先单次调用：只要 `route_model` 能选出放得下的模型（含长上下文模型）就不分段；
+    所有模型都放不下时才走 map-reduce。超过 `YAG_MAX_INPUT_TOKENS` 时在调用 LLM
+    之前直接抛出 InputTooLongError。
+    """
+    input_tokens = PROMPT_TOKENS + estimate_tokens(transcript)
+    if custom_prompt:
+        input_tokens += estimate_tokens(custom_prompt)
+    if input_tokens > MAX_INPUT_TOKENS:
+        raise InputTooLongError(input_tokens, MAX_INPUT_TOKENS)
+
+    return ArticlePlan(input_tokens, route_model(input_tokens))
+
+
+def _reduce_chain(
+    notes: str, custom_prompt: str | None = None, mode: PromptMode | None = None
+) -> Runnable:
+    input_tokens = PROMPT_TOKENS + estimate_tokens(notes)
+    if custom_prompt:
+        input_tokens += estimate_tokens(custom_prompt)
+    model = route_model(input_tokens)
+    if model is None:
+        raise InputTooLongError(input_tokens, MAX_INPUT_TOKENS)
+    return chain_for(model, custom_prompt, mode)
 
 
 class ItemWithTranscript(BaseModel):
     prompt: str | None = None
     transcript: str
-    mode: str | None = None
+    mode: PromptMode | None = Field(
+        default=None, description="自定义 prompt 的模式，默认 append"
+    )
 
     @property
     def id(self) -> str:
@@ -77,7 +248,9 @@ class Item(BaseModel):
     prompt: str | None = None
     youtube_url: str = Field(description="YouTube视频URL")
     # youtube_url: str = Field(description="YouTube视频URL", alias="youtubeUrl")
-    mode: str | None = None
+    mode: PromptMode | None = Field(
+        default=None, description="自定义 prompt 的模式，默认 append"
+    )
 
     model_config = ConfigDict(
         # 关键配置
@@ -100,19 +273,227 @@ class Item(BaseModel):
         return YouTubeURL.of(self.youtube_url).video_id
 
 
+def _article_key(
+    item: Item | ItemWithTranscript, transcript: str, plan: ArticlePlan
+) -> str:
+    """文章缓存 key：transcript + 生效 prompt + mode + 模型名"""
+    return article_cache_key(
+        transcript=transcript,
+        prompt=article_prompt(item.prompt, item.mode).pretty_repr(),
+        mode=item.mode,
+        model=plan.model_name,
+    )
+
+
 async def generate(item: Item | ItemWithTranscript) -> str:
     print(f"Received 1 item: {item}")
     if isinstance(item, ItemWithTranscript):
-        str_chain: Runnable = chain | StrOutputParser()
-        transcript = "\n" + item.transcript
+        stream = await stream_article(item, item.transcript)
+    else:
+        transcript_data = await fetch_transcript_data(YouTubeURL.of(item.youtube_url))
+        stream = await stream_article(
+            item, transcript_data.get_full_text(), transcript_data
+        )
 
-        return await str_chain.ainvoke(input=transcript)
+    return "".join([chunk.content async for chunk in stream])
 
-    return "not implemented 1"
 
+def _safe_item_id(item: Item | ItemWithTranscript) -> str | None:
+    """无效 URL 时 item.id 会抛出异常"""
+    try:
+        return item.id
+    except ValueError:
+        return None
+
+
+async def generate_batch(
+    items: Sequence[Item | ItemWithTranscript],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> AsyncIterator[str]:
+    """
+    并发生成多篇文章，按完成顺序逐行输出 NDJSON
+
+    每行对应一个 item：`index` 为其在请求中的位置，成功时带 `article`，
+    失败时带 `error`；单个 item 失败不影响其他 item。
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, item: Item | ItemWithTranscript) -> dict:
+        async with semaphore:
+            result: dict = {"index": index, "id": _safe_item_id(item)}
+            try:
+                result |= {"status": "success", "article": await generate(item)}
+            except Exception as exception:
+                verbose and print(
+                    f"💥 [generate_batch] #{index} Exception: {exception}"
+                )
+                result |= {"status": "error", "error": str(exception)}
+            return result
+
+    tasks = [
+        asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
 
-async def generate_stream(
+
+async def stream_article(
     item: Item | ItemWithTranscript,
+    transcript: str,
+    transcript_data: TranscriptData | None = None,
+    plan: ArticlePlan | None = None,
+) -> AsyncIterator[AIMessageChunk]:
+    """
+    命中文章缓存时直接回放，否则调用 LLM 并在完整生成后写入缓存
+
+    调用方已对同一 transcript 做过 `plan_article` 时传入 plan，不再重复估算 token。
+    """
+    with span("plan") as attributes:
+        if plan is None:
+            plan = plan_article(transcript, item.prompt)
+        attributes.update(plan.metadata())
+    key = _article_key(item, transcript, plan)
+    with span("article_cache") as attributes:
+        article = await article_cache.get(key)
+        attributes["hit"] = article is not None
+    if article is not None:
+        verbose and print(f"[generate_stream] article cache hit: {key}")
+        return _replay_article(article)
+
+    if plan.model is None:
+        # 超出单次调用预算：分段并发提炼，再流式合并
+        chunks = (
+            chunk_entries(transcript_data.to_compact())
+            if transcript_data and transcript_data.custom
+            else chunk_text(transcript)
+        )
+        verbose and print(f"[generate_stream] long transcript, {len(chunks)} chunks")
+        return _cache_article(
+            key,
+            plan.model_name,
+            map_reduce_stream(
+                chunks,
+                get_map_chain(),
+                lambda notes: _reduce_chain(notes, item.prompt, item.mode),
+            ),
+        )
+
+    verbose and print(
+        f"[generate_stream] {plan.input_tokens} tokens -> {plan.model_name}"
+    )
+    with span("prompt_build"):
+        chain = chain_for(plan.model, item.prompt, item.mode)
+    return _cache_article(key, plan.model_name, chain.astream(input="\n" + transcript))
+
+
+class ArticleStreamStats:
+    """LLM 流的完成/取消统计，用于估算客户端断开后节省的输出 token"""
+
+    def __init__(self):
+        self.completed = 0
+        self.cancelled = 0
+        self.output_tokens = 0
+        self.tokens_saved = 0
+
+    @property
+    def average_output_tokens(self) -> int:
+        """已完成文章的平均输出 token 数；还没有样本时按输出预留计"""
+        if not self.completed:
+            return OUTPUT_RESERVE_TOKENS
+        return self.output_tokens // self.completed
+
+    def record_completed(self, output_tokens: int) -> None:
+        self.completed += 1
+        self.output_tokens += output_tokens
+
+    def record_cancelled(self, generated_tokens: int) -> int:
+        """记录一次取消，返回估算节省的 token 数"""
+        saved = max(0, self.average_output_tokens - generated_tokens)
+        self.cancelled += 1
+        self.tokens_saved += saved
+        return saved
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "tokens_saved": self.tokens_saved,
+            "average_output_tokens": self.average_output_tokens,
+        }
+
+
+article_stream_stats = ArticleStreamStats()
+
+_sse_streams = SSE_STREAMS_ACTIVE.labels("generate_stream")
+
+
+async def _replay_article(article: str) -> AsyncIterator[AIMessageChunk]:
+    yield AIMessageChunk(content=article)
+
+
+async def _observe_shared_stream(
+    stream: AsyncIterator[AIMessageChunk], subscribed_at: float
+) -> AsyncIterator[AIMessageChunk]:
+    """
+    在订阅者自己的请求追踪中记录 TTFT 与输出耗时
+
+    共享的上游在独立的 Context 中运行，它记录的阶段不属于任何请求；
+    每个订阅者（包括中途加入的）按自己收到第一个分块的时间计算。
+    """
+    first_chunk_at: float | None = None
+    chunks = 0
+    try:
+        async for chunk in stream:
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+                record("llm_ttft", first_chunk_at - subscribed_at)
+            chunks += 1
+            yield chunk
+    finally:
+        await stream.aclose()
+    if first_chunk_at is not None:
+        record("llm_stream", time.perf_counter() - first_chunk_at, chunks=chunks)
+
+
+async def _cache_article(
+    key: str, model_name: str, stream: AsyncIterator[AIMessageChunk]
+) -> AsyncIterator[AIMessageChunk]:
+    parts: list[str] = []
+    started = time.perf_counter()
+    first_token_at: float | None = None
+    try:
+        async for chunk in stream:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                record("llm_ttft", first_token_at - started)
+                LLM_TIME_TO_FIRST_TOKEN.labels(model_name).observe(
+                    first_token_at - started
+                )
+            parts.append(chunk.content)
+            yield chunk
+    except (asyncio.CancelledError, GeneratorExit):
+        saved = article_stream_stats.record_cancelled(estimate_tokens("".join(parts)))
+        LLM_TOKENS_SAVED.labels(model_name).inc(saved)
+        logger.info(f"[generate_stream] cancelled, ~{saved} output tokens saved")
+        raise
+    finally:
+        # 每个流结束时加一次，而不是每个分块都更新指标
+        LLM_TOKENS_STREAMED.labels(model_name).inc(len(parts))
+
+    # 只缓存完整生成的文章；中途出错或取消不会走到这里
+    if first_token_at is not None:
+        record("llm_stream", time.perf_counter() - first_token_at, chunks=len(parts))
+    article = "".join(parts)
+    article_stream_stats.record_completed(estimate_tokens(article))
+    await article_cache.set(key, article)
+
+
+async def generate_stream(
+    item: Item | ItemWithTranscript, plan: ArticlePlan | None = None
 ) -> AsyncIterator[AIMessageChunk]:
     verbose and print(f"[generate_stream] item: {item}")
 
@@ -121,17 +502,17 @@ async def generate_stream(
     if isinstance(item, ItemWithTranscript):
         verbose and print("[generate_stream] ItemWithTranscript")
 
-        transcript = "\n" + item.transcript
         # print(f"Prompt: {prompt.format(transcript=transcript)}")
-        return chain.astream(input=transcript)
+        return await stream_article(item, item.transcript, plan=plan)
     else:
         url: str = item.youtube_url
         verbose and print(f"[generate_stream] only url: {url}")
 
         # fetch transcript by url
         try:
-            transcript = await fetch_transcript(YouTubeURL.of(url))
-            return chain.astream(input="\n" + transcript)
+            with span("parse_url"):
+                youtube_url = YouTubeURL.of(url)
+            transcript_data = await fetch_transcript_data(youtube_url)
         except Exception as exception:
             verbose and print(f"💥 [generate_stream] Exception: {exception}")
 
@@ -141,6 +522,10 @@ async def generate_stream(
 
             return error_generator(str(exception))
 
+        return await stream_article(
+            item, transcript_data.get_full_text(), transcript_data, plan
+        )
+
     # Final fallback for any unhandled case
     async def not_implemented_generator():
         yield AIMessageChunk(content="not implemented")
@@ -148,43 +533,114 @@ async def generate_stream(
     return not_implemented_generator()
 
 
-async def to_vercel_ai_sdk_generator(item: Union[Item, ItemWithTranscript]):
-    """生成SSE格式的流式响应"""
+article_streams: BroadcastHub[AIMessageChunk] = BroadcastHub()
+"""进行中的文章流，相同请求共享同一次 LLM 调用"""
+
+
+async def _plan_input(item: Item | ItemWithTranscript) -> ArticlePlan | None:
+    """
+    估算输入并选择模型；结果既用于 text-start 事件，也传给生成流
+
+    transcript 取不到或超长时返回 None，由生成流报告错误。
+    """
     try:
-        # 获取流式输出
-        stream = await generate_stream(item)
+        if isinstance(item, ItemWithTranscript):
+            transcript = item.transcript
+        else:
+            # 与 generate_stream 共享 transcript 缓存和 single-flight，不会重复请求
+            transcript_data = await fetch_transcript_data(
+                YouTubeURL.of(item.youtube_url)
+            )
+            transcript = transcript_data.get_full_text()
+        return plan_article(transcript, item.prompt)
+    except Exception:
+        return None
+
+
+def _stream_key(item: Item | ItemWithTranscript) -> tuple | None:
+    item_id = _safe_item_id(item)
+    if item_id is None:
+        return None
+    return (type(item).__name__, item_id, item.prompt, item.mode)
+
+
+@timed()
+async def to_vercel_ai_sdk_generator(
+    item: Union[Item, ItemWithTranscript],
+    keep_running: bool = False,
+    plan: ArticlePlan | None = None,
+):
+    """
+    生成SSE格式的流式响应
+
+    所有订阅同一上游的客户端都断开后，上游 LLM 流会被取消；
+    `keep_running=True` 时继续生成直到完成（结果写入文章缓存）。
+    调用方已经调用过 `plan_article` 时传入 plan，整个请求只估算一次 token。
+    """
+    _sse_streams.inc()
+    try:
+        if plan is None:
+            with span("describe_input"):
+                plan = await _plan_input(item)
+
+        # 获取流式输出；相同请求并发时复用同一个上游流
+        key = _stream_key(item)
+        if key is None:
+            stream = await generate_stream(item, plan)
+        else:
+            subscribed_at = time.perf_counter()
+            stream = _observe_shared_stream(
+                article_streams.subscribe(
+                    key, lambda: generate_stream(item, plan), keep_running=keep_running
+                ),
+                subscribed_at,
+            )
 
         # 如果是字符串类型（错误信息），直接返回
         if isinstance(stream, str):
-            yield f"data: {stream}\n\n"
+            yield f"data: {stream}\n\n".encode()
             return
 
-        # 初始化id
-
-        id: str = str(uuid.uuid4())
-        yield f"data: {json.dumps({'id': id, 'type': 'text-start'})}\n\n"
-
-        # 流式输出内容
-        async for chunk in stream:
-            if not id:
-                assert chunk.id, "chunk.id should not be None"
-                id = chunk.id
-            # 将每个数据块包装为SSE格式
-            # 转成 vercel ai sdk 格式 id, type: "text-delta", delta: chunk.content
-            chunk = {"id": id, "type": "text-delta", "delta": chunk.content}
-            # yield f"data: {chunk}\n\n"
-            # json dump
-            chunk = json.dumps(chunk)
-            # yield f"data: {chunk}\n\n"
-            yield f"data: {chunk}\n\n"
+        # 初始化id；id/type 前缀由编码器预先编码
+        encoder = VercelSSEEncoder(str(uuid.uuid4()))
+        yield encoder.start({"youtubeArticles": plan.metadata()} if plan else None)
+
+        # 流式输出内容：转成 vercel ai sdk 格式 id, type: "text-delta", delta
+        # YAG_SSE_COALESCE_WINDOW > 0 时把时间窗口内的 delta 合并成一帧
+        started = time.perf_counter()
+        first_delta_at: float | None = None
+        async for delta in coalesce(chunk.content async for chunk in stream):
+            if first_delta_at is None:
+                first_delta_at = time.perf_counter()
+                record("first_delta", first_delta_at - started)
+            yield encoder.delta(delta)
+        if first_delta_at is not None:
+            record("streaming", time.perf_counter() - first_delta_at)
 
         # 发送结束信号 id, type: "text-end"
-        yield f"data: {json.dumps({'id': id, 'type': 'text-end'})}\n\n"
-        yield "data: [DONE]\n\n"
+        yield encoder.end()
+        # 本次请求各阶段耗时（毫秒），便于定位慢在哪一步
+        if trace := current_trace():
+            yield encoder.data("timings", trace.to_dict())
+        yield DONE
 
     except Exception as e:
         # 错误处理
-        yield f"data: Error: {str(e)}\n\n"
-
-
-__all__ = ["generate", "to_vercel_ai_sdk_generator"]
+        yield f"data: Error: {str(e)}\n\n".encode()
+    finally:
+        _sse_streams.dec()
+
+
+__all__ = [
+    "ArticlePlan",
+    "PromptMode",
+    "article_prompt",
+    "get_chain",
+    "article_stream_stats",
+    "article_streams",
+    "generate",
+    "generate_batch",
+    "plan_article",
+    "stream_article",
+    "to_vercel_ai_sdk_generator",
+]
@@ -0,0 +1,257 @@
+"""
+后台文章生成任务：asyncio 队列 + worker 池 + SQLite 任务表
+
+生成过程与 HTTP 连接解耦：客户端提交任务后可轮询状态，或随时（重新）连接
+任务的实时 token 流，断线重连时从上次收到的位置继续。
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Literal
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlmodel import Field, SQLModel, select
+
+from app.api.youtube_articles.generate import Item, ItemWithTranscript, stream_article
+from app.lib.tools.youtube_info import YouTubeURL, fetch_transcript_data
+from app.core.config import env_int
+from app.core.metrics import QUEUE_DEPTH, SSE_STREAMS_ACTIVE
+from app.lib.broadcast import BroadcastChannel
+from app.lib.lru_cache import LRUCache
+from app.lib.sse import DONE, VercelSSEEncoder
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = env_int("YAG_JOB_WORKERS", 2)
+JOB_FINISHED_CHANNELS = env_int("YAG_JOB_FINISHED_CHANNELS", 256)
+
+_sse_streams = SSE_STREAMS_ACTIVE.labels("job_stream")
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class ArticleJob(SQLModel, table=True):
+    """文章生成任务"""
+
+    __tablename__ = "article_jobs"
+
+    id: str = Field(primary_key=True, description="任务ID")
+    status: str = Field(default="queued", index=True, description="任务状态")
+    item: str = Field(description="请求参数 JSON")
+    article: str | None = Field(default=None, description="生成的文章")
+    error: str | None = Field(default=None, description="失败原因")
+    created_at: float = Field(default_factory=time.time, description="创建时间")
+    updated_at: float = Field(default_factory=time.time, description="更新时间")
+
+
+class ArticleJobPublic(SQLModel):
+    """返回给客户端的任务信息"""
+
+    id: str
+    status: JobStatus
+    article: str | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+
+def _load_item(data: str) -> Item | ItemWithTranscript:
+    payload = json.loads(data)
+    if "youtube_url" in payload:
+        return Item.model_validate(payload)
+    return ItemWithTranscript.model_validate(payload)
+
+
+class ArticleJobQueue:
+    """文章生成任务队列"""
+
+    def __init__(self, workers: int = JOB_WORKERS, engine: AsyncEngine | None = None):
+        self.workers = workers
+        self._engine = engine
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._channels: dict[str, BroadcastChannel[str]] = {}
+        self._finished: LRUCache[str, BroadcastChannel[str]] = LRUCache(
+            max_size=JOB_FINISHED_CHANNELS
+        )
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from app.core.database import get_async_engine
+
+            self._engine = get_async_engine()
+        return self._engine
+
+    @property
+    def depth(self) -> int:
+        """排队中（尚未开始）的任务数"""
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        """启动 worker，并把上次未完成的任务重新入队"""
+        async with AsyncSession(self.engine) as session:
+            result = await session.execute(
+                select(ArticleJob)
+                .where(ArticleJob.status.in_(["queued", "running"]))
+                .order_by(ArticleJob.created_at)
+            )
+            unfinished = result.scalars().all()
+            for job in unfinished:
+                job.status = "queued"
+                self._enqueue(job.id)
+            await session.commit()
+
+        if unfinished:
+            logger.info(f"[jobs] re-queued {len(unfinished)} unfinished jobs")
+
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"article-job-worker-{n}")
+            for n in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """停止 worker；运行中的任务保持 running 状态，下次启动时重新执行"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _enqueue(self, job_id: str) -> None:
+        self._channels[job_id] = BroadcastChannel()
+        self._queue.put_nowait(job_id)
+
+    async def submit(self, item: Item | ItemWithTranscript) -> ArticleJob:
+        """提交任务"""
+        job = ArticleJob(id=str(uuid.uuid4()), item=item.model_dump_json())
+        async with AsyncSession(self.engine) as session:
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+
+        self._enqueue(job.id)
+        return job
+
+    async def get(self, job_id: str) -> ArticleJob | None:
+        async with AsyncSession(self.engine) as session:
+            return await session.get(ArticleJob, job_id)
+
+    def channel(self, job_id: str) -> BroadcastChannel[str] | None:
+        """进行中或最近完成任务的 token 流"""
+        return self._channels.get(job_id) or self._finished.get(job_id, count=False)
+
+    async def _update(self, job_id: str, **fields) -> None:
+        async with AsyncSession(self.engine) as session:
+            job = await session.get(ArticleJob, job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            await session.commit()
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception(f"[jobs] worker {n} crashed on job {job_id}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        channel = self._channels[job_id]
+        job = await self.get(job_id)
+        if job is None:
+            channel.close(LookupError(f"Job {job_id} not found"))
+            return
+
+        await self._update(job_id, status="running")
+        logger.info(f"[jobs] running job {job_id}")
+
+        try:
+            item = _load_item(job.item)
+            if isinstance(item, Item):
+                # 只取一次 transcript 并直接用于生成；失败时任务记为 failed，
+                # 而不是像 generate_stream 那样把错误文本当作文章
+                transcript_data = await fetch_transcript_data(
+                    YouTubeURL.of(item.youtube_url)
+                )
+                stream = await stream_article(
+                    item, transcript_data.get_full_text(), transcript_data
+                )
+            else:
+                stream = await stream_article(item, item.transcript)
+
+            async for chunk in stream:
+                channel.publish(chunk.content)
+        except asyncio.CancelledError:
+            channel.close(RuntimeError("Job interrupted by shutdown"))
+            raise
+        except Exception as exception:
+            await self._update(job_id, status="failed", error=str(exception))
+            channel.close(exception)
+        else:
+            await self._update(
+                job_id, status="succeeded", article="".join(channel.chunks)
+            )
+            channel.close()
+        finally:
+            self._channels.pop(job_id, None)
+            self._finished.set(job_id, channel)
+
+    async def stream(self, job_id: str, offset: int = 0) -> AsyncIterator[bytes]:
+        """
+        任务的 token 流（Vercel AI SDK SSE 格式）
+
+        每个 delta 事件带 SSE `id`（到该事件为止已发送的字符数），断线重连时可通过
+        `offset` 或 `Last-Event-ID` 从该位置继续。按字符而不是分块计数，服务重启后
+        从数据库中的整篇文章续传时也只发送客户端还没收到的部分。
+        """
+        encoder = VercelSSEEncoder(job_id)
+        _sse_streams.inc()
+        try:
+            yield encoder.start()
+
+            channel = self.channel(job_id)
+            try:
+                if channel is not None:
+                    # 从头回放内存中的分块，跳过客户端已收到的字符
+                    sent = 0
+                    async for chunk in channel.subscribe():
+                        end = sent + len(chunk)
+                        if end > offset:
+                            unseen = chunk[max(offset - sent, 0) :]
+                            yield encoder.delta(unseen, event_id=end)
+                        sent = end
+                else:
+                    # 进程内已没有该任务的流（如服务重启），回退到数据库中的结果
+                    job = await self.get(job_id)
+                    if job is None or job.status != "succeeded":
+                        error = job.error if job else "Job not found"
+                        yield f"data: Error: {error or 'Job is not finished'}\n\n".encode()
+                        return
+                    article = job.article or ""
+                    if offset < len(article):
+                        yield encoder.delta(article[offset:], event_id=len(article))
+            except Exception as e:
+                yield f"data: Error: {str(e)}\n\n".encode()
+                return
+
+            yield encoder.end()
+            yield DONE
+        finally:
+            _sse_streams.dec()
+
+
+article_jobs = ArticleJobQueue()
+"""应用级文章生成任务队列，在 lifespan 中启动和停止"""
+
+QUEUE_DEPTH.labels("article_jobs").set_function(lambda: article_jobs.depth)
+
+
+__all__ = ["ArticleJob", "ArticleJobPublic", "ArticleJobQueue", "article_jobs"]
@@ -0,0 +1,161 @@
+"""
+长 transcript 的 map-reduce 生成
+
+超出单次调用预算的 transcript 按 token 预算切成与时间戳对齐的分段，
+先并发提炼每段要点（map），再把按时间顺序排列的要点交给主 chain 流式
+生成最终文章（reduce）。
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Sequence
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import Runnable
+
+from app.core.config import env_int
+from app.lib.compact_transcript import CompactTranscript, format_timestamp
+from app.lib.tokens import estimate_tokens
+from app.lib.youtube_models import TranscriptEntry
+
+logger = logging.getLogger(__name__)
+
+CHUNK_TOKENS = env_int("YAG_CHUNK_TOKENS", 6_000)
+MAP_CONCURRENCY = env_int("YAG_MAP_CONCURRENCY", 4)
+
+_SENTENCE_END = re.compile(r"(?<=[。！？.!?\n])\s*")
+
+
+@dataclass
+class TranscriptChunk:
+    """一段 transcript；纯文本 transcript 没有时间戳"""
+
+    text: str
+    start: str | None = None
+    end: str | None = None
+
+    @property
+    def label(self) -> str:
+        if self.start is None:
+            return ""
+        return f"[{self.start} - {self.end}]"
+
+
+def chunk_entries(
+    entries: Sequence[TranscriptEntry] | CompactTranscript,
+    max_tokens: int = CHUNK_TOKENS,
+) -> list[TranscriptChunk]:
+    """
+    按条目边界切分，每段不超过 max_tokens（单个超长条目独占一段）
+
+    分段文本直接从完整文本中切出，不逐段重新拼接。
+    """
+    if not isinstance(entries, CompactTranscript):
+        entries = CompactTranscript.from_entries(entries)
+
+    chunks: list[TranscriptChunk] = []
+    first = 0
+    tokens = 0
+
+    def flush(stop: int) -> None:
+        if stop > first:
+            chunks.append(
+                TranscriptChunk(
+                    text=entries.text_between(first, stop),
+                    start=format_timestamp(entries.starts[first]),
+                    end=format_timestamp(entries.ends[stop - 1]),
+                )
+            )
+
+    for index in range(len(entries)):
+        entry_tokens = estimate_tokens(entries.entry_text(index)) + 1
+        if index > first and tokens + entry_tokens > max_tokens:
+            flush(index)
+            first, tokens = index, 0
+        tokens += entry_tokens
+    flush(len(entries))
+
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> list[TranscriptChunk]:
+    """没有时间戳的 transcript 按句子边界切分"""
+    chunks: list[TranscriptChunk] = []
+    current: list[str] = []
+    tokens = 0
+
+    for sentence in _SENTENCE_END.split(text):
+        if not sentence:
+            continue
+        sentence_tokens = estimate_tokens(sentence)
+        if current and tokens + sentence_tokens > max_tokens:
+            chunks.append(TranscriptChunk(text="".join(current)))
+            current, tokens = [], 0
+        current.append(sentence)
+        tokens += sentence_tokens
+
+    if current:
+        chunks.append(TranscriptChunk(text="".join(current)))
+    return chunks
+
+
+async def summarize_chunks(
+    chunks: Sequence[TranscriptChunk],
+    map_chain: Runnable,
+    concurrency: int = MAP_CONCURRENCY,
+) -> list[str]:
+    """并发提炼每段要点，结果保持原顺序；任一段失败则取消其余并抛出"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk: TranscriptChunk) -> str:
+        async with semaphore:
+            return await map_chain.ainvoke(
+                {"transcript": chunk.text, "label": chunk.label or "-"}
+            )
+
+    tasks = [asyncio.create_task(run(chunk)) for chunk in chunks]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def merge_notes(chunks: Sequence[TranscriptChunk], notes: Sequence[str]) -> str:
+    """把各段要点按时间顺序拼成 reduce 阶段的输入"""
+    sections = [
+        f"{chunk.label}\n{note.strip()}".strip() for chunk, note in zip(chunks, notes)
+    ]
+    return "以下是按时间顺序整理的视频分段要点：\n\n" + "\n\n".join(sections)
+
+
+async def map_reduce_stream(
+    chunks: Sequence[TranscriptChunk],
+    map_chain: Runnable,
+    reduce_chain: Runnable | Callable[[str], Runnable],
+    concurrency: int = MAP_CONCURRENCY,
+) -> AsyncIterator[AIMessageChunk]:
+    """
+    map 阶段完成后，流式输出 reduce 阶段生成的文章
+
+    `reduce_chain` 也可以是根据合并后的要点选择 chain 的函数（按长度路由模型）。
+    """
+    logger.info(f"[long_transcript] map-reduce over {len(chunks)} chunks")
+    notes = merge_notes(chunks, await summarize_chunks(chunks, map_chain, concurrency))
+
+    if not isinstance(reduce_chain, Runnable):
+        reduce_chain = reduce_chain(notes)
+
+    async for chunk in reduce_chain.astream(input="\n" + notes):
+        yield chunk
+
+
+__all__ = [
+    "TranscriptChunk",
+    "chunk_entries",
+    "chunk_text",
+    "map_reduce_stream",
+    "summarize_chunks",
+]
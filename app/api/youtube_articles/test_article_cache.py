@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from app.api.youtube_articles.article_cache import ArticleCache, article_cache_key
+
+
+class TestArticleCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def test_key_covers_prompt_mode_and_model(self):
+        """测试 prompt、mode、模型名任一变化都会得到不同的 key"""
+        base = article_cache_key("transcript", "prompt", None, "model")
+
+        self.assertEqual(base, article_cache_key("transcript", "prompt", None, "model"))
+        self.assertNotEqual(
+            base, article_cache_key("transcript", "other", None, "model")
+        )
+        self.assertNotEqual(
+            base, article_cache_key("transcript", "prompt", "brief", "model")
+        )
+        self.assertNotEqual(
+            base, article_cache_key("transcript", "prompt", None, "other")
+        )
+
+    async def test_memory_byte_cap(self):
+        """测试内存层按字节数淘汰，淘汰后仍可从 SQLite 命中"""
+        cache = ArticleCache(engine=self.engine, memory_bytes=10)
+
+        await cache.set("first", "123456")
+        await cache.set("second", "abcdef")
+
+        self.assertEqual(cache.stats()["memory_entries"], 1)
+        self.assertEqual(await cache.get("second"), "abcdef")
+        self.assertEqual(await cache.get("first"), "123456")
+
+        stats = cache.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["db_hits"], 1)
+
+    async def test_memory_size_cap(self):
+        """测试内存层有自己的条目上限，不随 SQLite 容量变化"""
+        cache = ArticleCache(engine=self.engine, memory_size=1, db_size=10)
+
+        await cache.set("first", "first article")
+        await cache.set("second", "second article")
+
+        self.assertEqual(cache.stats()["memory_entries"], 1)
+        self.assertEqual(await cache.get("first"), "first article")
+        self.assertEqual(cache.stats()["db_hits"], 1)
+
+    async def test_db_size_eviction(self):
+        """测试 SQLite 按最近访问时间淘汰"""
+        cache = ArticleCache(engine=self.engine, memory_bytes=0, db_size=1)
+
+        await cache.set("first", "first article")
+        await cache.set("second", "second article")
+
+        self.assertIsNone(await cache.get("first"))
+        self.assertEqual(await cache.get("second"), "second article")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from app.api.youtube_articles import generate
+from app.api.youtube_articles.generate import (
+    ItemWithTranscript,
+    article_streams,
+    plan_article,
+    to_vercel_ai_sdk_generator,
+)
+from app.api.youtube_articles.fake_llm_testing import FakeLLMTestCase
+from app.core import tracing
+from app.core.tracing import RequestTrace
+from app.lib import llms
+
+
+async def traced_request(item: ItemWithTranscript, request_id: str) -> RequestTrace:
+    """在独立的请求追踪中消费一次 SSE 流"""
+    trace = RequestTrace(request_id)
+    tracing._current_trace.set(trace)
+    async for _ in to_vercel_ai_sdk_generator(item):
+        pass
+    return trace
+
+
+class TestSharedStreamTracing(FakeLLMTestCase):
+    async def test_ttft_recorded_per_subscriber(self):
+        """测试共享上游时每个请求都在自己的追踪中记录 TTFT，上游不写入第一个请求"""
+        self.model.time_to_first_token = 0.05
+        self.model.tokens_per_second = 100
+        item = ItemWithTranscript(transcript="shared transcript")
+        joined = article_streams.joined
+
+        first = asyncio.create_task(traced_request(item, "first"))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(traced_request(item, "second"))
+        traces = await asyncio.gather(first, second)
+
+        self.assertEqual(article_streams.joined, joined + 1)
+        for trace in traces:
+            names = [span.name for span in trace.spans]
+            self.assertEqual(names.count("llm_ttft"), 1, names)
+            self.assertEqual(names.count("llm_stream"), 1, names)
+            # 上游的阶段（plan、article_cache 等）不再记入任何请求
+            self.assertNotIn("plan", names)
+            stream_span = next(
+                span for span in trace.spans if span.name == "llm_stream"
+            )
+            # astream 最后可能附带一个空的结束分块
+            self.assertGreaterEqual(
+                stream_span.attributes["chunks"], self.model.output_tokens
+            )
+
+
+def transcript_of(tokens: int) -> str:
+    """构造输入（含 prompt）恰好为 tokens 的 ASCII transcript"""
+    return "abcd" * (tokens - generate.PROMPT_TOKENS)
+
+
+class TestPlanArticle(unittest.TestCase):
+    def setUp(self):
+        self.chat_model = mock.Mock(model_name=llms.CHAT_MODEL)
+        self.long_model = mock.Mock(model_name=llms.FUNCTION_CALLING_MODEL)
+        patcher = mock.patch.object(
+            llms,
+            "ROUTED_MODELS",
+            [
+                (llms.CHAT_MODEL, lambda: self.chat_model),
+                (llms.FUNCTION_CALLING_MODEL, lambda: self.long_model),
+            ],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_short_transcript_uses_chat_model(self):
+        """测试放得进 32K 上下文的 transcript 选最便宜的模型"""
+        chat_limit = llms.context_window(llms.CHAT_MODEL) - llms.OUTPUT_RESERVE_TOKENS
+        for tokens in (1_000, chat_limit):
+            with self.subTest(tokens=tokens):
+                self.assertIs(
+                    plan_article(transcript_of(tokens)).model, self.chat_model
+                )
+
+    def test_long_transcript_within_window_single_pass(self):
+        """测试超出 32K 但放得进长上下文模型的 transcript 单次生成，不分段"""
+        chat_limit = llms.context_window(llms.CHAT_MODEL) - llms.OUTPUT_RESERVE_TOKENS
+        window = llms.context_window(llms.FUNCTION_CALLING_MODEL)
+        for tokens in (chat_limit + 1, 100_000, window - llms.OUTPUT_RESERVE_TOKENS):
+            with self.subTest(tokens=tokens):
+                plan = plan_article(transcript_of(tokens))
+                self.assertEqual(plan.input_tokens, tokens)
+                self.assertIs(plan.model, self.long_model)
+                self.assertFalse(plan.metadata()["mapReduce"])
+
+    def test_beyond_all_windows_uses_map_reduce(self):
+        """测试所有模型都放不下时才走 map-reduce"""
+        window = llms.context_window(llms.FUNCTION_CALLING_MODEL)
+        plan = plan_article(transcript_of(window - llms.OUTPUT_RESERVE_TOKENS + 1))
+        self.assertIsNone(plan.model)
+
+
+class TestPlanOnce(FakeLLMTestCase):
+    async def test_request_estimates_tokens_once(self):
+        """测试一次 SSE 请求只估算一次输入 token，plan 复用于元数据和生成"""
+        item = ItemWithTranscript(transcript="plan once")
+        with mock.patch.object(
+            generate, "plan_article", wraps=generate.plan_article
+        ) as plan_article_spy:
+            frames = [frame async for frame in to_vercel_ai_sdk_generator(item)]
+
+        self.assertEqual(plan_article_spy.call_count, 1)
+        self.assertIn(b'"inputTokens"', frames[0])
+
+        plan = plan_article(item.transcript)
+        with mock.patch.object(generate, "plan_article") as plan_article_spy:
+            async for _ in to_vercel_ai_sdk_generator(item, plan=plan):
+                pass
+        plan_article_spy.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.routers.youtube_articles import router
+from app.api.youtube_articles import generate
+from app.api.youtube_articles.fake_llm_testing import CountingFakeModel, FakeLLMTestCase
+from app.api.youtube_articles.generate import Item, ItemWithTranscript, generate_batch
+
+
+async def collect(items, concurrency: int = 4) -> list[dict]:
+    return [json.loads(line) async for line in generate_batch(items, concurrency)]
+
+
+class TestGenerateBatch(FakeLLMTestCase):
+    async def test_partial_failure(self):
+        """测试单个 item 失败不影响其他 item"""
+        items = [
+            ItemWithTranscript(transcript="first transcript"),
+            Item(youtube_url="not a youtube url"),
+            ItemWithTranscript(transcript="second transcript"),
+        ]
+
+        results = {result["index"]: result for result in await collect(items)}
+
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[1]["status"], "error")
+        self.assertIsNone(results[1]["id"])
+        self.assertIn("error", results[1])
+        for index in (0, 2):
+            self.assertEqual(results[index]["status"], "success")
+            self.assertEqual(results[index]["id"], items[index].id)
+            self.assertTrue(results[index]["article"].startswith("# "))
+
+    async def test_results_in_completion_order_with_index(self):
+        """测试按完成顺序输出，index 对应请求中的位置"""
+        items = [
+            ItemWithTranscript(transcript="slow one"),
+            ItemWithTranscript(transcript="slow two"),
+            Item(youtube_url="invalid"),
+        ]
+
+        results = await collect(items)
+
+        # 无效 URL 不经过模型，最先完成
+        self.assertEqual(results[0]["index"], 2)
+        self.assertEqual(sorted(result["index"] for result in results), [0, 1, 2])
+        for result in results[1:]:
+            item = items[result["index"]]
+            self.assertEqual(result["article"], await generate.generate(item))
+
+    async def test_concurrency_bound(self):
+        """测试同时进行的生成数不超过 concurrency"""
+        items = [ItemWithTranscript(transcript=f"transcript {n}") for n in range(7)]
+
+        results = await collect(items, concurrency=2)
+
+        self.assertEqual(len(results), 7)
+        self.assertTrue(all(result["status"] == "success" for result in results))
+        self.assertEqual(CountingFakeModel.peak, 2)
+
+    async def test_closing_early_cancels_pending(self):
+        """测试提前关闭输出时取消尚未完成的生成"""
+        items = [ItemWithTranscript(transcript=f"transcript {n}") for n in range(4)]
+
+        batch = generate_batch(items, concurrency=1)
+        await anext(batch)
+        await batch.aclose()
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(CountingFakeModel.active, 0)
+
+
+class TestGenerateBatchRoute(FakeLLMTestCase):
+    def setUp(self):
+        super().setUp()
+        app = FastAPI()
+        app.include_router(router)
+        self.client = TestClient(app)
+        self.url = "/youtube-articles/api/youtube-articles/generate_batch"
+
+    def test_ndjson_response(self):
+        """测试接口逐行返回 NDJSON"""
+        response = self.client.post(
+            self.url,
+            json=[{"transcript": "hello"}, {"youtube_url": "invalid"}],
+            params={"concurrency": 2},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        content_type = response.headers["content-type"]
+        self.assertTrue(content_type.startswith("application/x-ndjson"))
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        statuses = {line["index"]: line["status"] for line in lines}
+        self.assertEqual(statuses, {0: "success", 1: "error"})
+
+    def test_validation(self):
+        """测试空列表与超出范围的 concurrency 返回 422"""
+        self.assertEqual(self.client.post(self.url, json=[]).status_code, 422)
+        self.assertEqual(
+            self.client.post(
+                self.url, json=[{"transcript": "a"}], params={"concurrency": 17}
+            ).status_code,
+            422,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from langchain_core.messages import AIMessageChunk
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
+
+from app.api.youtube_articles import jobs
+from app.api.youtube_articles.generate import Item, ItemWithTranscript
+from app.api.youtube_articles.jobs import ArticleJob, ArticleJobQueue
+from app.lib.youtube_models import TranscriptData, TranscriptEntry
+
+CHUNKS = ["# Title", "\n\n", "Hello", " world"]
+ARTICLE = "".join(CHUNKS)
+VIDEO_URL = "https://www.youtube.com/watch?v=4KdvcQKNfbQ"
+
+
+def fake_stream_article(chunks: list[str], error: Exception | None = None, calls=None):
+    async def stream_article(item, transcript, transcript_data=None):
+        if calls is not None:
+            calls.append((transcript, transcript_data))
+
+        async def stream():
+            for chunk in chunks:
+                await asyncio.sleep(0)
+                yield AIMessageChunk(content=chunk)
+            if error is not None:
+                raise error
+
+        return stream()
+
+    return stream_article
+
+
+def parse_events(frames: list[bytes]) -> list[tuple[int | None, dict | str]]:
+    """把 SSE 帧解析为 (id, data)"""
+    events = []
+    for frame in frames:
+        event_id = None
+        for line in frame.decode().strip().splitlines():
+            if line.startswith("id: "):
+                event_id = int(line[4:])
+            elif line.startswith("data: "):
+                data = line[6:]
+                events.append(
+                    (event_id, data if data == "[DONE]" else json.loads(data))
+                )
+    return events
+
+
+def deltas(events) -> list[tuple[int | None, str]]:
+    return [
+        (event_id, data["delta"])
+        for event_id, data in events
+        if isinstance(data, dict) and data["type"] == "text-delta"
+    ]
+
+
+class TestArticleJobQueue(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # 用文件数据库：worker 与测试并发使用各自的连接（StaticPool 共享一个连接，
+        # 一方回滚会撤销另一方未提交的事务）
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_async_engine(
+            f"sqlite+aiosqlite:///{self.directory.name}/jobs.db",
+            connect_args={"check_same_thread": False},
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        self.calls: list[tuple[str, TranscriptData | None]] = []
+        self.patch = unittest.mock.patch.object(
+            jobs, "stream_article", fake_stream_article(CHUNKS, calls=self.calls)
+        )
+        self.patch.start()
+        self.queues: list[ArticleJobQueue] = []
+
+    async def asyncTearDown(self):
+        for queue in self.queues:
+            await queue.stop()
+        self.patch.stop()
+        await self.engine.dispose()
+        self.directory.cleanup()
+
+    async def start_queue(self) -> ArticleJobQueue:
+        queue = ArticleJobQueue(workers=1, engine=self.engine)
+        self.queues.append(queue)
+        await queue.start()
+        return queue
+
+    async def wait_finished(self, queue: ArticleJobQueue, job_id: str) -> ArticleJob:
+        for _ in range(200):
+            job = await queue.get(job_id)
+            if job.status in ("succeeded", "failed"):
+                return job
+            await asyncio.sleep(0.01)
+        self.fail(f"job {job_id} did not finish: {job.status}")
+
+    async def collect(self, queue: ArticleJobQueue, job_id: str, offset: int = 0):
+        return parse_events([frame async for frame in queue.stream(job_id, offset)])
+
+    async def test_lifecycle(self):
+        """测试提交、执行、查询与完整的 token 流"""
+        queue = await self.start_queue()
+        job = await queue.submit(ItemWithTranscript(transcript="hello"))
+        self.assertEqual(job.status, "queued")
+
+        events = await self.collect(queue, job.id)
+        job = await self.wait_finished(queue, job.id)
+
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.article, ARTICLE)
+        self.assertEqual(
+            deltas(events), [(7, "# Title"), (9, "\n\n"), (14, "Hello"), (20, " world")]
+        )
+        self.assertEqual(events[-1], (None, "[DONE]"))
+
+    async def test_resume_from_channel(self):
+        """测试从内存中的流续传，offset 落在分块中间时只发送剩余部分"""
+        queue = await self.start_queue()
+        job = await queue.submit(ItemWithTranscript(transcript="hello"))
+        await self.wait_finished(queue, job.id)
+
+        events = await self.collect(queue, job.id, offset=11)
+
+        self.assertEqual(deltas(events), [(14, "llo"), (20, " world")])
+
+    async def test_resume_from_database_after_restart(self):
+        """测试重启后从数据库续传，只发送客户端还没收到的部分"""
+        queue = await self.start_queue()
+        job = await queue.submit(ItemWithTranscript(transcript="hello"))
+        await self.wait_finished(queue, job.id)
+        await queue.stop()
+
+        restarted = await self.start_queue()
+        self.assertIsNone(restarted.channel(job.id))
+
+        resumed = await self.collect(restarted, job.id, offset=9)
+        self.assertEqual(deltas(resumed), [(20, "Hello world")])
+        self.assertEqual(ARTICLE[:9] + deltas(resumed)[0][1], ARTICLE)
+
+        complete = await self.collect(restarted, job.id, offset=len(ARTICLE))
+        self.assertEqual(deltas(complete), [])
+        self.assertEqual(complete[-1], (None, "[DONE]"))
+
+    async def test_requeue_unfinished_on_start(self):
+        """测试启动时把上次未完成的任务重新入队执行"""
+        item = ItemWithTranscript(transcript="hello").model_dump_json()
+        async with AsyncSession(self.engine) as session:
+            session.add(ArticleJob(id="interrupted", status="running", item=item))
+            await session.commit()
+
+        queue = await self.start_queue()
+        job = await self.wait_finished(queue, "interrupted")
+
+        self.assertEqual(job.status, "succeeded")
+        self.assertEqual(job.article, ARTICLE)
+
+    async def test_failed_job(self):
+        """测试生成出错时任务记为 failed，流返回错误"""
+        queue = await self.start_queue()
+        failing = fake_stream_article(["partial"], RuntimeError("boom"))
+        with unittest.mock.patch.object(jobs, "stream_article", failing):
+            job = await queue.submit(ItemWithTranscript(transcript="hello"))
+            job = await self.wait_finished(queue, job.id)
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "boom")
+        frames = [frame async for frame in queue.stream(job.id)]
+        self.assertEqual(frames[-1], b"data: Error: boom\n\n")
+
+    async def test_url_job_fetches_transcript_once(self):
+        """测试 URL 任务只取一次 transcript，并直接用于生成"""
+        transcript = TranscriptData(
+            custom=[TranscriptEntry(start="00:00:00", end="00:00:05", text="hello")]
+        )
+        fetch = unittest.mock.AsyncMock(return_value=transcript)
+        queue = await self.start_queue()
+
+        with unittest.mock.patch.object(jobs, "fetch_transcript_data", fetch):
+            job = await queue.submit(Item(youtube_url=VIDEO_URL))
+            job = await self.wait_finished(queue, job.id)
+
+        self.assertEqual(job.status, "succeeded")
+        fetch.assert_awaited_once()
+        self.assertEqual(self.calls, [("hello", transcript)])
+
+    async def test_url_job_fetch_failure(self):
+        """测试取 transcript 失败时任务记为 failed，不把错误文本当作文章"""
+        fetch = unittest.mock.AsyncMock(side_effect=RuntimeError("provider down"))
+        queue = await self.start_queue()
+
+        with unittest.mock.patch.object(jobs, "fetch_transcript_data", fetch):
+            job = await queue.submit(Item(youtube_url=VIDEO_URL))
+            job = await self.wait_finished(queue, job.id)
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "provider down")
+        self.assertIsNone(job.article)
+        self.assertEqual(self.calls, [])
+
+    async def test_unknown_job(self):
+        """测试不存在的任务"""
+        queue = await self.start_queue()
+        frames = [frame async for frame in queue.stream("missing")]
+
+        self.assertEqual(frames[-1], b"data: Error: Job not found\n\n")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from langchain_core.runnables import RunnableLambda
+
+from app.api.youtube_articles.long_transcript import (
+    chunk_entries,
+    chunk_text,
+    summarize_chunks,
+)
+from app.lib.youtube_models import TranscriptEntry
+
+
+def make_entries(count: int, text: str) -> list[TranscriptEntry]:
+    return [
+        TranscriptEntry(
+            start=f"00:00:{i:02d}", end=f"00:00:{i + 1:02d}", text=f"{text}{i}"
+        )
+        for i in range(count)
+    ]
+
+
+class TestChunking(unittest.TestCase):
+    def test_chunks_align_with_entries(self):
+        """测试分段按条目边界切分，时间戳首尾相接且不丢内容"""
+        entries = make_entries(10, "x" * 36)
+        chunks = chunk_entries(entries, max_tokens=30)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(chunks[0].start, "00:00:00")
+        self.assertEqual(chunks[-1].end, "00:00:10")
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertEqual(previous.end, current.start)
+        self.assertEqual(
+            " ".join(chunk.text for chunk in chunks),
+            " ".join(entry.text for entry in entries),
+        )
+
+    def test_plain_text_splits_on_sentences(self):
+        """测试无时间戳文本按句子切分"""
+        text = "第一句话。" * 50
+        chunks = chunk_text(text, max_tokens=20)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk.text.endswith("。") for chunk in chunks))
+        self.assertEqual("".join(chunk.text for chunk in chunks), text)
+
+
+class TestSummarizeChunks(unittest.IsolatedAsyncioTestCase):
+    async def test_parallel_with_cap_and_order(self):
+        """测试 map 阶段并发受限且结果保持原顺序"""
+        running = peak = 0
+
+        async def summarize(inputs: dict) -> str:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return inputs["transcript"].upper()
+
+        chunks = chunk_entries(make_entries(6, "x" * 36), max_tokens=10)
+        notes = await summarize_chunks(chunks, RunnableLambda(summarize), concurrency=2)
+
+        self.assertEqual(notes, [chunk.text.upper() for chunk in chunks])
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from langchain_core.language_models import FakeListChatModel
+from pydantic import ValidationError
+
+from app.api.youtube_articles import generate
+from app.api.youtube_articles.generate import (
+    ARTICLE_PROMPT,
+    ItemWithTranscript,
+    article_prompt,
+    chain_for,
+    enhance_prompt,
+)
+from app.lib.prompt_registry import prompt_registry
+
+
+def system_text(prompt) -> str:
+    return prompt.format_messages(transcript="t")[0].content
+
+
+class TestEnhancePrompt(unittest.TestCase):
+    def setUp(self):
+        self.spec = prompt_registry.spec(ARTICLE_PROMPT)
+
+    def test_modes(self):
+        """测试 override 替换系统提示词，prepend/append 放到其前/后"""
+        override = system_text(enhance_prompt(self.spec, "只写英文", "override"))
+        prepend = system_text(enhance_prompt(self.spec, "只写英文", "prepend"))
+        append = system_text(enhance_prompt(self.spec, "只写英文", "append"))
+
+        self.assertEqual(override, "只写英文")
+        self.assertEqual(prepend, f"只写英文\n{self.spec.system}")
+        self.assertEqual(append, f"{self.spec.system}\n只写英文")
+
+    def test_custom_prompt_is_not_a_template(self):
+        """测试用户 prompt 中的花括号不会被当作模板变量"""
+        prompt = enhance_prompt(self.spec, "输出 {json}", "override")
+        self.assertEqual(prompt.input_variables, ["transcript"])
+        self.assertEqual(system_text(prompt), "输出 {json}")
+
+    def test_invalid_mode_rejected(self):
+        """测试不支持的 mode 在请求校验阶段被拒绝"""
+        with self.assertRaises(ValidationError):
+            ItemWithTranscript(transcript="t", prompt="p", mode="replace")
+
+
+class TestCompiledCache(unittest.TestCase):
+    def setUp(self):
+        generate._custom_prompts.clear()
+        generate._chains.clear()
+
+    def test_default_prompt_without_custom(self):
+        """测试没有自定义 prompt 时直接使用注册表中的 prompt"""
+        self.assertIs(article_prompt(None, "override"), generate.prompt)
+
+    def test_same_prompt_compiled_once(self):
+        """测试相同的自定义 prompt 和 mode 复用同一个编译结果与 chain"""
+        model = FakeListChatModel(responses=["ok"])
+        first = article_prompt("简洁", "prepend")
+        self.assertIs(article_prompt("简洁", "prepend"), first)
+        self.assertIsNot(article_prompt("简洁", "append"), first)
+        self.assertIs(article_prompt("简洁"), article_prompt("简洁", "append"))
+
+        chain = chain_for(model, "简洁", "prepend")
+        self.assertIs(chain_for(model, "简洁", "prepend"), chain)
+
+    def test_bounded_lru(self):
+        """测试缓存数量有上限，按最近使用淘汰"""
+        for index in range(generate.PROMPT_CACHE_SIZE + 10):
+            article_prompt(f"prompt {index}", "append")
+        self.assertEqual(len(generate._custom_prompts), generate.PROMPT_CACHE_SIZE)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
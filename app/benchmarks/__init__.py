@@ -0,0 +1,3 @@
+"""
+压测脚本
+"""
@@ -0,0 +1,101 @@
+"""
+Provider 响应解析的微基准
+
+对比 NoteGPT 响应的两种解析方式：
+- `dict`：`json.loads` 得到 dict，再用 `from_dict` 逐字段校验（旧路径）
+- `json`：`from_json` 由 pydantic-core 直接从原始字节一次完成解析与校验
+
+transcript 按每条 3 秒合成 1h / 3h / 10h 三种长度。
+
+```bash
+python -m app.benchmarks.parse
+python -m app.benchmarks.parse --hours 1 3 10 --repeat 20
+```
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Callable
+
+from app.lib.tools.fake_provider_server import make_fake_notegpt_response
+from app.lib.youtube_models import YouTubeTranscriptResponse
+
+ENTRY_SECONDS = 3
+"""自动字幕大约每 3 秒一条"""
+
+
+def make_body(hours: float, entry_seconds: int = ENTRY_SECONDS) -> bytes:
+    """合成 `hours` 小时视频的 NoteGPT 响应体"""
+    entries = int(hours * 3600 / entry_seconds)
+    return json.dumps(
+        make_fake_notegpt_response("benchmark01", entries, entry_seconds)
+    ).encode()
+
+
+def parse_via_dict(body: bytes) -> YouTubeTranscriptResponse:
+    return YouTubeTranscriptResponse.from_dict(json.loads(body))
+
+
+def parse_via_json(body: bytes) -> YouTubeTranscriptResponse:
+    return YouTubeTranscriptResponse.from_json(body)
+
+
+PARSERS: dict[str, Callable[[bytes], YouTubeTranscriptResponse]] = {
+    "dict": parse_via_dict,
+    "json": parse_via_json,
+}
+
+
+def measure(
+    parse: Callable[[bytes], YouTubeTranscriptResponse], body: bytes, repeat: int
+) -> float:
+    """多次运行取中位数（秒）"""
+    parse(body)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(body)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(hours: list[float], repeat: int) -> list[dict]:
+    rows = []
+    for duration in hours:
+        body = make_body(duration)
+        timings = {
+            name: measure(parse, body, repeat) for name, parse in PARSERS.items()
+        }
+        rows.append(
+            {
+                "hours": duration,
+                "entries": int(duration * 3600 / ENTRY_SECONDS),
+                "bytes": len(body),
+                **{f"{name}_ms": seconds * 1000 for name, seconds in timings.items()},
+                "speedup": timings["dict"] / timings["json"],
+            }
+        )
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Provider response parsing benchmark")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'hours':>6} {'entries':>8} {'MiB':>6}"
+        f" {'dict ms':>9} {'json ms':>9} {'speedup':>8}"
+    )
+    for row in run(args.hours, args.repeat):
+        print(
+            f"{row['hours']:>6g} {row['entries']:>8} {row['bytes'] / 2**20:>6.2f}"
+            f" {row['dict_ms']:>9.2f} {row['json_ms']:>9.2f} {row['speedup']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""
+生成流水线的端到端压测
+
+驱动 `/generate_stream`、`/generate` 与 LangServe 的 `/openai/stream`，
+统计首字节时间（TTFB）、首 token 时间（TTFT）、tokens/s、延迟 p50/p95/p99
+以及服务进程 RSS，结果保存为 JSON，便于在不同提交之间对比。
+
+默认在临时目录中启动一个使用假 LLM 与进程内假 provider 的 uvicorn 子进程
+（不需要 ARK 凭证，也不联网）；也可以用 `--url` 压测已运行的服务。
+
+```bash
+python -m app.benchmarks.pipeline --requests 100 --concurrency 20
+python -m app.benchmarks.pipeline --compare bench_results/<old>.json
+```
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.lib.tokens import estimate_tokens
+
+ROOT = Path(__file__).resolve().parents[2]
+ARTICLES_PATH = "/api/v1/youtube-articles/api/youtube-articles"
+
+SCENARIOS = ("generate_stream", "generate", "openai")
+
+COMPARED_METRICS = ("ttfb_p50", "ttft_p50", "latency_p50", "latency_p95", "latency_p99")
+"""对比时越小越好的指标；tokens_per_second 与 requests_per_second 越大越好"""
+
+
+@dataclass
+class RequestResult:
+    """单个请求的测量结果（秒）"""
+
+    ok: bool
+    latency: float
+    ttfb: float | None = None
+    ttft: float | None = None
+    tokens: int = 0
+    error: str | None = None
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        """首 token 之后的输出速度；非流式请求按整个请求计"""
+        generating = self.latency - (self.ttft or 0.0)
+        if not self.ok or generating <= 0:
+            return None
+        return self.tokens / generating
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """线性插值的分位数，q 取 0~100"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def video_url(run: str, index: int) -> str:
+    """每个请求一个不同的 11 位视频 ID，避免 single-flight 与缓存合并请求"""
+    return f"https://www.youtube.com/watch?v={(run + f'{index:08d}')[-11:]}"
+
+
+def _sse_data(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    async def data():
+        async for line in lines:
+            if line.startswith("data: "):
+                yield line[len("data: ") :]
+
+    return data()
+
+
+async def _measure(
+    client: httpx.AsyncClient, scenario: str, run: str, index: int
+) -> RequestResult:
+    start = time.perf_counter()
+    ttfb = ttft = None
+    parts: list[str] = []
+
+    def elapsed() -> float:
+        return time.perf_counter() - start
+
+    if scenario == "generate":
+        response = await client.post(
+            f"{ARTICLES_PATH}/generate", json={"youtube_url": video_url(run, index)}
+        )
+        # 非流式：没有首 token 时间
+        ttfb = elapsed()
+        response.raise_for_status()
+        parts.append(response.json()["article"])
+    elif scenario == "generate_stream":
+        body = {"youtube_url": video_url(run, index)}
+        async with client.stream(
+            "POST", f"{ARTICLES_PATH}/generate_stream", json=body
+        ) as response:
+            response.raise_for_status()
+            async for data in _sse_data(response.aiter_lines()):
+                ttfb = ttfb if ttfb is not None else elapsed()
+                if data.startswith("Error"):
+                    raise RuntimeError(data)
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("type") == "text-delta" and event["delta"]:
+                    ttft = ttft if ttft is not None else elapsed()
+                    parts.append(event["delta"])
+    elif scenario == "openai":
+        body = {"input": f"用一句话介绍第 {run}-{index} 个视频"}
+        async with client.stream("POST", "/openai/stream", json=body) as response:
+            response.raise_for_status()
+            async for data in _sse_data(response.aiter_lines()):
+                ttfb = ttfb if ttfb is not None else elapsed()
+                content = (
+                    json.loads(data).get("content") if data.startswith("{") else None
+                )
+                if isinstance(content, str) and content:
+                    ttft = ttft if ttft is not None else elapsed()
+                    parts.append(content)
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    return RequestResult(
+        ok=True,
+        latency=elapsed(),
+        ttfb=ttfb,
+        ttft=ttft,
+        tokens=estimate_tokens("".join(parts)),
+    )
+
+
+class RSSSampler:
+    """定期读取进程 RSS（Linux /proc），记录峰值"""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak: int | None = None
+        self.last: int | None = None
+        self._task: asyncio.Task | None = None
+
+    def read(self) -> int | None:
+        """当前 RSS（字节）；无法读取时返回 None"""
+        try:
+            with open(f"/proc/{self.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    def sample(self) -> None:
+        rss = self.read()
+        if rss is not None:
+            self.last = rss
+            self.peak = max(self.peak or 0, rss)
+
+    async def __aenter__(self) -> "RSSSampler":
+        async def loop():
+            while True:
+                self.sample()
+                await asyncio.sleep(self.interval)
+
+        self._task = asyncio.create_task(loop())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self.sample()
+
+
+def summarize(
+    scenario: str, results: list[RequestResult], wall: float, concurrency: int
+) -> dict[str, Any]:
+    """汇总一个场景的测量结果"""
+    succeeded = [result for result in results if result.ok]
+    latencies = [result.latency for result in succeeded]
+    ttfbs = [result.ttfb for result in succeeded if result.ttfb is not None]
+    ttfts = [result.ttft for result in succeeded if result.ttft is not None]
+    rates = [rate for result in succeeded if (rate := result.tokens_per_second)]
+    tokens = sum(result.tokens for result in succeeded)
+
+    return {
+        "scenario": scenario,
+        "requests": len(results),
+        "errors": len(results) - len(succeeded),
+        "error_samples": sorted({result.error for result in results if result.error})[
+            :5
+        ],
+        "concurrency": concurrency,
+        "wall_seconds": wall,
+        "requests_per_second": len(succeeded) / wall if wall else 0.0,
+        "output_tokens": tokens,
+        "tokens_per_second": sum(rates) / len(rates) if rates else None,
+        "aggregate_tokens_per_second": tokens / wall if wall else 0.0,
+        **{f"ttfb_p{q}": percentile(ttfbs, q) for q in (50, 95, 99)},
+        **{f"ttft_p{q}": percentile(ttfts, q) for q in (50, 95, 99)},
+        **{f"latency_p{q}": percentile(latencies, q) for q in (50, 95, 99)},
+    }
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: str,
+    requests: int,
+    concurrency: int,
+    rss: RSSSampler | None = None,
+    timeout: float = 120.0,
+) -> dict[str, Any]:
+    """以固定并发跑完 `requests` 个请求"""
+    run = f"{scenario[0]}{int(time.time()) % 100:02d}"
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits
+    ) as client:
+
+        async def one(index: int) -> RequestResult:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    return await _measure(client, scenario, run, index)
+                except Exception as exception:
+                    return RequestResult(
+                        ok=False,
+                        latency=time.perf_counter() - start,
+                        error=f"{type(exception).__name__}: {exception}"[:200],
+                    )
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(index) for index in range(requests)))
+        wall = time.perf_counter() - start
+
+    summary = summarize(scenario, list(results), wall, concurrency)
+    if rss is not None:
+        rss.sample()
+        summary["rss_peak_bytes"] = rss.peak
+        summary["rss_bytes"] = rss.last
+    return summary
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def benchmark_env(
+    ttft: float, tokens_per_second: float, output_tokens: int, cache: bool
+) -> dict[str, str]:
+    """压测子进程的环境变量：假 LLM、进程内假 provider；显式设置的变量优先"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(ROOT), env.get("PYTHONPATH")])
+    )
+    env.update(
+        {
+            "YAG_FAKE_LLM": "True",
+            "YAG_FAKE_PROVIDERS": "True",
+            "YAG_FAKE_LLM_TTFT": str(ttft),
+            "YAG_FAKE_LLM_TOKENS_PER_SECOND": str(tokens_per_second),
+            "YAG_FAKE_LLM_OUTPUT_TOKENS": str(output_tokens),
+            "YAG_ARTICLE_CACHE": str(cache),
+        }
+    )
+    # 假 provider 不需要保护，默认放开限流，避免压测测到的是令牌桶
+    env.setdefault("YAG_PROVIDER_RATE", "10000")
+    env.setdefault("YAG_PROVIDER_BURST", "10000")
+    env.setdefault("YAG_PROVIDER_QUEUE", "10000")
+    return env
+
+
+async def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {process.returncode}")
+            try:
+                if (await client.get("/api/v1/test/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, Any]:
+    process: subprocess.Popen | None = None
+    base_url = args.url
+    workdir = tempfile.TemporaryDirectory(prefix="yag-bench-")
+    try:
+        if base_url is None:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            # 临时目录作为工作目录：SQLite 数据库每次都是新的
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "uvicorn",
+                    "app.server:app",
+                    "--host",
+                    "127.0.0.1",
+                    "--port",
+                    str(port),
+                    "--log-level",
+                    "warning",
+                ],
+                cwd=workdir.name,
+                env=benchmark_env(args.ttft, args.tps, args.output_tokens, args.cache),
+                stdout=subprocess.DEVNULL,
+                stderr=None if args.verbose else subprocess.DEVNULL,
+            )
+            started = time.perf_counter()
+            await _wait_ready(base_url, process, args.startup_timeout)
+            startup_seconds = time.perf_counter() - started
+        else:
+            startup_seconds = None
+
+        rss = RSSSampler(process.pid) if process is not None else None
+        scenarios = []
+        for scenario in args.scenarios:
+            if rss is not None:
+                async with rss:
+                    summary = await run_scenario(
+                        base_url, scenario, args.requests, args.concurrency, rss
+                    )
+            else:
+                summary = await run_scenario(
+                    base_url, scenario, args.requests, args.concurrency
+                )
+            scenarios.append(summary)
+            print(format_summary(summary))
+
+        return {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "url": args.url,
+            "startup_seconds": startup_seconds,
+            "config": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "fake_llm_ttft": args.ttft,
+                "fake_llm_tokens_per_second": args.tps,
+                "fake_llm_output_tokens": args.output_tokens,
+                "article_cache": args.cache,
+            },
+            "scenarios": scenarios,
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        workdir.cleanup()
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value * 1000:.1f}ms"
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    rss = summary.get("rss_peak_bytes")
+    tokens_per_second = summary["tokens_per_second"]
+    return (
+        f"{summary['scenario']:>16}: {summary['requests']} req "
+        f"({summary['errors']} err) x{summary['concurrency']} "
+        f"{summary['requests_per_second']:.1f} req/s | "
+        f"ttfb p50 {_ms(summary['ttfb_p50'])} | ttft p50 {_ms(summary['ttft_p50'])} | "
+        f"latency p50/p95/p99 {_ms(summary['latency_p50'])}/"
+        f"{_ms(summary['latency_p95'])}/{_ms(summary['latency_p99'])} | "
+        f"{'-' if tokens_per_second is None else f'{tokens_per_second:.1f}'} tok/s | "
+        f"rss {'-' if rss is None else f'{rss / 1024 / 1024:.1f}MiB'}"
+    )
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """逐场景对比两次结果，返回变化百分比（正数表示变差）"""
+    previous = {summary["scenario"]: summary for summary in old["scenarios"]}
+    lines = [f"compare {old.get('commit')} -> {new.get('commit')}"]
+    for summary in new["scenarios"]:
+        before = previous.get(summary["scenario"])
+        if before is None:
+            continue
+        changes = []
+        for metric in (*COMPARED_METRICS, "tokens_per_second", "requests_per_second"):
+            a, b = before.get(metric), summary.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a * 100
+            if metric in ("tokens_per_second", "requests_per_second"):
+                change = -change
+            changes.append(f"{metric} {change:+.1f}%")
+        lines.append(f"  {summary['scenario']}: {', '.join(changes)}")
+    return lines
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generation pipeline benchmark")
+    parser.add_argument("--url", help="压测已运行的服务；默认启动假 LLM 子进程")
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"逗号分隔，可选 {','.join(SCENARIOS)}",
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--ttft", type=float, default=0.3, help="假 LLM 首 token 延迟（秒）"
+    )
+    parser.add_argument("--tps", type=float, default=50.0, help="假 LLM 每秒 token 数")
+    parser.add_argument("--output-tokens", type=int, default=400)
+    parser.add_argument("--cache", action="store_true", help="保留文章缓存（默认关闭）")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument(
+        "--output", type=Path, help="结果 JSON 路径，默认 bench_results/<commit>.json"
+    )
+    parser.add_argument("--compare", type=Path, help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--verbose", action="store_true", help="显示服务端日志")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+
+    output = (
+        args.output or ROOT / "bench_results" / f"{report['commit'] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", "utf-8")
+    print(f"saved {output}")
+
+    if args.compare:
+        old = json.loads(args.compare.read_text("utf-8"))
+        print("\n".join(compare(old, report)))
+
+
+__all__ = [
+    "RSSSampler",
+    "RequestResult",
+    "compare",
+    "percentile",
+    "run_benchmark",
+    "run_scenario",
+    "summarize",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.benchmarks.parse import make_body, parse_via_dict, parse_via_json, run
+
+
+class TestParseBenchmark(unittest.TestCase):
+    def test_parsers_agree(self):
+        """测试两种解析方式得到相同的结果"""
+        body = make_body(0.1)
+        via_dict = parse_via_dict(body)
+        via_json = parse_via_json(body)
+
+        self.assertEqual(len(via_json.data.transcripts.en_auto.custom), 120)
+        self.assertEqual(via_dict, via_json)
+
+    def test_run(self):
+        """测试基准结果包含各解析方式的耗时与加速比"""
+        (row,) = run([0.05], repeat=1)
+
+        self.assertEqual(row["entries"], 60)
+        self.assertGreater(row["dict_ms"], 0)
+        self.assertGreater(row["json_ms"], 0)
+        self.assertGreater(row["speedup"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
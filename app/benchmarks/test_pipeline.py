@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.benchmarks.pipeline import (
+    RequestResult,
+    compare,
+    percentile,
+    summarize,
+    video_url,
+)
+
+
+class TestStatistics(unittest.TestCase):
+    def test_percentile(self):
+        """测试线性插值分位数"""
+        values = [float(n) for n in range(1, 101)]
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile(values, 50), 50.5)
+        self.assertAlmostEqual(percentile(values, 99), 99.01)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+
+    def test_summarize(self):
+        """测试汇总：失败请求计入错误数，不参与延迟统计"""
+        results = [
+            RequestResult(ok=True, latency=1.0, ttfb=0.1, ttft=0.2, tokens=80),
+            RequestResult(ok=True, latency=2.0, ttfb=0.1, ttft=1.0, tokens=100),
+            RequestResult(ok=False, latency=5.0, error="HTTPStatusError: 500"),
+        ]
+        summary = summarize("generate_stream", results, wall=2.0, concurrency=2)
+
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["error_samples"], ["HTTPStatusError: 500"])
+        self.assertEqual(summary["latency_p50"], 1.5)
+        self.assertEqual(summary["tokens_per_second"], 100.0)
+        self.assertEqual(summary["requests_per_second"], 1.0)
+
+    def test_compare_reports_regressions_as_positive(self):
+        """测试对比结果：延迟变大、吞吐变小都记为正数"""
+
+        def report(commit: str, latency: float, tokens_per_second: float) -> dict:
+            scenario = {
+                "scenario": "generate",
+                "latency_p50": latency,
+                "tokens_per_second": tokens_per_second,
+            }
+            return {"commit": commit, "scenarios": [scenario]}
+
+        old = report("a", 1.0, 100.0)
+        new = report("b", 1.5, 50.0)
+        lines = compare(old, new)
+
+        self.assertIn("latency_p50 +50.0%", lines[1])
+        self.assertIn("tokens_per_second +50.0%", lines[1])
+
+    def test_video_ids_are_unique(self):
+        """测试每个请求使用不同的 11 位视频 ID"""
+        urls = {video_url("g42", index) for index in range(1000)}
+        self.assertEqual(len(urls), 1000)
+        self.assertTrue(all(len(url.rsplit("=", 1)[1]) == 11 for url in urls))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,38 @@
+"""
+环境变量配置读取工具
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_str(name: str, default: str) -> str:
+    """读取字符串配置"""
+    value = os.getenv(name)
+    return value if value else default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """读取布尔配置，与 `YAG_VERBOSE` 一致使用 "True" 表示开启"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value == "True"
+
+
+def env_int(name: str, default: int) -> int:
+    """读取整数配置"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """读取浮点数配置"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+__all__ = ["env_str", "env_bool", "env_int", "env_float"]
@@ -1,8 +1,9 @@
+from functools import cache
 from typing import Annotated, AsyncGenerator
 
 from fastapi import Depends
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 
 
 sqlite_file_name = "hero_database.db"
@@ -12,9 +13,20 @@ async_sqlite_url = f"sqlite+aiosqlite:///{sqlite_file_name}"
 connect_args = {"check_same_thread": False}
 # engine = create_engine(sqlite_url, connect_args=connect_args)
 
-async_engine = create_async_engine(
-    async_sqlite_url, echo=True, future=True, connect_args=connect_args
-)
+
+@cache
+def get_async_engine() -> AsyncEngine:
+    """应用级异步引擎，首次使用时创建"""
+    return create_async_engine(
+        async_sqlite_url, echo=True, future=True, connect_args=connect_args
+    )
+
+
+def __getattr__(name: str):
+    # 兼容 `from app.core.database import async_engine`
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # def create_db_and_tables():
@@ -23,13 +35,13 @@ async_engine = create_async_engine(
 
 async def create_db_and_tables():
     """初始化数据库（创建表）"""
-    async with async_engine.begin() as conn:
+    async with get_async_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
 # 异步会话工厂
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with AsyncSession(async_engine) as session:
+    async with AsyncSession(get_async_engine()) as session:
         yield session
 
 
@@ -3,11 +3,15 @@
 """
 
 import logging
+import math
 
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from app.lib.rate_limit import RateLimitExceeded
+from app.lib.tokens import InputTooLongError
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,4 +53,53 @@ def validation_exception_handler(
     )
 
 
-__all__ = ["validation_exception_handler"]
+def rate_limit_exception_handler(
+    request: Request,
+    exc: RateLimitExceeded,
+) -> JSONResponse:
+    """处理出站请求限流：返回 429 与 Retry-After 提示"""
+
+    retry_after = max(1, math.ceil(exc.retry_after))
+    logger.warning(f"Rate limit exceeded: {exc}")
+
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "success": False,
+            "code": status.HTTP_429_TOO_MANY_REQUESTS,
+            "message": str(exc),
+            "hint": f"Retry after {retry_after} seconds",
+            "request_id": getattr(request.state, "request_id", None),
+            "retry_after": retry_after,
+        },
+    )
+
+
+def input_too_long_exception_handler(
+    request: Request,
+    exc: InputTooLongError,
+) -> JSONResponse:
+    """处理超长输入：调用 LLM 之前直接返回 413"""
+
+    logger.warning(f"Input too long: {exc}")
+
+    return JSONResponse(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        content={
+            "success": False,
+            "code": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "message": str(exc),
+            "hint": "Shorten the transcript or split it into several requests",
+            "request_id": getattr(request.state, "request_id", None),
+            "input_tokens": exc.input_tokens,
+            "limit": exc.limit,
+        },
+    )
+
+
+__all__ = [
+    "validation_exception_handler",
+    "rate_limit_exception_handler",
+    "input_too_long_exception_handler",
+]
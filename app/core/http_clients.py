@@ -0,0 +1,132 @@
+"""
+转录服务商（provider）HTTP 客户端注册表
+
+每个 provider 复用一个长连接 `httpx.AsyncClient`，避免每次请求都重新做
+DNS 解析、TCP 握手和 TLS 握手。注册表在 `lifespan` 中创建、在关闭时释放。
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from app.core.config import env_bool, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = env_int("YAG_HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = env_int("YAG_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+HTTP_KEEPALIVE_EXPIRY = env_float("YAG_HTTP_KEEPALIVE_EXPIRY", 30.0)
+HTTP_TIMEOUT = env_float("YAG_HTTP_TIMEOUT", 10.0)
+HTTP2 = env_bool("YAG_HTTP2", True)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖可选的 `h2` 包（`httpx[http2]`）"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ProviderClientRegistry:
+    """按 provider 名称管理长连接客户端"""
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = HTTP_TIMEOUT,
+        http2: bool = HTTP2,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2 and _http2_available()
+        self.transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+
+        if http2 and not self.http2:
+            logger.warning(
+                "[http_clients] h2 is not installed, falling back to HTTP/1.1"
+            )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """获取（必要时创建）指定 provider 的客户端"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create_client()
+        return client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=self.http2,
+            transport=self.transport,
+        )
+
+    async def aclose(self) -> None:
+        """关闭所有客户端连接池"""
+        clients, self._clients = self._clients, {}
+        for name, client in clients.items():
+            await client.aclose()
+            logger.info(f"[http_clients] closed client for provider {name!r}")
+
+
+_registry: ProviderClientRegistry | None = None
+
+
+async def init_provider_clients(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> ProviderClientRegistry:
+    """在 lifespan 启动阶段创建注册表"""
+    global _registry
+    if _registry is None:
+        _registry = ProviderClientRegistry(transport=transport)
+    return _registry
+
+
+async def close_provider_clients() -> None:
+    """在 lifespan 关闭阶段释放注册表"""
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        await registry.aclose()
+
+
+def get_provider_clients() -> ProviderClientRegistry | None:
+    """当前注册表；未在 lifespan 中初始化时为 None"""
+    return _registry
+
+
+@asynccontextmanager
+async def provider_client(name: str) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    获取 provider 客户端
+
+    应用运行时复用注册表中的长连接客户端；脚本或单元测试等没有经过
+    `lifespan` 的场景，退化为一次性客户端并在使用后关闭。
+    """
+    if _registry is not None:
+        yield _registry.get(name)
+        return
+
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+        yield client
+
+
+__all__ = [
+    "ProviderClientRegistry",
+    "init_provider_clients",
+    "close_provider_clients",
+    "get_provider_clients",
+    "provider_client",
+]
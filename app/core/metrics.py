@@ -0,0 +1,334 @@
+"""
+Prometheus 指标：计数器、仪表和直方图，以文本格式在 `/metrics` 输出
+
+只实现本服务用到的部分，不依赖 prometheus_client。热路径上先用 `labels(...)`
+取得并保存子指标（pre-bound child），之后每次只做一次加法；缓存命中数、队列
+长度等已有的统计由 `set_function` 在抓取时读取，不增加请求路径上的开销。
+所有更新都发生在事件循环线程内，因此不加锁。
+"""
+
+import bisect
+import math
+from typing import Callable, Generic, Iterator, Sequence, TypeVar
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import env_bool
+
+METRICS_ENABLED = env_bool("YAG_METRICS", True)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class CounterChild:
+    """单组标签值的计数器"""
+
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """抓取时从已有的统计读取数值"""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class GaugeChild(CounterChild):
+    """单组标签值的仪表，可增可减"""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramChild:
+    """单组标签值的直方图；各桶分开计数，输出时再累加"""
+
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+Child = TypeVar("Child", CounterChild, GaugeChild, HistogramChild)
+
+
+class Metric(Generic[Child]):
+    """一个指标及其按标签值区分的子指标"""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Child] = {}
+
+    def _new_child(self) -> Child:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Child:
+        """取得（必要时创建）子指标；热路径上应保存返回值而不是每次调用"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values}"
+                )
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_text(self, values: tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            yield f"{self.name}{self._label_text(values)} {_format_value(child.get())}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type}"
+        yield from self._samples()
+
+
+class Counter(Metric[CounterChild]):
+    type = "counter"
+
+    def _new_child(self) -> CounterChild:
+        return CounterChild()
+
+
+class Gauge(Metric[GaugeChild]):
+    type = "gauge"
+
+    def _new_child(self) -> GaugeChild:
+        return GaugeChild()
+
+
+class Histogram(Metric[HistogramChild]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self) -> HistogramChild:
+        return HistogramChild(self.upper_bounds)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.upper_bounds, math.inf), child.counts):
+                cumulative += count
+                labels = self._label_text(values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = self._label_text(values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """一组指标；`render` 输出 Prometheus 文本格式"""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+"""进程级指标"""
+
+HTTP_REQUESTS = registry.counter(
+    "yag_http_requests_total",
+    "HTTP requests by route and status class",
+    ("method", "route", "status"),
+)
+TRANSCRIPT_FETCH_SECONDS = registry.histogram(
+    "yag_transcript_fetch_seconds",
+    "Successful transcript fetch latency per provider",
+    ("provider",),
+    LATENCY_BUCKETS,
+)
+TRANSCRIPT_FETCH_ERRORS = registry.counter(
+    "yag_transcript_fetch_errors_total",
+    "Failed transcript fetches per provider",
+    ("provider",),
+)
+CACHE_LOOKUPS = registry.counter(
+    "yag_cache_lookups_total", "Cache lookups by cache and result", ("cache", "result")
+)
+LLM_TIME_TO_FIRST_TOKEN = registry.histogram(
+    "yag_llm_time_to_first_token_seconds",
+    "Time from starting the LLM stream to its first chunk",
+    ("model",),
+    LATENCY_BUCKETS,
+)
+LLM_TOKENS_STREAMED = registry.counter(
+    "yag_llm_tokens_streamed_total",
+    "Streamed LLM output chunks (about one token each)",
+    ("model",),
+)
+LLM_TOKENS_SAVED = registry.counter(
+    "yag_llm_tokens_saved_total",
+    "Estimated LLM output tokens not generated because the client disconnected",
+    ("model",),
+)
+SSE_STREAMS_ACTIVE = registry.gauge(
+    "yag_sse_streams_active", "Open SSE responses", ("endpoint",)
+)
+QUEUE_DEPTH = registry.gauge("yag_queue_depth", "Work waiting to start", ("queue",))
+
+
+def observe_cache(name: str, cache) -> None:
+    """从缓存已有的 memory_hits / db_hits / misses 统计读取命中情况"""
+    CACHE_LOOKUPS.labels(name, "memory_hit").set_function(lambda: cache.memory_hits)
+    CACHE_LOOKUPS.labels(name, "db_hit").set_function(lambda: cache.db_hits)
+    CACHE_LOOKUPS.labels(name, "miss").set_function(lambda: cache.misses)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class MetricsMiddleware:
+    """
+    按路由统计请求数的 ASGI 中间件
+
+    只统计路径以 `prefix` 开头的请求，路由标签取路由名称（endpoint 函数名）。
+    每个路由第一次被请求时按状态码类别绑定子指标，之后按 endpoint 查表加一；
+    没有匹配到路由的请求（404）不统计，避免标签基数随路径增长。
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "", enabled: bool = METRICS_ENABLED):
+        self.app = app
+        self.prefix = prefix
+        self.enabled = enabled
+        self._children: dict[Callable, tuple[CounterChild, ...]] = {}
+
+    def _bind(self, scope: Scope) -> tuple[CounterChild, ...]:
+        endpoint = scope["endpoint"]
+        route = scope.get("route")
+        name = getattr(route, "name", None) or getattr(endpoint, "__name__", "")
+        children = self._children[endpoint] = tuple(
+            HTTP_REQUESTS.labels(scope["method"], name, status)
+            for status in STATUS_CLASSES
+        )
+        return children
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.enabled
+            or not scope["path"].startswith(self.prefix)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 路由匹配后 Starlette 会把 endpoint 写入 scope
+            endpoint = scope.get("endpoint")
+            if endpoint is not None:
+                children = self._children.get(endpoint) or self._bind(scope)
+                children[min(max(status // 100, 1), 5) - 1].inc()
+
+
+__all__ = [
+    "CACHE_LOOKUPS",
+    "HTTP_REQUESTS",
+    "LLM_TIME_TO_FIRST_TOKEN",
+    "LLM_TOKENS_SAVED",
+    "LLM_TOKENS_STREAMED",
+    "METRICS_ENABLED",
+    "QUEUE_DEPTH",
+    "SSE_STREAMS_ACTIVE",
+    "TRANSCRIPT_FETCH_ERRORS",
+    "TRANSCRIPT_FETCH_SECONDS",
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "metrics_endpoint",
+    "observe_cache",
+    "registry",
+]
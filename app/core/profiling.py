@@ -0,0 +1,254 @@
+"""
+线上 CPU 分析：采样式 profiler 与可在运行时开关的函数计时
+
+`SamplingProfiler` 在独立线程中按固定间隔读取各线程的调用栈（`sys._current_frames`），
+不需要重启进程，也不改变被采样代码的执行；结果可导出为 collapsed stack
+（flamegraph.pl / speedscope 均可读取）或 speedscope JSON。
+
+`timed` 装饰热路径函数；默认关闭（只多一次属性判断），开启后把耗时记入
+`/metrics` 的 `yag_function_seconds` 直方图。
+"""
+
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Literal, TypeVar
+
+from app.core.config import env_bool, env_float
+from app.core.metrics import registry
+
+PROFILE_MAX_SECONDS = env_float("YAG_PROFILE_MAX_SECONDS", 60.0)
+PROFILE_INTERVAL = env_float("YAG_PROFILE_INTERVAL", 0.005)
+"""采样间隔（秒）"""
+
+ProfileFormat = Literal["speedscope", "collapsed"]
+
+Frame = tuple[str, str, int]
+"""(函数名, 文件, 首行号)"""
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class ProfilerBusyError(RuntimeError):
+    """同一时间只允许一次采样"""
+
+
+class Profile:
+    """一次采样的结果：按调用栈聚合的样本数"""
+
+    def __init__(
+        self, stacks: Counter[tuple[Frame, ...]], interval: float, duration: float
+    ):
+        self.stacks = stacks
+        self.interval = interval
+        self.duration = duration
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """collapsed stack 格式：每行 `root;...;leaf 样本数`"""
+        lines = [
+            ";".join(name for name, _, _ in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "youtube-article-generator") -> dict[str, Any]:
+        """speedscope 文件格式（sampled profile，相同调用栈合并为一个带权重的样本）"""
+        frames: list[dict[str, Any]] = []
+        index: dict[Frame, int] = {}
+        samples: list[list[int]] = []
+        weights: list[float] = []
+
+        for stack, count in self.stacks.most_common():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frame_name, file, line = frame
+                    frames.append({"name": frame_name, "file": file, "line": line})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.core.profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class SamplingProfiler:
+    """在后台线程中周期性采集其他线程的调用栈"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    @staticmethod
+    def _stack(frame, thread_name: str) -> tuple[Frame, ...]:
+        stack: list[Frame] = []
+        while frame is not None:
+            code = frame.f_code
+            name = getattr(code, "co_qualname", code.co_name)
+            stack.append((name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.append((f"thread:{thread_name}", "", 0))
+        stack.reverse()
+        return tuple(stack)
+
+    def sample(self, seconds: float, thread_ids: set[int] | None = None) -> Profile:
+        """
+        阻塞采样 `seconds` 秒；应在线程中调用（如 `asyncio.to_thread`）
+
+        `thread_ids` 为 None 时采样除自身外的所有线程。
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+
+        try:
+            own_id = threading.get_ident()
+            stacks: Counter[tuple[Frame, ...]] = Counter()
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_at = started
+
+            while True:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    if thread_ids is not None and thread_id not in thread_ids:
+                        continue
+                    stacks[
+                        self._stack(frame, names.get(thread_id, str(thread_id)))
+                    ] += 1
+
+                # 按绝对时刻等待，避免间隔误差累积
+                next_at += self.interval
+                now = time.perf_counter()
+                if next_at >= deadline:
+                    break
+                if next_at > now:
+                    time.sleep(next_at - now)
+
+            return Profile(stacks, self.interval, time.perf_counter() - started)
+        finally:
+            self._lock.release()
+
+
+sampling_profiler = SamplingProfiler()
+"""进程级采样 profiler"""
+
+
+class FunctionTimings:
+    """`timed` 的全局开关，运行中可通过管理接口修改"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+
+
+function_timings = FunctionTimings(env_bool("YAG_FUNCTION_TIMINGS", False))
+
+FUNCTION_SECONDS = registry.histogram(
+    "yag_function_seconds",
+    "Time spent in functions decorated with timed (async generators: per step)",
+    ("function",),
+    (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+
+
+def timed(name: str | None = None) -> Callable[[F], F]:
+    """
+    记录函数耗时的装饰器，支持普通函数、协程函数和异步生成器
+
+    关闭时只多一次属性判断；异步生成器按每次产出计时（包含等待上游的时间）。
+    """
+
+    def decorator(function: F) -> F:
+        child = FUNCTION_SECONDS.labels(name or function.__qualname__)
+
+        if inspect.isasyncgenfunction(function):
+
+            @functools.wraps(function)
+            async def async_generator_wrapper(*args, **kwargs):
+                iterator = function(*args, **kwargs)
+                try:
+                    while True:
+                        enabled = function_timings.enabled
+                        started = time.perf_counter() if enabled else 0.0
+                        try:
+                            item = await anext(iterator)
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            if enabled:
+                                child.observe(time.perf_counter() - started)
+                        yield item
+                finally:
+                    # 提前关闭时同步关闭被装饰的生成器，执行其 finally
+                    await iterator.aclose()
+
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def coroutine_wrapper(*args, **kwargs):
+                if not function_timings.enabled:
+                    return await function(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - started)
+
+            return coroutine_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not function_timings.enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = [
+    "PROFILE_MAX_SECONDS",
+    "Profile",
+    "ProfileFormat",
+    "ProfilerBusyError",
+    "SamplingProfiler",
+    "function_timings",
+    "sampling_profiler",
+    "timed",
+]
@@ -0,0 +1,120 @@
+"""
+启动耗时统计：各模块的导入耗时与 lifespan 中各初始化步骤的耗时
+
+`YAG_STARTUP_PROFILE=True` 时在 `app` 包导入时安装导入计时钩子；
+初始化步骤总是计时（开销可以忽略）。启动完成后输出报告，
+总耗时超过 `YAG_STARTUP_TARGET` 秒时记录警告，便于控制扩容时 worker 的冷启动时间。
+"""
+
+import builtins
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.core.config import env_bool, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE = env_bool("YAG_STARTUP_PROFILE", False)
+STARTUP_TARGET = env_float("YAG_STARTUP_TARGET", 3.0)
+"""冷启动目标（秒）"""
+STARTUP_REPORT_TOP = env_int("YAG_STARTUP_REPORT_TOP", 15)
+
+
+class StartupProfiler:
+    """记录模块导入与初始化步骤的耗时"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.imports: dict[str, tuple[float, float]] = {}
+        """模块名 -> (含子导入的总耗时, 自身耗时)"""
+        self.stages: dict[str, float] = {}
+        self.ready_at: float | None = None
+        self._original_import = None
+        self._children_time: list[float] = []
+
+    def install_import_hook(self) -> None:
+        """包装 `builtins.__import__`，只统计首次导入（类似 `python -X importtime`）"""
+        if self._original_import is not None:
+            return
+
+        original_import = self._original_import = builtins.__import__
+        modules = sys.modules
+        stack = self._children_time
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in modules:
+                return original_import(name, globals, locals, fromlist, level)
+
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                if name in modules:
+                    self.imports[name] = (elapsed, elapsed - children)
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """统计一个初始化步骤的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def mark_ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    def report(self, top: int = STARTUP_REPORT_TOP) -> dict:
+        """启动耗时报告；导入按自身耗时从高到低取前 `top` 个"""
+        slowest = sorted(
+            self.imports.items(), key=lambda item: item[1][1], reverse=True
+        )
+        return {
+            "total": (self.ready_at or time.perf_counter()) - self.started_at,
+            "stages": dict(self.stages),
+            "imports": [
+                {"module": name, "cumulative": cumulative, "self": own}
+                for name, (cumulative, own) in slowest[:top]
+            ],
+        }
+
+    def log_report(self, target: float = STARTUP_TARGET) -> dict:
+        report = self.report()
+        lines = [f"[startup] ready in {report['total']:.3f}s"]
+        lines += [
+            f"  stage {name}: {seconds:.3f}s"
+            for name, seconds in report["stages"].items()
+        ]
+        lines += [
+            f"  import {entry['module']}: {entry['self']:.3f}s (cumulative {entry['cumulative']:.3f}s)"
+            for entry in report["imports"]
+        ]
+        logger.info("\n".join(lines))
+
+        if report["total"] > target:
+            logger.warning(
+                f"[startup] cold start {report['total']:.3f}s exceeds target {target:.3f}s"
+            )
+        return report
+
+
+startup_profiler = StartupProfiler()
+"""进程级启动耗时统计"""
+
+
+__all__ = ["STARTUP_PROFILE", "StartupProfiler", "startup_profiler"]
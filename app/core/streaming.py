@@ -0,0 +1,75 @@
+"""
+流式响应工具：客户端断开时取消上游生成
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, TypeVar
+
+from starlette.requests import Request
+
+from app.core.config import env_float
+
+logger = logging.getLogger(__name__)
+
+DISCONNECT_POLL_INTERVAL = env_float("YAG_DISCONNECT_POLL_INTERVAL", 0.5)
+
+T = TypeVar("T")
+
+
+async def cancel_on_disconnect(
+    request: Request,
+    stream: AsyncIterator[T],
+    interval: float = DISCONNECT_POLL_INTERVAL,
+    on_disconnect: Callable[[], None] | None = None,
+) -> AsyncIterator[T]:
+    """
+    转发 stream，并由一个独立的任务定期检查客户端是否断开
+
+    分块在当前任务中直接迭代，不为每个分块创建任务。断开时：正在等待下一个分块
+    则取消当前任务（取消会传递到 LLM 流和 transcript 请求）；否则在下一次取分块
+    之前结束。最后关闭 stream，不再向已断开的连接写数据。
+    """
+    task = asyncio.current_task()
+    iterator = aiter(stream)
+    waiting = False
+    disconnected = False
+
+    async def watch() -> None:
+        nonlocal disconnected
+        while not await request.is_disconnected():
+            await asyncio.sleep(interval)
+
+        disconnected = True
+        logger.info(f"[streaming] client disconnected: {request.url.path}")
+        if on_disconnect:
+            on_disconnect()
+        if waiting:
+            task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        while not disconnected:
+            waiting = True
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            except asyncio.CancelledError:
+                # 只吞掉 watcher 发出的取消；外部的取消继续向上抛
+                if disconnected and task.uncancel() == 0:
+                    return
+                raise
+            finally:
+                waiting = False
+            yield chunk
+    finally:
+        watcher.cancel()
+        await asyncio.gather(watcher, return_exceptions=True)
+
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+__all__ = ["cancel_on_disconnect"]
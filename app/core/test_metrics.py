@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from app.core.metrics import (
+    HTTP_REQUESTS,
+    LLM_TOKENS_SAVED,
+    MetricsMiddleware,
+    MetricsRegistry,
+    registry,
+)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_counter(self):
+        """测试计数器按标签输出，预先绑定的子指标与 labels 返回同一对象"""
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests", ("route",))
+        child = counter.labels("generate")
+        child.inc()
+        child.inc(2)
+
+        self.assertIs(counter.labels("generate"), child)
+        self.assertIn('requests_total{route="generate"} 3.0', registry.render())
+        with self.assertRaises(ValueError):
+            counter.labels("generate", "extra")
+
+    def test_gauge_function(self):
+        """测试仪表在抓取时读取回调的值"""
+        registry = MetricsRegistry()
+        depth = [0]
+        registry.gauge("queue_depth", "Depth").labels().set_function(lambda: depth[0])
+
+        depth[0] = 7
+        self.assertIn("queue_depth 7.0", registry.render())
+
+    def test_histogram(self):
+        """测试直方图的累计桶、总和与计数"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        child = histogram.labels()
+        for value in (0.05, 0.1, 0.5, 3):
+            child.observe(value)
+
+        text = registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_sum 3.65", text)
+        self.assertIn("latency_seconds_count 4", text)
+
+    def test_duplicate(self):
+        """测试重复注册同名指标"""
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests")
+        with self.assertRaises(ValueError):
+            registry.counter("requests_total", "Requests")
+
+
+class TestMetricsMiddleware(unittest.TestCase):
+    def test_route_counts(self):
+        """测试按路由名称和状态码类别统计，前缀之外的路径和 404 不统计"""
+        router = APIRouter(prefix="/api/v1")
+
+        @router.get("/metrics_test_ok")
+        async def metrics_test_ok():
+            return {}
+
+        @router.get("/metrics_test_missing")
+        async def metrics_test_missing():
+            return JSONResponse({}, status_code=404)
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(MetricsMiddleware, prefix="/api/v1", enabled=True)
+
+        client = TestClient(app)
+        for _ in range(3):
+            client.get("/api/v1/metrics_test_ok")
+        client.get("/api/v1/metrics_test_missing")
+        client.get("/api/v1/unknown")
+        client.get("/docs")
+
+        self.assertEqual(HTTP_REQUESTS.labels("GET", "metrics_test_ok", "2xx").get(), 3)
+        self.assertEqual(
+            HTTP_REQUESTS.labels("GET", "metrics_test_missing", "4xx").get(), 1
+        )
+        self.assertNotIn(("GET", "swagger_ui_html", "2xx"), HTTP_REQUESTS._children)
+
+
+class TestTokensSaved(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelled_stream_counts_saved_tokens(self):
+        """测试客户端断开取消 LLM 流时，估算节省的 token 计入 /metrics"""
+        from langchain_core.messages import AIMessageChunk
+
+        from app.api.youtube_articles.generate import (
+            _cache_article,
+            article_stream_stats,
+        )
+
+        async def chunks():
+            while True:
+                yield AIMessageChunk(content="abcd")
+                await asyncio.sleep(0)
+
+        saved = LLM_TOKENS_SAVED.labels("metrics-test-model")
+        before = saved.get()
+        expected = article_stream_stats.average_output_tokens - 2
+        stream = _cache_article("metrics-test", "metrics-test-model", chunks())
+        for _ in range(2):
+            await anext(stream)
+        await stream.aclose()
+
+        self.assertEqual(saved.get() - before, expected)
+        self.assertIn(
+            f'yag_llm_tokens_saved_total{{model="metrics-test-model"}} {float(expected)}',
+            registry.render(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
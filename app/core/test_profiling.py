@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from app.api.v1.routers import admin
+from app.core.profiling import (
+    FUNCTION_SECONDS,
+    ProfilerBusyError,
+    SamplingProfiler,
+    function_timings,
+    timed,
+)
+
+
+def busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def sample_busy_thread(self, profiler: SamplingProfiler):
+        stop = threading.Event()
+        thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+        thread.start()
+        try:
+            return profiler.sample(0.1, thread_ids={thread.ident})
+        finally:
+            stop.set()
+            thread.join()
+
+    def test_collapsed(self):
+        """测试采样到目标线程的调用栈，collapsed 格式以线程名开头"""
+        profile = self.sample_busy_thread(SamplingProfiler(interval=0.005))
+
+        self.assertGreater(profile.samples, 5)
+        lines = profile.collapsed().splitlines()
+        self.assertTrue(all(line.startswith("thread:busy;") for line in lines))
+        self.assertTrue(any("busy_loop" in line for line in lines))
+
+    def test_speedscope(self):
+        """测试 speedscope 文件中样本引用的帧都存在，权重与样本一一对应"""
+        profile = self.sample_busy_thread(SamplingProfiler(interval=0.005))
+        document = profile.speedscope()
+
+        frames = document["shared"]["frames"]
+        sampled = document["profiles"][0]
+        self.assertEqual(len(sampled["samples"]), len(sampled["weights"]))
+        self.assertTrue(
+            all(
+                0 <= index < len(frames)
+                for sample in sampled["samples"]
+                for index in sample
+            )
+        )
+        self.assertIn("busy_loop", {frame["name"] for frame in frames})
+
+    def test_busy(self):
+        """测试同一时间只允许一次采样"""
+        profiler = SamplingProfiler(interval=0.01)
+        thread = threading.Thread(target=profiler.sample, args=(0.2,))
+        thread.start()
+        time.sleep(0.05)
+        try:
+            with self.assertRaises(ProfilerBusyError):
+                profiler.sample(0.01)
+        finally:
+            thread.join()
+
+
+class TestTimed(unittest.TestCase):
+    def tearDown(self):
+        function_timings.enabled = False
+
+    def count(self, name: str) -> int:
+        return sum(FUNCTION_SECONDS.labels(name).counts)
+
+    def test_disabled(self):
+        """测试关闭时不记录耗时"""
+
+        @timed("test_disabled")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(self.count("test_disabled"), 0)
+
+    def test_function_and_coroutine(self):
+        """测试开启后记录普通函数和协程函数的每次调用"""
+
+        @timed("test_function")
+        def add(a, b):
+            return a + b
+
+        @timed("test_coroutine")
+        async def add_async(a, b):
+            return a + b
+
+        function_timings.enabled = True
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(asyncio.run(add_async(1, 2)), 3)
+
+        self.assertEqual(self.count("test_function"), 1)
+        self.assertEqual(self.count("test_coroutine"), 1)
+
+    def test_async_generator(self):
+        """测试异步生成器按步计时，提前关闭时执行被装饰生成器的 finally"""
+        closed = []
+
+        @timed("test_async_generator")
+        async def numbers():
+            try:
+                for n in range(3):
+                    yield n
+            finally:
+                closed.append(True)
+
+        async def main():
+            function_timings.enabled = True
+            self.assertEqual([n async for n in numbers()], [0, 1, 2])
+
+            stream = numbers()
+            await anext(stream)
+            await stream.aclose()
+
+        asyncio.run(main())
+        # 第一次：3 个值 + 结束；第二次：1 个值
+        self.assertEqual(self.count("test_async_generator"), 5)
+        self.assertEqual(closed, [True, True])
+
+
+class TestAdminRouter(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(admin.router)
+        self.client = TestClient(app)
+
+    def test_disabled_without_token(self):
+        """测试未配置 YAG_ADMIN_TOKEN 时管理路由不可用"""
+        with patch.object(admin, "ADMIN_TOKEN", ""):
+            response = self.client.put("/admin/timings", params={"enabled": True})
+        self.assertEqual(response.status_code, 404)
+
+    def test_token(self):
+        """测试错误 token 返回 403，正确 token 可以采样"""
+        with patch.object(admin, "ADMIN_TOKEN", "secret"):
+            response = self.client.post(
+                "/admin/profile",
+                params={"seconds": 0.05},
+                headers={"X-Admin-Token": "x"},
+            )
+            self.assertEqual(response.status_code, 403)
+
+            response = self.client.post(
+                "/admin/profile",
+                params={"seconds": 0.05, "format": "collapsed"},
+                headers={"X-Admin-Token": "secret"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("thread:", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.core.startup_profiler import StartupProfiler
+
+
+class TestStartupProfiler(unittest.TestCase):
+    def test_stage(self):
+        """测试初始化步骤计时，同名步骤累加"""
+        profiler = StartupProfiler()
+        for _ in range(2):
+            with profiler.stage("database"):
+                time.sleep(0.01)
+
+        profiler.mark_ready()
+        report = profiler.report()
+        self.assertGreaterEqual(report["stages"]["database"], 0.02)
+        self.assertGreaterEqual(report["total"], report["stages"]["database"])
+
+    def test_import_hook_records_first_import(self):
+        """测试只记录首次导入的模块，卸载后不再计时"""
+        sys.modules.pop("tabnanny", None)
+        profiler = StartupProfiler()
+        profiler.install_import_hook()
+        try:
+            import tabnanny  # noqa: F401
+            import os as _  # noqa: F401  已导入，不计时
+        finally:
+            profiler.uninstall_import_hook()
+
+        self.assertIn("tabnanny", profiler.imports)
+        self.assertNotIn("os", profiler.imports)
+        cumulative, own = profiler.imports["tabnanny"]
+        self.assertLessEqual(own, cumulative)
+        self.assertEqual(profiler.report(top=1)["imports"][0]["module"], "tabnanny")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
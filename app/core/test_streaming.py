@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.core.streaming import cancel_on_disconnect
+
+
+class FakeRequest:
+    """第 n 次检查后报告已断开"""
+
+    class url:
+        path = "/test"
+
+    def __init__(self, disconnect_after: int):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks > self.disconnect_after
+
+
+class TestCancelOnDisconnect(unittest.IsolatedAsyncioTestCase):
+    async def test_upstream_cancelled_on_disconnect(self):
+        """测试客户端断开后取消正在等待的上游分块"""
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            yield "first"
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            yield "never"
+
+        request = FakeRequest(disconnect_after=1)
+        chunks = [
+            chunk
+            async for chunk in cancel_on_disconnect(request, upstream(), interval=0.01)
+        ]
+
+        self.assertEqual(chunks, ["first"])
+        self.assertTrue(cancelled.is_set())
+
+    async def test_connected_client_gets_everything(self):
+        """测试连接正常时完整转发"""
+
+        async def upstream():
+            for n in range(3):
+                await asyncio.sleep(0.02)
+                yield n
+
+        request = FakeRequest(disconnect_after=1000)
+        chunks = [
+            chunk
+            async for chunk in cancel_on_disconnect(request, upstream(), interval=0.01)
+        ]
+
+        self.assertEqual(chunks, [0, 1, 2])
+
+    async def test_chunks_iterated_in_consumer_task(self):
+        """测试分块在消费者的任务中直接迭代，不为每个分块创建任务"""
+        tasks = set()
+
+        async def upstream():
+            for n in range(50):
+                tasks.add(asyncio.current_task())
+                yield n
+
+        request = FakeRequest(disconnect_after=1000)
+        chunks = [
+            chunk
+            async for chunk in cancel_on_disconnect(request, upstream(), interval=0.01)
+        ]
+
+        self.assertEqual(chunks, list(range(50)))
+        self.assertEqual(tasks, {asyncio.current_task()})
+
+    async def test_external_cancel_propagates(self):
+        """测试外部取消不会被当作客户端断开吞掉"""
+
+        async def upstream():
+            yield "first"
+            await asyncio.sleep(10)
+            yield "never"
+
+        async def consume():
+            request = FakeRequest(disconnect_after=1000)
+            async for _ in cancel_on_disconnect(request, upstream(), interval=0.01):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.03)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
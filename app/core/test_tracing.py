@@ -0,0 +1,86 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.tracing import (
+    RequestTrace,
+    RequestTraceMiddleware,
+    current_trace,
+    record,
+    span,
+)
+
+
+async def endpoint(request: Request):
+    with span("fetch", hit=False):
+        pass
+    record("llm_ttft", 0.25)
+    return JSONResponse({"requestId": request.state.request_id})
+
+
+def create_app() -> Starlette:
+    app = Starlette(routes=[Route("/", endpoint)])
+    app.add_middleware(RequestTraceMiddleware, enabled=True)
+    return app
+
+
+class TestRequestTrace(unittest.TestCase):
+    def test_span_without_trace(self):
+        """测试没有进行中的请求时 span / record 不做任何事"""
+        self.assertIsNone(current_trace())
+        with span("noop") as attributes:
+            attributes["value"] = 1
+        record("noop", 1.0)
+        self.assertIsNone(current_trace())
+
+    def test_totals(self):
+        """测试同名阶段累加，Server-Timing 以毫秒输出"""
+        trace = RequestTrace("id", "GET /")
+        trace.record("provider", 0.1)
+        trace.record("provider", 0.2)
+        trace.record("llm_ttft", 0.05)
+
+        self.assertEqual(trace.totals(), {"provider": 300.0, "llm_ttft": 50.0})
+        self.assertEqual(trace.server_timing(), "provider;dur=300.0, llm_ttft;dur=50.0")
+
+    def test_span_error(self):
+        """测试阶段内抛出异常时记录错误类型"""
+        trace = RequestTrace("id")
+        with self.assertRaises(ValueError):
+            with trace.span("parse"):
+                raise ValueError("bad")
+
+        self.assertEqual(trace.to_dict()["spans"][0]["error"], "ValueError")
+
+
+class TestRequestTraceMiddleware(unittest.TestCase):
+    def test_request_id(self):
+        """测试沿用请求中的 X-Request-ID，并返回 Server-Timing"""
+        client = TestClient(create_app())
+        response = client.get("/", headers={"X-Request-ID": "abc"})
+
+        self.assertEqual(response.json(), {"requestId": "abc"})
+        self.assertEqual(response.headers["X-Request-ID"], "abc")
+        self.assertIn("fetch;dur=", response.headers["Server-Timing"])
+        self.assertIn("llm_ttft;dur=250.0", response.headers["Server-Timing"])
+
+    def test_generated_request_id(self):
+        """测试没有 X-Request-ID 时生成新的 ID"""
+        client = TestClient(create_app())
+        first = client.get("/").headers["X-Request-ID"]
+        second = client.get("/").headers["X-Request-ID"]
+
+        self.assertEqual(len(first), 32)
+        self.assertNotEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
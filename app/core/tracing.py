@@ -0,0 +1,187 @@
+"""
+按请求的分阶段耗时追踪
+
+中间件为每个 HTTP 请求生成 request ID（或沿用 `X-Request-ID`），写入
+`request.state.request_id`，并把当前请求的 `RequestTrace` 放进 contextvar；
+各阶段用 `span(...)` 计时，没有进行中的请求（脚本、后台任务）时不做任何事。
+
+请求结束时把各阶段耗时写入日志；非流式响应带 `Server-Timing` 头，
+SSE 流在结束前输出一个耗时事件（见 `to_vercel_ai_sdk_generator`）。
+"""
+
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import env_bool
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = env_bool("YAG_TRACING", True)
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    """相对请求开始的时间（秒）"""
+    duration: float
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class RequestTrace:
+    """一个请求内记录的所有阶段"""
+
+    def __init__(self, request_id: str, route: str = ""):
+        self.request_id = request_id
+        self.route = route
+        self.started_at = time.perf_counter()
+        self.spans: list[Span] = []
+        self.duration: float | None = None
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+        """计时一个阶段；yield 出的 dict 可在阶段内补充属性"""
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as exception:
+            attributes["error"] = type(exception).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, start, **attributes)
+
+    def record(
+        self, name: str, duration: float, start: float | None = None, **attributes: Any
+    ) -> None:
+        """记录一个已经测得耗时的阶段（如 TTFT）"""
+        if start is None:
+            start = time.perf_counter() - duration
+        self.spans.append(Span(name, start - self.started_at, duration, attributes))
+
+    def finish(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started_at
+
+    def totals(self) -> dict[str, float]:
+        """各阶段耗时（毫秒），同名阶段累加"""
+        totals: dict[str, float] = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration * 1000
+        return {name: round(ms, 2) for name, ms in totals.items()}
+
+    def server_timing(self) -> str:
+        """`Server-Timing` 响应头"""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.totals().items())
+
+    def to_dict(self) -> dict[str, Any]:
+        elapsed = self.duration or (time.perf_counter() - self.started_at)
+        return {
+            "requestId": self.request_id,
+            "route": self.route,
+            "totalMs": round(elapsed * 1000, 2),
+            "spans": [
+                {
+                    "name": span.name,
+                    "startMs": round(span.start * 1000, 2),
+                    "durationMs": round(span.duration * 1000, 2),
+                    **span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[RequestTrace | None] = ContextVar(
+    "request_trace", default=None
+)
+
+
+def current_trace() -> RequestTrace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """在当前请求中计时一个阶段；没有进行中的请求时只执行代码块"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield attributes
+        return
+    with trace.span(name, **attributes) as attributes:
+        yield attributes
+
+
+def record(name: str, duration: float, **attributes: Any) -> None:
+    """在当前请求中记录一个已测得耗时的阶段"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record(name, duration, **attributes)
+
+
+class RequestTraceMiddleware:
+    """
+    为每个请求建立 RequestTrace 的 ASGI 中间件
+
+    用纯 ASGI 实现而不是 BaseHTTPMiddleware：不改变流式响应的发送方式，
+    `request.is_disconnected()` 仍然可用。
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool = TRACING_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        header = REQUEST_ID_HEADER.lower().encode()
+        request_id = (
+            next(
+                (value.decode() for key, value in scope["headers"] if key == header),
+                None,
+            )
+            or uuid.uuid4().hex
+        )
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        trace = RequestTrace(request_id, f"{scope['method']} {scope['path']}")
+        token = _current_trace.set(trace)
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = request_id
+                # 流式响应此时还没结束，只包含已完成的阶段
+                if trace.spans:
+                    headers["Server-Timing"] = trace.server_timing()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            trace.finish()
+            _current_trace.reset(token)
+            if trace.spans:
+                logger.info(
+                    f"[trace] {json.dumps(trace.to_dict(), ensure_ascii=False)}"
+                )
+
+
+__all__ = [
+    "RequestTrace",
+    "RequestTraceMiddleware",
+    "current_trace",
+    "record",
+    "span",
+]
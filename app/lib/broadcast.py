@@ -0,0 +1,189 @@
+"""
+一对多的流式广播：生产者写入的分块会被缓存，订阅者先回放已有分块再跟随实时分块
+"""
+
+import asyncio
+import contextvars
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BroadcastChannel(Generic[T]):
+    """带回放缓冲的广播通道"""
+
+    def __init__(self):
+        self.chunks: list[T] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.on_idle: Callable[[], None] | None = None
+        """最后一个订阅者在通道结束前离开时调用"""
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, chunk: T) -> None:
+        if self.done:
+            raise RuntimeError("Cannot publish to a closed channel")
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, error: BaseException | None = None) -> None:
+        """结束通道；传入 error 时订阅者在回放完后收到该异常"""
+        if self.done:
+            return
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def subscribe(self, offset: int = 0) -> "Subscription[T]":
+        """从 offset 开始回放，然后跟随实时分块直到通道关闭"""
+        return Subscription(self, offset)
+
+    def _leave(self) -> None:
+        self.subscribers -= 1
+        if self.subscribers == 0 and not self.done and self.on_idle:
+            self.on_idle()
+
+
+class Subscription(Generic[T]):
+    """
+    通道的一个订阅者
+
+    创建时即计入订阅数，而不是第一次迭代时：订阅后、开始读取前的等待
+    （如拉取 transcript）期间，其他订阅者离开不会让通道误判为无人订阅。
+    迭代结束、出错、`aclose()` 或被回收时移除，且只移除一次。
+    """
+
+    def __init__(self, channel: BroadcastChannel[T], offset: int = 0):
+        self.channel = channel
+        self.offset = offset
+        self.active = True
+        channel.subscribers += 1
+
+    def __aiter__(self) -> "Subscription[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        channel = self.channel
+        try:
+            while self.active:
+                if self.offset < len(channel.chunks):
+                    chunk = channel.chunks[self.offset]
+                    self.offset += 1
+                    return chunk
+
+                if channel.done:
+                    if channel.error is not None:
+                        raise channel.error
+                    break
+
+                await channel._changed.wait()
+        except BaseException:
+            self.close()
+            raise
+
+        self.close()
+        raise StopAsyncIteration
+
+    def close(self) -> None:
+        if self.active:
+            self.active = False
+            self.channel._leave()
+
+    async def aclose(self) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # 未读完就被丢弃（如 `async for ...: break`）时同样释放订阅
+        self.close()
+
+
+class BroadcastHub(Generic[T]):
+    """
+    按 key 合并相同的流：同一 key 只有第一个订阅者会启动上游，
+    之后的订阅者挂到同一个 BroadcastChannel 上
+
+    所有订阅者都离开后取消上游（例如客户端全部断开），除非有订阅者
+    传入了 `keep_running=True`。
+    """
+
+    def __init__(self):
+        self._channels: dict[Hashable, BroadcastChannel[T]] = {}
+        self._keep_running: set[Hashable] = set()
+        self._producers: set[asyncio.Task] = set()
+        self.started = 0
+        self.joined = 0
+        self.cancelled = 0
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._channels
+
+    def subscribe(
+        self,
+        key: Hashable,
+        source: Callable[[], Awaitable[AsyncIterator[T]]],
+        keep_running: bool = False,
+    ) -> Subscription[T]:
+        """订阅 key 对应的流；没有进行中的流时调用 source 启动上游"""
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = BroadcastChannel()
+            self.started += 1
+            # 上游在独立任务中运行，某个订阅者断开不会影响其他订阅者；
+            # 使用空的 Context，不继承第一个订阅者的 contextvars（如请求追踪）
+            task = asyncio.create_task(
+                self._produce(key, channel, source), context=contextvars.Context()
+            )
+            self._producers.add(task)
+            task.add_done_callback(self._producers.discard)
+            channel.on_idle = lambda: self._cancel_idle(key, task)
+        else:
+            self.joined += 1
+            logger.info(f"[broadcast] joined in-flight stream {key!r}")
+
+        if keep_running:
+            self._keep_running.add(key)
+
+        return channel.subscribe()
+
+    def _cancel_idle(self, key: Hashable, task: asyncio.Task) -> None:
+        if key in self._keep_running or task.done():
+            return
+        logger.info(f"[broadcast] no subscribers left, cancelling {key!r}")
+        self.cancelled += 1
+        task.cancel()
+
+    async def _produce(
+        self,
+        key: Hashable,
+        channel: BroadcastChannel[T],
+        source: Callable[[], Awaitable[AsyncIterator[T]]],
+    ) -> None:
+        try:
+            async for chunk in await source():
+                channel.publish(chunk)
+        except asyncio.CancelledError:
+            channel.close(RuntimeError("Stream cancelled"))
+            raise
+        except Exception as exception:
+            channel.close(exception)
+        else:
+            channel.close()
+        finally:
+            # 流结束后不再接受新订阅者，之后的相同请求重新生成
+            if self._channels.get(key) is channel:
+                del self._channels[key]
+                self._keep_running.discard(key)
+
+
+__all__ = ["BroadcastChannel", "BroadcastHub", "Subscription"]
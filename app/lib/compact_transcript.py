@@ -0,0 +1,200 @@
+"""
+列式存储的 transcript：时间用整数秒数组，文本拼成一个字符串加偏移量
+
+`TranscriptData.custom` 中每个条目都是一个 pydantic 对象，时间是 "HH:MM:SS"
+字符串，求时长时每次都要重新解析。`CompactTranscript` 只在构建时解析一次：
+
+- `starts` / `ends`：`array("i")`，单位秒
+- `text`：所有条目用空格连接成的一个字符串，即完整文本
+- `offsets`：`array("i")`，第 i 个条目从 `offsets[i]` 开始，
+  到 `offsets[i + 1] - 1` 结束（不含分隔的空格）
+
+完整文本、总时长与切片都不需要逐条目创建对象。
+"""
+
+import bisect
+from array import array
+from itertools import accumulate
+from typing import TYPE_CHECKING, Iterable, Iterator, overload
+
+if TYPE_CHECKING:
+    from app.lib.youtube_models import TranscriptData, TranscriptEntry
+
+SEPARATOR = " "
+"""条目之间的分隔符，与 `TranscriptData.get_full_text` 一致"""
+
+
+def parse_timestamp(timestamp: str) -> int:
+    """把 "HH:MM:SS"（或 "MM:SS"）解析为秒"""
+    if len(timestamp) == 8 and timestamp[2] == timestamp[5] == ":":
+        return int(timestamp[:2]) * 3600 + int(timestamp[3:5]) * 60 + int(timestamp[6:])
+    seconds = 0
+    for part in timestamp.split(":"):
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as HH:MM:SS"""
+    total = int(seconds)
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+class CompactTranscript:
+    """不可变的列式 transcript"""
+
+    __slots__ = ("starts", "ends", "text", "offsets")
+
+    def __init__(self, starts: array, ends: array, text: str, offsets: array):
+        if not (len(starts) == len(ends) == len(offsets) - 1):
+            raise ValueError(
+                "starts, ends and offsets do not describe the same entries"
+            )
+        self.starts = starts
+        self.ends = ends
+        self.text = text
+        self.offsets = offsets
+
+    @classmethod
+    def from_columns(
+        cls,
+        starts: Iterable[int],
+        ends: Iterable[int],
+        texts: list[str],
+        full_text: str | None = None,
+    ) -> "CompactTranscript":
+        """
+        由开始秒、结束秒与文本三列构建
+
+        已经拼接过完整文本时通过 `full_text` 传入，复用同一个字符串。
+        """
+        separator = len(SEPARATOR)
+        offsets = array(
+            "i", accumulate((len(text) + separator for text in texts), initial=0)
+        )
+        if full_text is None:
+            full_text = SEPARATOR.join(texts)
+        elif len(full_text) != offsets[-1] - separator * bool(texts):
+            raise ValueError("full_text does not match the entry texts")
+        return cls(array("i", starts), array("i", ends), full_text, offsets)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[int, int, str]]) -> "CompactTranscript":
+        """由 (开始秒, 结束秒, 文本) 构建"""
+        columns = tuple(zip(*rows)) or ((), (), ())
+        return cls.from_columns(columns[0], columns[1], list(columns[2]))
+
+    @classmethod
+    def from_entries(
+        cls, entries: Iterable["TranscriptEntry"], full_text: str | None = None
+    ) -> "CompactTranscript":
+        entries = list(entries)
+        starts = [entry.start for entry in entries]
+        ends = [entry.end for entry in entries]
+        # 相邻条目的结束与开始时间通常相同，每个不同的时间戳只解析一次
+        seconds = {
+            timestamp: parse_timestamp(timestamp) for timestamp in {*starts, *ends}
+        }
+        return cls.from_columns(
+            map(seconds.__getitem__, starts),
+            map(seconds.__getitem__, ends),
+            [entry.text for entry in entries],
+            full_text,
+        )
+
+    @classmethod
+    def from_transcript_data(cls, transcript: "TranscriptData") -> "CompactTranscript":
+        return cls.from_entries(transcript.custom)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def entry_text(self, index: int) -> str:
+        return self.text[self.offsets[index] : self.offsets[index + 1] - len(SEPARATOR)]
+
+    def text_between(self, start: int, stop: int) -> str:
+        """第 start 到 stop - 1 个条目的文本（一次字符串切片）"""
+        if start >= stop:
+            return ""
+        return self.text[self.offsets[start] : self.offsets[stop] - len(SEPARATOR)]
+
+    def window_indices(
+        self, start_seconds: float, end_seconds: float
+    ) -> tuple[int, int]:
+        """
+        与时间区间 [start_seconds, end_seconds) 有重叠的条目下标范围
+
+        条目按时间顺序排列，两次二分查找即可，不遍历条目。
+        """
+        first = bisect.bisect_right(self.ends, start_seconds)
+        stop = bisect.bisect_left(self.starts, end_seconds, lo=first)
+        return first, stop
+
+    def window(self, start_seconds: float, end_seconds: float) -> "CompactTranscript":
+        """时间区间内的条目"""
+        return self[slice(*self.window_indices(start_seconds, end_seconds))]
+
+    def text_window(self, start_seconds: float, end_seconds: float) -> str:
+        """时间区间内的文本（一次字符串切片）"""
+        return self.text_between(*self.window_indices(start_seconds, end_seconds))
+
+    @overload
+    def __getitem__(self, index: int) -> "TranscriptEntry": ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "CompactTranscript": ...
+
+    def __getitem__(self, index):
+        """整数下标返回单个 TranscriptEntry；切片返回新的 CompactTranscript"""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("CompactTranscript slices do not support a step")
+            stop = max(start, stop)
+            base = self.offsets[start]
+            offsets = array(
+                "i", (offset - base for offset in self.offsets[start : stop + 1])
+            )
+            return CompactTranscript(
+                self.starts[start:stop],
+                self.ends[start:stop],
+                self.text_between(start, stop),
+                offsets,
+            )
+
+        from app.lib.youtube_models import TranscriptEntry
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("CompactTranscript index out of range")
+        return TranscriptEntry(
+            start=format_timestamp(self.starts[index]),
+            end=format_timestamp(self.ends[index]),
+            text=self.entry_text(index),
+        )
+
+    def __iter__(self) -> Iterator["TranscriptEntry"]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def get_full_text(self) -> str:
+        return self.text
+
+    def get_duration_seconds(self, index: int) -> int:
+        return self.ends[index] - self.starts[index]
+
+    def get_total_duration(self) -> float:
+        """各条目时长之和，与 `TranscriptData.get_total_duration` 一致"""
+        return float(sum(self.ends) - sum(self.starts))
+
+    def to_entries(self) -> list["TranscriptEntry"]:
+        return list(self)
+
+    def to_transcript_data(self) -> "TranscriptData":
+        from app.lib.youtube_models import TranscriptData
+
+        return TranscriptData(custom=self.to_entries())
+
+
+__all__ = ["CompactTranscript", "format_timestamp", "parse_timestamp"]
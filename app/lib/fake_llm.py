@@ -0,0 +1,136 @@
+"""
+本地假流式对话模型，用于离线压测与测试
+
+按配置的首 token 延迟（TTFT）、每秒 token 数和输出长度确定性地流式输出一篇
+Markdown 文章，不调用 ARK。`YAG_FAKE_LLM=True` 时 `app.lib.llms` 返回该模型。
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.core.config import env_float, env_int
+
+FAKE_LLM_TTFT = env_float("YAG_FAKE_LLM_TTFT", 0.3)
+FAKE_LLM_TOKENS_PER_SECOND = env_float("YAG_FAKE_LLM_TOKENS_PER_SECOND", 50.0)
+FAKE_LLM_OUTPUT_TOKENS = env_int("YAG_FAKE_LLM_OUTPUT_TOKENS", 400)
+
+FAKE_WORDS = (
+    "异或 运算 最 重要 的 性质 是 对 同一个 值 应用 两次 会 得到 原来 的 值 。"
+    " 这 在 加密 和 交换 变量 时 非常 有用 ， 我们 可以 用 Python 验证 它 。"
+).split()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """按固定节奏流式输出的假模型；相同输入总是得到相同输出"""
+
+    model_name: str = "fake"
+    time_to_first_token: float = FAKE_LLM_TTFT
+    """首 token 延迟（秒）"""
+    tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND
+    """首 token 之后的输出速度；<= 0 表示不限速"""
+    output_tokens: int = FAKE_LLM_OUTPUT_TOKENS
+    """每次输出的 token（分块）数"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {
+            "model_name": self.model_name,
+            "time_to_first_token": self.time_to_first_token,
+            "tokens_per_second": self.tokens_per_second,
+            "output_tokens": self.output_tokens,
+        }
+
+    def _tokens(self, messages: list[BaseMessage]) -> list[str]:
+        """由输入决定起始位置的确定性输出：标题 + 正文"""
+        digest = hashlib.sha256(
+            "\0".join(str(message.content) for message in messages).encode("utf-8")
+        ).digest()
+        offset = int.from_bytes(digest[:4], "big")
+
+        tokens = ["# 假文章\n\n"]
+        for index in range(max(0, self.output_tokens - 1)):
+            word = FAKE_WORDS[(offset + index) % len(FAKE_WORDS)]
+            tokens.append(word + ("\n\n" if word == "。" else ""))
+        return tokens[: self.output_tokens]
+
+    def _delay(self, index: int) -> float:
+        """第 index 个 token 相对开始时间的发出时刻"""
+        if self.tokens_per_second <= 0:
+            return self.time_to_first_token
+        return self.time_to_first_token + index / self.tokens_per_second
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = "".join(
+            chunk.message.content for chunk in self._stream(messages, stop, run_manager)
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))]
+        )
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        parts = [
+            chunk.message.content
+            async for chunk in self._astream(messages, stop, run_manager)
+        ]
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content="".join(parts)))]
+        )
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        start = time.monotonic()
+        for index, token in enumerate(self._tokens(messages)):
+            # 按绝对时刻等待，避免逐个 sleep 的误差累积
+            time.sleep(max(0.0, start + self._delay(index) - time.monotonic()))
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for index, token in enumerate(self._tokens(messages)):
+            await asyncio.sleep(max(0.0, start + self._delay(index) - loop.time()))
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+__all__ = ["FakeStreamingChatModel"]
@@ -1,65 +1,156 @@
 import os
+from functools import cache
+from typing import TYPE_CHECKING, Callable
 
-from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 from dotenv import load_dotenv
 
+from app.core.config import env_bool, env_int
+
+if TYPE_CHECKING:
+    # 仅用于类型标注；langchain_openai 导入较慢，构造模型时才导入
+    from langchain_core.language_models import BaseChatModel
+
 # 加载 .env 文件中的所有变量
 load_dotenv()
 
-api_key = os.getenv("ARK_API_KEY")
-base_url = os.getenv("ARK_BASE_URL")
-
-if api_key and base_url:
-    print(f"{SecretStr(api_key)=}")
-    print(f"{base_url=}")
-
-    print("API Key 已成功加载")
-else:
-    print("API Key 未找到，请检查设置")
-    # throw error
-    raise ValueError("API Key or base_url 未找到，请检查设置")
-
-
-model_with_function_calling: ChatOpenAI = ChatOpenAI(
-    api_key=SecretStr(api_key),
-    model="doubao-seed-1-6-lite-251015",
-    base_url=base_url,
-    # configuration: {
-    #   baseURL: ,
-    #   // logLevel: "debug",
-    # },
-    # // temperature: 0,
-    # // timeout: 10,
-    # // maxTokens: 1000,
-)
-"""支持函数调用的模型实例。
-- 模型：doubao-seed-1-6-lite-251015
-- 用途：适合需要工具/函数调用的场景
-"""
-# model_with_function_calling = 1
+CHAT_MODEL = "doubao-lite-32k-character-250228"
+FUNCTION_CALLING_MODEL = "doubao-seed-1-6-lite-251015"
+
+FAKE_LLM = env_bool("YAG_FAKE_LLM", False)
+"""用本地假模型代替 ARK（离线压测/测试），见 `app.lib.fake_llm`"""
+
+
+def _fake_model(name: str) -> "BaseChatModel":
+    from app.lib.fake_llm import FakeStreamingChatModel
+
+    # 模型名带 fake: 前缀，避免假输出写入真实模型的文章缓存
+    return FakeStreamingChatModel(model_name=f"fake:{name}")
+
+
+@cache
+def _credentials() -> tuple[str, str]:
+    """读取 ARK 凭证；第一次构造模型时才检查，缺失时抛出 ValueError"""
+    api_key = os.getenv("ARK_API_KEY")
+    base_url = os.getenv("ARK_BASE_URL")
+
+    if api_key and base_url:
+        print(f"{SecretStr(api_key)=}")
+        print(f"{base_url=}")
+
+        print("API Key 已成功加载")
+    else:
+        print("API Key 未找到，请检查设置")
+        # throw error
+        raise ValueError("API Key or base_url 未找到，请检查设置")
+
+    return api_key, base_url
+
+
+@cache
+def get_model_with_function_calling() -> "BaseChatModel":
+    """支持函数调用的模型实例（首次使用时创建）。
+    - 模型：doubao-seed-1-6-lite-251015
+    - 用途：适合需要工具/函数调用的场景
+    """
+    if FAKE_LLM:
+        return _fake_model(FUNCTION_CALLING_MODEL)
+
+    from langchain_openai import ChatOpenAI
+
+    api_key, base_url = _credentials()
+    return ChatOpenAI(
+        api_key=SecretStr(api_key),
+        model=FUNCTION_CALLING_MODEL,
+        base_url=base_url,
+        # configuration: {
+        #   baseURL: ,
+        #   // logLevel: "debug",
+        # },
+        # // temperature: 0,
+        # // timeout: 10,
+        # // maxTokens: 1000,
+    )
 
 
 # 标准对话模型
-chatModel: ChatOpenAI = ChatOpenAI(
-    api_key=SecretStr(api_key),
-    model="doubao-lite-32k-character-250228",
-    base_url=base_url,
-    # configuration: {
-    #   baseURL: "https://ark.cn-beijing.volces.com/api/v3",
-    #   // logLevel: "debug",
-    # },
-    temperature=0.2,
-    # // timeout: 10,
-    # // maxTokens: 1000,
-)
-"""标准对话模型实例。
-- 模型：doubao-lite-32k-character-250228
-- 温度：0.2（略有创造性）
-- 上下文长度：32K
-- 用途：通用对话、文本生成任务
-"""
+@cache
+def get_chat_model() -> "BaseChatModel":
+    """标准对话模型实例（首次使用时创建）。
+    - 模型：doubao-lite-32k-character-250228
+    - 温度：0.2（略有创造性）
+    - 上下文长度：32K
+    - 用途：通用对话、文本生成任务
+    """
+    if FAKE_LLM:
+        return _fake_model(CHAT_MODEL)
+
+    from langchain_openai import ChatOpenAI
+
+    api_key, base_url = _credentials()
+    return ChatOpenAI(
+        api_key=SecretStr(api_key),
+        model=CHAT_MODEL,
+        base_url=base_url,
+        # configuration: {
+        #   baseURL: "https://ark.cn-beijing.volces.com/api/v3",
+        #   // logLevel: "debug",
+        # },
+        temperature=0.2,
+        # // timeout: 10,
+        # // maxTokens: 1000,
+    )
+
+
+_LAZY_MODELS = {
+    "chatModel": get_chat_model,
+    "model_with_function_calling": get_model_with_function_calling,
+}
+
+
+def __getattr__(name: str):
+    # 兼容 `from app.lib.llms import chatModel`：访问时才创建模型
+    if name in _LAZY_MODELS:
+        return _LAZY_MODELS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+OUTPUT_RESERVE_TOKENS = env_int("YAG_OUTPUT_RESERVE_TOKENS", 4096)
+"""为模型输出预留的 token 数"""
+
+MODEL_CONTEXT_WINDOWS: dict[str, int] = {
+    "doubao-lite-32k-character-250228": 32_000,
+    "doubao-seed-1-6-lite-251015": 256_000,
+}
+"""各模型的上下文长度（token）"""
+
+ROUTED_MODELS: list[tuple[str, Callable[[], "BaseChatModel"]]] = [
+    (CHAT_MODEL, get_chat_model),
+    (FUNCTION_CALLING_MODEL, get_model_with_function_calling),
+]
+"""按成本和速度从低到高排列，路由时选第一个放得下的；只创建选中的模型"""
+
+
+def context_window(model: "BaseChatModel | str") -> int:
+    """模型（或模型名）的上下文长度；未登记的模型按 32K 处理"""
+    name = model if isinstance(model, str) else model.model_name
+    return MODEL_CONTEXT_WINDOWS.get(name, 32_000)
+
+
+def route_model(input_tokens: int) -> "BaseChatModel | None":
+    """选择能容纳 input_tokens（含输出预留）的最便宜模型；都放不下时返回 None"""
+    for name, get_model in ROUTED_MODELS:
+        if input_tokens + OUTPUT_RESERVE_TOKENS <= context_window(name):
+            return get_model()
+    return None
 
 
 # 可选：按需导出特定模型
-__all__ = ["model_with_function_calling", "chatModel"]
+__all__ = [
+    "CHAT_MODEL",
+    "FUNCTION_CALLING_MODEL",
+    "get_chat_model",
+    "get_model_with_function_calling",
+    "context_window",
+    "route_model",
+]
@@ -0,0 +1,98 @@
+"""
+进程内 LRU 缓存（支持 TTL 与命中统计）
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    按最近使用顺序淘汰的缓存，可选按写入时间过期
+
+    传入 `max_weight` 与 `weigher` 时，还会按条目权重总和（如字节数）淘汰。
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float | None = None,
+        max_weight: int | None = None,
+        weigher: Callable[[V], int] | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, count=False) is not None
+
+    def get(self, key: K, count: bool = True) -> V | None:
+        """读取缓存，命中时移动到最近使用位置"""
+        entry = self._data.get(key)
+        if entry is not None and self._expired(entry[0]):
+            self.pop(key)
+            entry = None
+
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V) -> list[tuple[K, V]]:
+        """写入缓存，返回因容量淘汰的条目"""
+        self.pop(key)
+        self._data[key] = (time.monotonic(), value)
+        self.weight += self._weigh(value)
+
+        evicted = []
+        # 单个条目超过 max_weight 时，它自己也会被淘汰（即不缓存）
+        while len(self._data) > self.max_size or (
+            self.max_weight is not None and self.weight > self.max_weight
+        ):
+            evicted_key, (_, evicted_value) = self._data.popitem(last=False)
+            self.weight -= self._weigh(evicted_value)
+            evicted.append((evicted_key, evicted_value))
+        return evicted
+
+    def pop(self, key: K) -> V | None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return None
+        self.weight -= self._weigh(entry[1])
+        return entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.weight = 0
+
+    def _weigh(self, value: V) -> int:
+        return self.weigher(value) if self.weigher else 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - stored_at > self.ttl
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+__all__ = ["LRUCache"]
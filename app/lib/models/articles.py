@@ -3,6 +3,7 @@ from typing import Literal
 from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from app.lib.youtube_models import VideoSummary
 
+from sqlalchemy import JSON, String
 from sqlmodel import Field as SQLField, Session, SQLModel, create_engine, select
 
 
@@ -38,11 +39,19 @@ class Article(ArticleBaseFields, SQLModel, table=True):
     # 覆盖 id 类型
     id: int | None = SQLField(description="文章ID", default=None, primary_key=True)
 
+    # Literal 与嵌套模型没有对应的 SQLAlchemy 类型，需显式指定列类型
+    source: str = SQLField(sa_type=String, description="文章生成来源")
+    style: str = SQLField(
+        default="professional", sa_type=String, description="文章风格"
+    )
+
     # 添加数据库特有字段
     youtube_video_id: str | None = SQLField(
         default=None, description="YouTube视频ID", index=True
     )
-    video_info: VideoSummary | None = SQLField(default=None, description="视频摘要信息")
+    video_info: VideoSummary | None = SQLField(
+        default=None, sa_type=JSON, description="视频摘要信息"
+    )
 
     # 配置
     model_config = ConfigDict(from_attributes=True)
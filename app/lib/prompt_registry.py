@@ -0,0 +1,263 @@
+"""
+本地 prompt 注册表：从 `app/prompts/*.json` 读取带版本号的 prompt，编译一次后复用
+
+启动时不联网；需要与 LangSmith Hub 同步时由 `refresh`/`start_refresh` 在后台拉取，
+模板有变化才升级版本号并通知订阅者。刷新得到的版本只保存在内存中（配置了
+`YAG_PROMPT_CACHE_DIR` 时写入该目录），不改动安装目录下的文件。
+
+`synced` 为 False 的 prompt 还没有与 Hub 上的原文逐字核对过：启动时记录警告，配置了
+`LANGSMITH_API_KEY` 时在后台同步一次（见 `start_sync_unverified`），不阻塞启动。用
+`python -m app.lib.prompt_registry <name>` 拉取一次原文写回 `app/prompts/` 并提交。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field, replace
+from pathlib import Path
+from typing import Callable
+
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
+
+from app.core.config import env_bool, env_float, env_str
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(
+    env_str("YAG_PROMPTS_DIR", str(Path(__file__).parents[1] / "prompts"))
+)
+PROMPT_REFRESH = env_bool("YAG_PROMPT_REFRESH", False)
+"""是否在后台从 LangSmith Hub 同步 prompt（需要 LANGSMITH_API_KEY）"""
+PROMPT_REFRESH_INTERVAL = env_float("YAG_PROMPT_REFRESH_INTERVAL", 3600)
+PROMPT_PULL_TIMEOUT = env_float("YAG_PROMPT_PULL_TIMEOUT", 10)
+PROMPT_CACHE_DIR = env_str("YAG_PROMPT_CACHE_DIR", "") or None
+"""刷新得到的 prompt 的落盘目录；为空时只保存在内存中"""
+
+
+@dataclass(frozen=True)
+class PromptSpec:
+    """磁盘上的一个 prompt 版本"""
+
+    name: str
+    version: int
+    template: str
+    """human 消息模板"""
+    system: str = ""
+    """固定的系统提示词（不作为模板解析）"""
+    source: str | None = None
+    """LangSmith Hub 上的来源，如 `owner/repo`；None 表示只在本地维护"""
+    input_variables: list[str] = field(default_factory=list)
+    synced: bool = False
+    """template 是否与 source 在 Hub 上的原文逐字一致"""
+
+    @property
+    def sha256(self) -> str:
+        """human 模板的哈希，用于固定已提交的模板内容"""
+        return hashlib.sha256(self.template.encode("utf-8")).hexdigest()
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False, indent=2) + "\n"
+
+    def compile(self) -> ChatPromptTemplate:
+        messages = [HumanMessagePromptTemplate.from_template(self.template)]
+        if self.system:
+            messages.insert(0, SystemMessage(content=self.system))
+        chat_prompt = ChatPromptTemplate.from_messages(messages)
+        if self.input_variables:
+            chat_prompt.input_variables = list(self.input_variables)
+        return chat_prompt
+
+
+class PromptRegistry:
+    """按名称获取编译好的 ChatPromptTemplate，支持后台从 LangSmith 刷新"""
+
+    def __init__(
+        self,
+        directory: Path = PROMPTS_DIR,
+        cache_dir: str | Path | None = PROMPT_CACHE_DIR,
+    ):
+        self.directory = Path(directory)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._specs: dict[str, PromptSpec] = {}
+        self._compiled: dict[str, ChatPromptTemplate] = {}
+        self._listeners: dict[str, list[Callable[[ChatPromptTemplate], None]]] = {}
+        self._refresh_task: asyncio.Task | None = None
+
+    def _path(self, name: str) -> Path:
+        return self.directory / f"{name}.json"
+
+    @staticmethod
+    def _read(path: Path) -> PromptSpec | None:
+        if not path.exists():
+            return None
+        return PromptSpec(**json.loads(path.read_text("utf-8")))
+
+    def spec(self, name: str) -> PromptSpec:
+        """读取 prompt 定义；同一名称只读一次磁盘，缓存目录中有更新的版本时优先使用"""
+        if name not in self._specs:
+            spec = self._read(self._path(name))
+            if spec is None:
+                raise KeyError(f"Prompt not found: {name} ({self._path(name)})")
+            if self.cache_dir is not None:
+                cached = self._read(self.cache_dir / f"{name}.json")
+                if cached is not None and cached.version > spec.version:
+                    spec = cached
+            self._specs[name] = spec
+        return self._specs[name]
+
+    def get(self, name: str) -> ChatPromptTemplate:
+        """编译好的 prompt；同一版本只编译一次"""
+        if name not in self._compiled:
+            self._compiled[name] = self.spec(name).compile()
+        return self._compiled[name]
+
+    def on_change(
+        self, name: str, listener: Callable[[ChatPromptTemplate], None]
+    ) -> None:
+        """prompt 刷新出新版本时调用 listener"""
+        self._listeners.setdefault(name, []).append(listener)
+
+    def update(self, name: str, template: str, input_variables: list[str]) -> bool:
+        """
+        用 Hub 上拉取的 human 模板更新 prompt；内容相同时只标记为已同步
+
+        有变化时版本号加一、重新编译并通知订阅者，返回 True。新版本保存在内存中，
+        配置了缓存目录时同时写入该目录，供重启后使用。
+        """
+        current = self.spec(name)
+        if template == current.template and input_variables == current.input_variables:
+            if not current.synced:
+                self._specs[name] = replace(current, synced=True)
+            return False
+
+        spec = replace(
+            current,
+            version=current.version + 1,
+            template=template,
+            input_variables=input_variables,
+            synced=True,
+        )
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                (self.cache_dir / f"{name}.json").write_text(spec.to_json(), "utf-8")
+            except OSError as exception:
+                logger.warning(f"[prompt_registry] cannot cache {name}: {exception}")
+        self._specs[name] = spec
+        self._compiled[name] = compiled = spec.compile()
+        logger.info(f"[prompt_registry] {name} updated to v{spec.version}")
+
+        for listener in self._listeners.get(name, []):
+            listener(compiled)
+        return True
+
+    @staticmethod
+    def _pull(source: str) -> tuple[str, list[str]]:
+        # 只在需要刷新时才导入并创建 LangSmith 客户端
+        from langsmith import Client
+
+        pulled = Client().pull_prompt(source)
+        return pulled.template, list(pulled.input_variables)
+
+    async def refresh(self, name: str) -> bool:
+        """从 LangSmith Hub 拉取 prompt 的最新模板；失败只记录日志，继续用本地版本"""
+        source = self.spec(name).source
+        if not source:
+            return False
+        try:
+            template, input_variables = await asyncio.wait_for(
+                asyncio.to_thread(self._pull, source), PROMPT_PULL_TIMEOUT
+            )
+        except Exception as exception:
+            logger.warning(f"[prompt_registry] refresh {name} failed: {exception}")
+            return False
+        return self.update(name, template, input_variables)
+
+    def start_sync_unverified(self, names: list[str]) -> None:
+        """
+        在后台同步一次尚未与 Hub 核对过的 prompt；不阻塞启动
+
+        没有 LANGSMITH_API_KEY 时只记录警告，继续使用本地模板。
+        """
+        unverified = [
+            name
+            for name in names
+            if self.spec(name).source and not self.spec(name).synced
+        ]
+        if not unverified:
+            return
+        if not os.environ.get("LANGSMITH_API_KEY"):
+            logger.warning(
+                f"[prompt_registry] {unverified} not verified against LangSmith Hub;"
+                " using the local templates"
+            )
+            return
+        self.start_refresh(unverified, interval=None)
+
+    def start_refresh(
+        self, names: list[str], interval: float | None = PROMPT_REFRESH_INTERVAL
+    ) -> None:
+        """在后台定期刷新；interval 为 None 时只刷新一次。不阻塞启动"""
+        if self._refresh_task is not None:
+            return
+
+        async def loop():
+            while True:
+                for name in names:
+                    await self.refresh(name)
+                if interval is None:
+                    return
+                await asyncio.sleep(interval)
+
+        self._refresh_task = asyncio.create_task(loop())
+
+    async def stop_refresh(self) -> None:
+        task, self._refresh_task = self._refresh_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+prompt_registry = PromptRegistry()
+"""应用级 prompt 注册表"""
+
+
+def main(argv: list[str] | None = None) -> None:
+    """从 Hub 拉取一次 prompt 原文写回 prompts 目录（提交前运行）"""
+    parser = argparse.ArgumentParser(description="Pull prompts from LangSmith Hub")
+    parser.add_argument("names", nargs="+")
+    args = parser.parse_args(argv)
+
+    registry = PromptRegistry(cache_dir=None)
+    for name in args.names:
+        current = registry.spec(name)
+        if not current.source:
+            parser.error(f"{name} has no LangSmith source")
+        template, input_variables = registry._pull(current.source)
+        changed = template != current.template
+        spec = replace(
+            current,
+            version=current.version + changed,
+            template=template,
+            input_variables=input_variables,
+            synced=True,
+        )
+        registry._path(name).write_text(spec.to_json(), "utf-8")
+        print(f"{name}: v{spec.version} sha256={spec.sha256}")
+
+
+__all__ = [
+    "PROMPT_CACHE_DIR",
+    "PROMPT_REFRESH",
+    "PromptRegistry",
+    "PromptSpec",
+    "prompt_registry",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+异步令牌桶限流器：限制对外部服务的请求速率，排队已满时快速失败
+"""
+
+import asyncio
+import math
+import time
+
+from app.core.config import env_float, env_int
+
+DEFAULT_RATE = env_float("YAG_PROVIDER_RATE", 5.0)
+DEFAULT_BURST = env_int("YAG_PROVIDER_BURST", 10)
+DEFAULT_QUEUE = env_int("YAG_PROVIDER_QUEUE", 50)
+
+
+class RateLimitExceeded(Exception):
+    """限流排队已满，请稍后重试"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(
+            f"请求过于频繁（{name}），请在 {math.ceil(retry_after)} 秒后重试"
+        )
+
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    - `rate`：每秒补充的令牌数
+    - `capacity`：桶容量，即允许的突发请求数
+    - `max_queue`：等待令牌的最大排队数，超过时抛出 `RateLimitExceeded`
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = DEFAULT_RATE,
+        capacity: int = DEFAULT_BURST,
+        max_queue: int = DEFAULT_QUEUE,
+    ):
+        # 容量小于 1 时令牌永远攒不够一个，acquire 会无限等待
+        if rate <= 0:
+            raise ValueError(f"{name}: rate must be positive, got {rate}")
+        if capacity < 1:
+            raise ValueError(f"{name}: capacity must be at least 1, got {capacity}")
+
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.max_queue = max_queue
+
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._waiting = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def waiting(self) -> int:
+        """正在排队等待令牌的请求数"""
+        return self._waiting
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def retry_after(self) -> float:
+        """排在队尾的新请求预计需要等待的秒数"""
+        self._refill()
+        return max(0.0, (self._waiting + 1 - self._tokens) / self.rate)
+
+    def is_full(self) -> bool:
+        """没有可用令牌且排队已满"""
+        self._refill()
+        return self._tokens < 1 and self._waiting >= self.max_queue
+
+    async def acquire(self) -> None:
+        """获取一个令牌，必要时按先来先到排队等待"""
+        self._refill()
+        if self._waiting == 0 and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        if self._waiting >= self.max_queue:
+            raise RateLimitExceeded(self.name, self.retry_after())
+
+        self._waiting += 1
+        try:
+            # asyncio.Lock 按先来先到唤醒等待者
+            async with self._lock:
+                while True:
+                    self._refill()
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            self._waiting -= 1
+
+
+class RateLimiterRegistry:
+    """
+    按名称管理令牌桶
+
+    每个 provider 可通过环境变量单独配置，如 notegpt：
+    `YAG_NOTEGPT_RATE`、`YAG_NOTEGPT_BURST`、`YAG_NOTEGPT_QUEUE`。
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def get(self, name: str) -> TokenBucket:
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            prefix = f"YAG_{name.upper()}"
+            bucket = self._buckets[name] = TokenBucket(
+                name,
+                rate=env_float(f"{prefix}_RATE", DEFAULT_RATE),
+                capacity=env_int(f"{prefix}_BURST", DEFAULT_BURST),
+                max_queue=env_int(f"{prefix}_QUEUE", DEFAULT_QUEUE),
+            )
+        return bucket
+
+    def set(self, bucket: TokenBucket) -> None:
+        self._buckets[bucket.name] = bucket
+
+
+__all__ = ["RateLimitExceeded", "RateLimiterRegistry", "TokenBucket"]
@@ -0,0 +1,137 @@
+"""
+Vercel AI SDK 格式的 SSE 编码
+
+每个 text-delta 事件只有 `delta` 在变化：`id`/`type` 前缀预先编码成 bytes，
+delta 只做一次字符串转义，避免每个 token 都构造 dict 再 `json.dumps`。
+输出与 `json.dumps({"id": ..., "type": "text-delta", "delta": ...})` 逐字节一致。
+"""
+
+import asyncio
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, AsyncIterator
+
+from app.core.config import env_float, env_int
+
+SSE_COALESCE_WINDOW = env_float("YAG_SSE_COALESCE_WINDOW", 0.0)
+"""合并 delta 的时间窗口（秒），0 表示不合并"""
+SSE_COALESCE_BYTES = env_int("YAG_SSE_COALESCE_BYTES", 1024)
+"""合并缓冲达到该字节数时立即输出"""
+
+DONE = b"data: [DONE]\n\n"
+
+
+class VercelSSEEncoder:
+    """单个文本流的 SSE 事件编码器"""
+
+    def __init__(self, id: str):
+        self.id = id
+        encoded_id = encode_basestring_ascii(id)
+        self._delta_prefix = (
+            f'data: {{"id": {encoded_id}, "type": "text-delta", "delta": '.encode()
+        )
+        self._delta_suffix = b"}\n\n"
+
+    def start(self, metadata: dict | None = None) -> bytes:
+        event = {"id": self.id, "type": "text-start"}
+        if metadata:
+            event["providerMetadata"] = metadata
+        return f"data: {json.dumps(event)}\n\n".encode()
+
+    def delta(self, text: str, event_id: int | None = None) -> bytes:
+        """text-delta 事件；传入 event_id 时带 SSE `id:` 行（断线续传用）"""
+        frame = b"".join(
+            (
+                self._delta_prefix,
+                encode_basestring_ascii(text).encode(),
+                self._delta_suffix,
+            )
+        )
+        if event_id is None:
+            return frame
+        return b"id: %d\n%s" % (event_id, frame)
+
+    def data(self, name: str, data: Any) -> bytes:
+        """自定义数据事件（`data-<name>`）"""
+        event = {"id": self.id, "type": f"data-{name}", "data": data}
+        return f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode()
+
+    def end(self) -> bytes:
+        return f"data: {json.dumps({'id': self.id, 'type': 'text-end'})}\n\n".encode()
+
+
+async def coalesce(
+    deltas: AsyncIterator[str],
+    window: float = SSE_COALESCE_WINDOW,
+    max_bytes: int = SSE_COALESCE_BYTES,
+) -> AsyncIterator[str]:
+    """
+    把时间窗口内到达的 delta 合并成一个，减少事件数与写操作
+
+    缓冲从第一个 delta 开始计时，超过 `window` 秒或累计约 `max_bytes` 字节
+    （按字符数近似）即输出；
+    `window <= 0` 时原样转发。
+    上游由一个后台任务持续读入缓冲区，不为每个 delta 创建任务；等待时间窗口
+    用 `asyncio.timeout_at`，同样不创建任务。
+    """
+    iterator = aiter(deltas)
+    if window <= 0:
+        async for delta in iterator:
+            yield delta
+        return
+
+    loop = asyncio.get_running_loop()
+    buffer: list[str] = []
+    size = 0
+    deadline = 0.0
+    finished = False
+    changed = asyncio.Event()
+
+    async def pump() -> None:
+        nonlocal size, deadline, finished
+        try:
+            async for delta in iterator:
+                if not buffer:
+                    deadline = loop.time() + window
+                buffer.append(delta)
+                size += len(delta)
+                changed.set()
+        finally:
+            finished = True
+            changed.set()
+
+    producer = asyncio.create_task(pump())
+    try:
+        while True:
+            while not buffer and not finished:
+                changed.clear()
+                await changed.wait()
+            if not buffer:
+                break
+
+            # 等到时间窗口到期、缓冲足够大或上游结束
+            try:
+                async with asyncio.timeout_at(deadline):
+                    while size < max_bytes and not finished:
+                        changed.clear()
+                        await changed.wait()
+            except TimeoutError:
+                pass
+
+            text = "".join(buffer)
+            buffer.clear()
+            size = 0
+            yield text
+
+        # 上游的异常在已缓冲的内容输出之后抛出
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+__all__ = ["DONE", "VercelSSEEncoder", "coalesce"]
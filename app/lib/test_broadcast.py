@@ -0,0 +1,145 @@
+import asyncio
+import contextvars
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.broadcast import BroadcastChannel, BroadcastHub
+
+
+async def collect(channel: BroadcastChannel[str], offset: int = 0) -> list[str]:
+    return [chunk async for chunk in channel.subscribe(offset)]
+
+
+class TestBroadcastChannel(unittest.IsolatedAsyncioTestCase):
+    async def test_late_subscriber_replays(self):
+        """测试后加入的订阅者先回放已有分块再跟随实时分块"""
+        channel: BroadcastChannel[str] = BroadcastChannel()
+        channel.publish("a")
+        early = asyncio.create_task(collect(channel))
+        await asyncio.sleep(0)
+
+        channel.publish("b")
+        late = asyncio.create_task(collect(channel, offset=1))
+        await asyncio.sleep(0)
+        channel.publish("c")
+        channel.close()
+
+        self.assertEqual(await early, ["a", "b", "c"])
+        self.assertEqual(await late, ["b", "c"])
+        self.assertEqual(channel.subscribers, 0)
+
+    async def test_error_after_replay(self):
+        """测试通道以错误结束时，订阅者回放完后收到该异常"""
+        channel: BroadcastChannel[str] = BroadcastChannel()
+        channel.publish("a")
+        channel.close(RuntimeError("boom"))
+
+        received = []
+        with self.assertRaises(RuntimeError):
+            async for chunk in channel.subscribe():
+                received.append(chunk)
+        self.assertEqual(received, ["a"])
+
+
+class TestBroadcastHub(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_subscribers_share_source(self):
+        """测试相同 key 的并发订阅只启动一次上游"""
+        hub: BroadcastHub[str] = BroadcastHub()
+        calls = 0
+        release = asyncio.Event()
+
+        async def source():
+            nonlocal calls
+            calls += 1
+
+            async def chunks():
+                yield "a"
+                await release.wait()
+                yield "b"
+
+            return chunks()
+
+        async def consume():
+            return [chunk async for chunk in hub.subscribe("video", source)]
+
+        first = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        release.set()
+
+        self.assertEqual(await first, ["a", "b"])
+        self.assertEqual(await second, ["a", "b"])
+        self.assertEqual(calls, 1)
+        self.assertNotIn("video", hub)
+
+    async def test_cancel_when_all_subscribers_leave(self):
+        """测试所有订阅者离开后取消上游，keep_running 时继续运行"""
+        hub: BroadcastHub[int] = BroadcastHub()
+        finished: list[str] = []
+
+        def source_for(key: str):
+            async def source():
+                async def chunks():
+                    for n in range(5):
+                        await asyncio.sleep(0.01)
+                        yield n
+                    finished.append(key)
+
+                return chunks()
+
+            return source
+
+        for key, keep_running in (("drop", False), ("keep", True)):
+            async for _ in hub.subscribe(key, source_for(key), keep_running):
+                break
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(finished, ["keep"])
+        self.assertEqual(hub.cancelled, 1)
+
+    async def test_source_runs_in_clean_context(self):
+        """测试上游不继承第一个订阅者的 contextvars"""
+        hub: BroadcastHub[str | None] = BroadcastHub()
+        request = contextvars.ContextVar("request", default=None)
+
+        async def source():
+            async def chunks():
+                yield request.get()
+
+            return chunks()
+
+        request.set("first request")
+        values = [value async for value in hub.subscribe("video", source)]
+        self.assertEqual(values, [None])
+
+    async def test_pending_subscriber_keeps_source(self):
+        """测试已订阅但尚未开始读取的订阅者，在其他订阅者离开后仍保持上游"""
+        hub: BroadcastHub[int] = BroadcastHub()
+
+        async def source():
+            async def chunks():
+                for n in range(3):
+                    await asyncio.sleep(0.01)
+                    yield n
+
+            return chunks()
+
+        first = hub.subscribe("video", source)
+        pending = hub.subscribe("video", source)
+        async for _ in first:
+            break
+        await first.aclose()
+        self.assertEqual(hub.cancelled, 0)
+
+        # 订阅后先做其他等待（如拉取 transcript），再开始读取
+        await asyncio.sleep(0.02)
+        self.assertEqual([n async for n in pending], [0, 1, 2])
+        self.assertEqual(hub.cancelled, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,133 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.compact_transcript import (
+    CompactTranscript,
+    format_timestamp,
+    parse_timestamp,
+)
+from app.lib.youtube_models import TranscriptData, TranscriptEntry
+
+
+def make_transcript() -> TranscriptData:
+    return TranscriptData(
+        custom=[
+            TranscriptEntry(start="00:00:00", end="00:00:04", text="异或运算"),
+            TranscriptEntry(start="00:00:04", end="00:01:10", text="also known as xor"),
+            TranscriptEntry(start="01:00:00", end="01:00:30", text=""),
+            TranscriptEntry(start="01:00:30", end="01:02:00", text="the end"),
+        ]
+    )
+
+
+class TestTimestamp(unittest.TestCase):
+    def test_round_trip(self):
+        """测试时间戳解析与格式化"""
+        self.assertEqual(parse_timestamp("01:02:03"), 3723)
+        self.assertEqual(parse_timestamp("02:03"), 123)
+        self.assertEqual(format_timestamp(3723.9), "01:02:03")
+
+
+class TestCompactTranscript(unittest.TestCase):
+    def setUp(self):
+        self.transcript = make_transcript()
+        self.compact = self.transcript.to_compact()
+
+    def test_round_trip(self):
+        """测试与 TranscriptData 互相转换不丢失信息"""
+        self.assertEqual(len(self.compact), 4)
+        self.assertEqual(self.compact.to_transcript_data(), self.transcript)
+        self.assertEqual(self.compact[-1], self.transcript.custom[-1])
+        with self.assertRaises(IndexError):
+            self.compact[4]
+
+    def test_text_and_duration(self):
+        """测试完整文本、单条与总时长与原模型一致"""
+        self.assertEqual(self.compact.get_full_text(), self.transcript.get_full_text())
+        self.assertEqual(self.compact.entry_text(2), "")
+        self.assertEqual(self.compact.get_duration_seconds(1), 66)
+        self.assertEqual(
+            self.compact.get_total_duration(), self.transcript.get_total_duration()
+        )
+
+    def test_slice(self):
+        """测试切片得到独立的 CompactTranscript，文本与偏移量重新对齐"""
+        middle = self.compact[1:3]
+
+        self.assertEqual(len(middle), 2)
+        self.assertEqual(middle.get_full_text(), "also known as xor ")
+        self.assertEqual(middle.entry_text(0), "also known as xor")
+        self.assertEqual(list(middle.starts), [4, 3600])
+        self.assertEqual(middle.to_entries(), self.transcript.custom[1:3])
+        self.assertEqual(len(self.compact[3:1]), 0)
+        with self.assertRaises(ValueError):
+            self.compact[::2]
+
+    def test_empty(self):
+        """测试空 transcript"""
+        empty = CompactTranscript.from_entries([])
+
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.get_full_text(), "")
+        self.assertEqual(empty.get_total_duration(), 0.0)
+
+
+class TestTranscriptViews(unittest.TestCase):
+    def setUp(self):
+        self.transcript = make_transcript()
+        self.expected = "异或运算 also known as xor  the end"
+
+    def test_full_text_memoized(self):
+        """测试完整文本只拼接一次，缓存不影响模型比较"""
+        text = self.transcript.get_full_text()
+
+        self.assertEqual(text, self.expected)
+        self.assertIs(self.transcript.get_full_text(), text)
+        self.assertIs(self.transcript.to_compact(), self.transcript.to_compact())
+        self.assertEqual(self.transcript, make_transcript())
+
+    def test_views_share_one_string(self):
+        """测试完整文本与列式存储共用同一个字符串，与调用顺序无关"""
+        text_first = make_transcript()
+        text = text_first.get_full_text()
+        self.assertIs(text_first.to_compact().text, text)
+
+        compact_first = make_transcript()
+        compact = compact_first.to_compact()
+        self.assertIs(compact_first.get_full_text(), compact.text)
+
+        with self.assertRaises(ValueError):
+            CompactTranscript.from_entries(make_transcript().custom, "too short")
+
+    def test_preview(self):
+        """测试预览与完整文本的前缀一致"""
+        for max_chars in (0, 3, 4, 5, 22, 200):
+            self.assertEqual(
+                make_transcript().get_preview(max_chars), self.expected[:max_chars]
+            )
+
+    def test_text_between(self):
+        """测试按时间区间取文本，有无列式存储结果一致"""
+        cases = [
+            ((0, 60), "异或运算 also known as xor"),
+            ((4, 60), "also known as xor"),
+            ((70, 3600), ""),
+            ((60, 3630), "also known as xor "),
+            ((3600, 7200), " the end"),
+        ]
+        compact = make_transcript()
+        compact.to_compact()
+        for (start, end), expected in cases:
+            self.assertEqual(self.transcript.get_text_between(start, end), expected)
+            self.assertEqual(compact.get_text_between(start, end), expected)
+
+        self.assertEqual(
+            compact.to_compact().window(4, 60).to_entries(), self.transcript.custom[1:2]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
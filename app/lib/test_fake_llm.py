@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from langchain_core.messages import HumanMessage
+
+from app.lib.fake_llm import FakeStreamingChatModel
+
+
+class TestFakeStreamingChatModel(unittest.IsolatedAsyncioTestCase):
+    async def test_output_length_and_determinism(self):
+        """测试输出分块数等于配置的 token 数，相同输入输出相同"""
+        model = FakeStreamingChatModel(
+            time_to_first_token=0, tokens_per_second=0, output_tokens=25
+        )
+        # astream 最后可能附带一个空的结束分块
+        chunks = [
+            chunk async for chunk in model.astream([HumanMessage("a")]) if chunk.content
+        ]
+
+        self.assertEqual(len(chunks), 25)
+        self.assertTrue(chunks[0].content.startswith("# "))
+        again = await model.ainvoke([HumanMessage("a")])
+        self.assertEqual(again.content, "".join(chunk.content for chunk in chunks))
+
+    async def test_pacing(self):
+        """测试首 token 延迟与输出速度"""
+        model = FakeStreamingChatModel(
+            time_to_first_token=0.05, tokens_per_second=200, output_tokens=11
+        )
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        arrivals = [
+            loop.time() - start async for chunk in model.astream("hi") if chunk.content
+        ]
+
+        self.assertGreaterEqual(arrivals[0], 0.05)
+        self.assertGreaterEqual(arrivals[-1], 0.05 + 10 / 200)
+        self.assertLess(arrivals[-1], 0.5)
+
+    def test_sync_invoke(self):
+        """测试同步调用"""
+        model = FakeStreamingChatModel(
+            time_to_first_token=0, tokens_per_second=0, output_tokens=3
+        )
+        self.assertTrue(model.invoke("hi").content)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.prompt_registry import PromptRegistry, prompt_registry
+
+ARTICLE_PROMPT_SHA256 = (
+    "3de92f6349c0a009d7e5eec7b3083c7c772e8ce7ec90264b5f702dd38d465292"
+)
+"""已提交的文章 prompt 模板；用 `python -m app.lib.prompt_registry` 同步后需一并更新"""
+
+
+class TestPromptRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        (self.directory / "article.json").write_text(
+            json.dumps(
+                {
+                    "name": "article",
+                    "version": 1,
+                    "source": "owner/article",
+                    "system": "系统提示 {不是变量}",
+                    "template": "Transcript:\n{transcript}",
+                    "input_variables": ["transcript"],
+                }
+            ),
+            "utf-8",
+        )
+        self.registry = PromptRegistry(self.directory, cache_dir=None)
+
+    def test_compiled_once(self):
+        """测试同一 prompt 只编译一次，系统提示词不作为模板解析"""
+        prompt = self.registry.get("article")
+        self.assertIs(self.registry.get("article"), prompt)
+        self.assertEqual(prompt.input_variables, ["transcript"])
+        messages = prompt.format_messages(transcript="hello")
+        self.assertEqual(messages[0].content, "系统提示 {不是变量}")
+        self.assertEqual(messages[1].content, "Transcript:\nhello")
+
+    def test_unknown_prompt(self):
+        """测试不存在的 prompt 抛出 KeyError"""
+        with self.assertRaises(KeyError):
+            self.registry.get("missing")
+
+    def test_update_bumps_version_and_notifies(self):
+        """测试模板变化时升级版本并通知订阅者，不改动 prompts 目录"""
+        changed = []
+        self.registry.on_change("article", changed.append)
+        original = (self.directory / "article.json").read_text("utf-8")
+
+        self.assertFalse(
+            self.registry.update("article", "Transcript:\n{transcript}", ["transcript"])
+        )
+        self.assertTrue(self.registry.spec("article").synced)
+        self.assertTrue(
+            self.registry.update("article", "New {transcript}", ["transcript"])
+        )
+
+        self.assertEqual(len(changed), 1)
+        self.assertIs(changed[0], self.registry.get("article"))
+        self.assertEqual(self.registry.spec("article").version, 2)
+        self.assertEqual((self.directory / "article.json").read_text("utf-8"), original)
+
+    def test_update_writes_cache_dir(self):
+        """测试配置了缓存目录时新版本写入该目录，重启后优先使用"""
+        cache_dir = Path(tempfile.mkdtemp()) / "prompts"
+        registry = PromptRegistry(self.directory, cache_dir=cache_dir)
+
+        self.assertTrue(registry.update("article", "New {transcript}", ["transcript"]))
+
+        restarted = PromptRegistry(self.directory, cache_dir=cache_dir)
+        self.assertEqual(restarted.spec("article").version, 2)
+        self.assertEqual(restarted.spec("article").template, "New {transcript}")
+        packaged = PromptRegistry(self.directory, cache_dir=None)
+        self.assertEqual(packaged.spec("article").version, 1)
+
+
+class TestShippedPrompts(unittest.TestCase):
+    def test_article_prompt_pinned(self):
+        """测试已提交的文章 prompt：输入变量与模板内容固定，修改需同时更新哈希"""
+        spec = PromptRegistry(prompt_registry.directory, cache_dir=None).spec(
+            "youtube-transcript-to-article"
+        )
+
+        self.assertEqual(spec.source, "muhsinbashir/youtube-transcript-to-article")
+        self.assertEqual(spec.input_variables, ["transcript"])
+        self.assertEqual(spec.compile().input_variables, ["transcript"])
+        self.assertEqual(spec.sha256, ARTICLE_PROMPT_SHA256)
+
+
+class TestRefresh(unittest.IsolatedAsyncioTestCase):
+    async def test_refresh_failure_keeps_local(self):
+        """测试拉取失败时继续使用本地版本"""
+        directory = Path(tempfile.mkdtemp())
+        (directory / "article.json").write_text(
+            json.dumps(
+                {"name": "article", "version": 1, "source": "x/y", "template": "{t}"}
+            ),
+            "utf-8",
+        )
+        registry = PromptRegistry(directory, cache_dir=None)
+
+        def fail(source):
+            raise ConnectionError("offline")
+
+        registry._pull = fail
+        self.assertFalse(await registry.refresh("article"))
+        self.assertEqual(registry.spec("article").version, 1)
+
+    async def test_sync_unverified(self):
+        """测试只在后台同步一次未核对的 prompt，且需要 LANGSMITH_API_KEY"""
+        directory = Path(tempfile.mkdtemp())
+        for name, synced in (("unverified", False), ("verified", True)):
+            (directory / f"{name}.json").write_text(
+                json.dumps(
+                    {
+                        "name": name,
+                        "version": 1,
+                        "source": f"x/{name}",
+                        "template": "{t}",
+                        "synced": synced,
+                    }
+                ),
+                "utf-8",
+            )
+        registry = PromptRegistry(directory, cache_dir=None)
+        pulled = []
+
+        def pull(source):
+            pulled.append(source)
+            return "Hub {t}", ["t"]
+
+        registry._pull = pull
+        with unittest.mock.patch.dict(os.environ, {"LANGSMITH_API_KEY": ""}):
+            registry.start_sync_unverified(["unverified", "verified"])
+        self.assertIsNone(registry._refresh_task)
+
+        with unittest.mock.patch.dict(os.environ, {"LANGSMITH_API_KEY": "key"}):
+            registry.start_sync_unverified(["unverified", "verified"])
+        # 调用本身不等待拉取
+        self.assertEqual(pulled, [])
+        await registry._refresh_task
+        self.assertEqual(pulled, ["x/unverified"])
+        self.assertEqual(registry.spec("unverified").template, "Hub {t}")
+        self.assertTrue(registry.spec("unverified").synced)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.rate_limit import RateLimitExceeded, TokenBucket
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    def test_invalid_configuration(self):
+        """测试容量小于 1 或速率不为正时在构造时报错，而不是 acquire 无限等待"""
+        for rate, capacity in ((1.0, 0), (1.0, -1), (0.0, 1), (-1.0, 1)):
+            with self.subTest(rate=rate, capacity=capacity):
+                with self.assertRaises(ValueError):
+                    TokenBucket("notegpt", rate=rate, capacity=capacity)
+
+    async def test_burst_within_capacity(self):
+        """测试容量内的突发请求不等待"""
+        bucket = TokenBucket("notegpt", rate=1.0, capacity=3, max_queue=0)
+
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+
+        self.assertLess(time.monotonic() - started, 0.05)
+
+    async def test_full_queue_fails_fast(self):
+        """测试排队已满时快速失败并给出重试时间"""
+        bucket = TokenBucket("notegpt", rate=1.0, capacity=1, max_queue=1)
+        await bucket.acquire()
+
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        self.assertTrue(bucket.is_full())
+
+        with self.assertRaises(RateLimitExceeded) as context:
+            await bucket.acquire()
+        self.assertGreater(context.exception.retry_after, 0)
+
+        waiter.cancel()
+
+    async def test_queued_requests_are_paced(self):
+        """测试排队请求按速率放行"""
+        bucket = TokenBucket("notegpt", rate=50.0, capacity=1, max_queue=10)
+
+        started = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(4)])
+
+        # 第一个令牌立即可用，其余 3 个按 50/s 补充
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(bucket.waiting, 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
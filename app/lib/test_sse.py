@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.sse import VercelSSEEncoder, coalesce
+
+
+async def ticks(count: int, delay: float):
+    for n in range(count):
+        await asyncio.sleep(delay)
+        yield f"{n},"
+
+
+class TestVercelSSEEncoder(unittest.TestCase):
+    def test_delta_matches_json_dumps(self):
+        """测试预编码前缀的输出与 json.dumps 逐字节一致"""
+        encoder = VercelSSEEncoder("3f2a")
+        for text in ["hello", "中文\n换行", 'quote " and \\ backslash', "\t\x00"]:
+            expected = {"id": "3f2a", "type": "text-delta", "delta": text}
+            self.assertEqual(
+                encoder.delta(text), f"data: {json.dumps(expected)}\n\n".encode()
+            )
+
+    def test_event_id_line(self):
+        """测试带 SSE id 行的 delta"""
+        frame = VercelSSEEncoder("job").delta("x", event_id=7)
+        self.assertTrue(frame.startswith(b"id: 7\ndata: "))
+
+
+class TestCoalesce(unittest.IsolatedAsyncioTestCase):
+    async def test_disabled_passes_through(self):
+        """测试窗口为 0 时原样转发"""
+        deltas = [delta async for delta in coalesce(ticks(5, 0), window=0)]
+        self.assertEqual(deltas, ["0,", "1,", "2,", "3,", "4,"])
+
+    async def test_time_window_merges(self):
+        """测试时间窗口内的 delta 合并成一帧且内容不变"""
+        deltas = [
+            delta
+            async for delta in coalesce(ticks(20, 0.002), window=0.05, max_bytes=10_000)
+        ]
+        self.assertLess(len(deltas), 20)
+        self.assertEqual("".join(deltas), "".join(f"{n}," for n in range(20)))
+
+    async def test_size_cap_flushes(self):
+        """测试缓冲达到大小上限时立即输出"""
+        deltas = [
+            delta async for delta in coalesce(ticks(10, 0), window=10, max_bytes=4)
+        ]
+        self.assertEqual(deltas, ["0,1,", "2,3,", "4,5,", "6,7,", "8,9,"])
+
+    async def test_single_reader_task(self):
+        """测试整个上游只由一个任务读取，不为每个 delta 创建任务"""
+        tasks = set()
+
+        async def upstream():
+            for n in range(30):
+                tasks.add(asyncio.current_task())
+                await asyncio.sleep(0.001)
+                yield f"{n},"
+
+        deltas = [delta async for delta in coalesce(upstream(), window=0.01)]
+        self.assertEqual("".join(deltas), "".join(f"{n}," for n in range(30)))
+        self.assertEqual(len(tasks), 1)
+
+    async def test_error_after_buffered_output(self):
+        """测试上游出错时先输出已缓冲的内容再抛出异常"""
+
+        async def upstream():
+            yield "partial"
+            raise ValueError("boom")
+
+        deltas = []
+        with self.assertRaises(ValueError):
+            async for delta in coalesce(upstream(), window=10):
+                deltas.append(delta)
+        self.assertEqual(deltas, ["partial"])
+
+    async def test_close_cancels_upstream(self):
+        """测试提前关闭时取消并关闭上游"""
+        cancelled = asyncio.Event()
+
+        async def upstream():
+            yield "first"
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        stream = coalesce(upstream(), window=0.01)
+        self.assertEqual(await anext(stream), "first")
+        await stream.aclose()
+        self.assertTrue(cancelled.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
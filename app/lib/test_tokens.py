@@ -0,0 +1,29 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.lib.tokens import estimate_tokens
+
+
+class TestEstimateTokens(unittest.TestCase):
+    def test_ascii(self):
+        """测试 ASCII 文本约 4 个字符 1 个 token"""
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcd" * 10), 10)
+        self.assertEqual(estimate_tokens("abcde"), 2)
+
+    def test_cjk_counts_per_character(self):
+        """测试 CJK 字符按 1 字 1 token 计"""
+        self.assertEqual(estimate_tokens("你好世界"), 4)
+        self.assertEqual(estimate_tokens("こんにちは"), 5)
+
+    def test_mixed_text(self):
+        """测试中英混合文本分别计数"""
+        self.assertEqual(estimate_tokens("你好 world"), 2 + 2)
+        self.assertEqual(estimate_tokens("привет"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,48 @@
+"""
+本地 token 数估算（不依赖分词器，不需要联网下载词表）
+
+按字符类别近似：CJK 字符约 1 个 token，ASCII 约 4 个字符 1 个 token，
+其他非 ASCII 字符（西里尔字母、重音字母等）约 2 个字符 1 个 token。
+估算值偏保守，用于选择模型和拒绝超长输入。
+"""
+
+import re
+
+ASCII_CHARS_PER_TOKEN = 4
+OTHER_CHARS_PER_TOKEN = 2
+
+# CJK 标点、假名、汉字、韩文与全角字符
+_CJK = re.compile(
+    r"[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff"
+    r"\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+
+
+class InputTooLongError(ValueError):
+    """输入超过所有模型（含 map-reduce）可处理的上限"""
+
+    def __init__(self, input_tokens: int, limit: int):
+        self.input_tokens = input_tokens
+        self.limit = limit
+        super().__init__(
+            f"输入过长：估算约 {input_tokens} tokens，超过上限 {limit} tokens"
+        )
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数"""
+    if text.isascii():
+        return -(-len(text) // ASCII_CHARS_PER_TOKEN)
+
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    cjk_chars = len(text) - len(_CJK.sub("", text))
+    other_chars = len(text) - ascii_chars - cjk_chars
+
+    return (
+        cjk_chars
+        + -(-ascii_chars // ASCII_CHARS_PER_TOKEN)
+        + -(-other_chars // OTHER_CHARS_PER_TOKEN)
+    )
+
+
+__all__ = ["InputTooLongError", "estimate_tokens"]
@@ -0,0 +1,185 @@
+"""
+本地假 transcript provider 服务，用于离线测试
+
+同时模拟 notegpt.io 的 JSON 接口与 youtubetotranscript.com 的 HTML 页面，
+可配置每个 provider 的延迟和失败状态。
+
+```bash
+python -m app.lib.tools.fake_provider_server --port 8765
+
+YAG_NOTEGPT_BASE_URL=http://127.0.0.1:8765 \
+YAG_YOUTUBETOTRANSCRIPT_BASE_URL=http://127.0.0.1:8765 \
+    uvicorn app.server:app
+```
+
+也可以不单独启动：`YAG_FAKE_PROVIDERS=True` 时 provider 客户端通过
+`httpx.ASGITransport` 直接调用进程内的假服务；配合 `YAG_FAKE_LLM=True`
+整个应用可以完全离线运行。
+"""
+
+import asyncio
+import html
+from typing import Any, Dict
+
+import httpx
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import HTMLResponse
+from pydantic import BaseModel, Field
+
+from app.core.config import env_bool, env_float, env_int
+
+FAKE_PROVIDERS = env_bool("YAG_FAKE_PROVIDERS", False)
+"""provider 请求改为发给进程内的假服务"""
+
+SAMPLE_SENTENCES = [
+    "This is the most important property of exclusive or operation also known as zor.",
+    "If you apply the same value twice, you get the original value.",
+    "And to demonstrate that this is actually true, we can bust out Python.",
+    "Let's take all of the possible combinations of two bits.",
+    "This has profound implications for encryption and swapping variables.",
+    "So let's actually wrap that into a function and run it.",
+]
+
+
+class FakeProviderBehavior(BaseModel):
+    """单个假 provider 的行为配置"""
+
+    delay: float = Field(default=0.0, description="响应延迟（秒）")
+    fail: bool = Field(default=False, description="是否返回 503")
+
+
+class FakeProviderSettings(BaseModel):
+    """假 provider 服务配置"""
+
+    entries: int = Field(default=200, description="每个视频的 transcript 条目数")
+    entry_seconds: int = Field(default=5, description="每个条目的时长（秒）")
+    notegpt: FakeProviderBehavior = Field(default_factory=FakeProviderBehavior)
+    youtubetotranscript: FakeProviderBehavior = Field(
+        default_factory=FakeProviderBehavior
+    )
+
+    @classmethod
+    def from_env(cls) -> "FakeProviderSettings":
+        return cls(
+            entries=env_int("YAG_FAKE_PROVIDER_ENTRIES", 200),
+            notegpt=FakeProviderBehavior(
+                delay=env_float("YAG_FAKE_NOTEGPT_DELAY", 0.0),
+                fail=env_bool("YAG_FAKE_NOTEGPT_FAIL"),
+            ),
+            youtubetotranscript=FakeProviderBehavior(
+                delay=env_float("YAG_FAKE_YOUTUBETOTRANSCRIPT_DELAY", 0.0),
+                fail=env_bool("YAG_FAKE_YOUTUBETOTRANSCRIPT_FAIL"),
+            ),
+        )
+
+
+def _timestamp(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def make_fake_transcript_entries(
+    video_id: str, entries: int, entry_seconds: int = 5
+) -> list[Dict[str, str]]:
+    """生成确定性的 transcript 条目"""
+    return [
+        {
+            "start": _timestamp(i * entry_seconds),
+            "end": _timestamp((i + 1) * entry_seconds),
+            "text": f"{SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)]} ({video_id} #{i})",
+        }
+        for i in range(entries)
+    ]
+
+
+def make_fake_notegpt_response(
+    video_id: str, entries: int, entry_seconds: int = 5
+) -> Dict[str, Any]:
+    """生成 NoteGPT 格式的响应数据"""
+    return {
+        "code": 100000,
+        "message": "success",
+        "data": {
+            "videoId": video_id,
+            "videoInfo": {
+                "name": f"Fake video {video_id}",
+                "thumbnailUrl": {
+                    "hqdefault": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+                },
+                "embedUrl": f"https://www.youtube.com/embed/{video_id}",
+                "duration": str(entries * entry_seconds),
+                "description": "",
+                "upload_date": "",
+                "genre": "",
+                "author": "Fake Author",
+                "channel_id": "fake_channel",
+            },
+            "language_code": [{"code": "en_auto", "name": "English (auto-generated)"}],
+            "transcripts": {
+                "en_auto": {
+                    "custom": make_fake_transcript_entries(
+                        video_id, entries, entry_seconds
+                    )
+                }
+            },
+        },
+    }
+
+
+def create_fake_provider_app(settings: FakeProviderSettings | None = None) -> FastAPI:
+    """创建假 provider 应用"""
+    settings = settings or FakeProviderSettings.from_env()
+    app = FastAPI(title="Fake transcript providers")
+    app.state.settings = settings
+
+    async def behave(behavior: FakeProviderBehavior) -> None:
+        if behavior.delay:
+            await asyncio.sleep(behavior.delay)
+        if behavior.fail:
+            raise HTTPException(status_code=503, detail="Fake provider failure")
+
+    @app.get("/api/v2/video-transcript")
+    async def notegpt_transcript(
+        video_id: str, platform: str = "youtube"
+    ) -> Dict[str, Any]:
+        await behave(settings.notegpt)
+        return make_fake_notegpt_response(
+            video_id, settings.entries, settings.entry_seconds
+        )
+
+    @app.get("/transcript", response_class=HTMLResponse)
+    async def youtubetotranscript_transcript(v: str = Query()) -> str:
+        await behave(settings.youtubetotranscript)
+
+        segments = "\n".join(
+            f'<span data-start="{i * settings.entry_seconds}" '
+            f'data-duration="{settings.entry_seconds}" class="transcript-segment">'
+            f"{html.escape(entry['text'])}</span>"
+            for i, entry in enumerate(
+                make_fake_transcript_entries(
+                    v, settings.entries, settings.entry_seconds
+                )
+            )
+        )
+        return f"<html><body><div id='transcript'>{segments}</div></body></html>"
+
+    return app
+
+
+def fake_provider_transport(
+    settings: FakeProviderSettings | None = None,
+) -> httpx.AsyncBaseTransport:
+    """把 provider 客户端的请求路由到进程内假服务的 transport"""
+    return httpx.ASGITransport(app=create_fake_provider_app(settings))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake transcript provider server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    uvicorn.run(create_fake_provider_app(), host=args.host, port=args.port)
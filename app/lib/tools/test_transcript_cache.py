@@ -0,0 +1,89 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from app.lib.tools.transcript_cache import TranscriptCache
+from app.lib.tools.youtube_info import YouTubeId
+from app.lib.youtube_models import TranscriptData, TranscriptEntry
+
+
+def make_transcript(text: str) -> TranscriptData:
+    return TranscriptData(
+        custom=[TranscriptEntry(start="00:00:00", end="00:00:05", text=text)]
+    )
+
+
+class TestTranscriptCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine(
+            "sqlite+aiosqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_memory_and_db_tiers(self):
+        """测试内存命中、SQLite 命中与未命中计数"""
+        cache = TranscriptCache(engine=self.engine, memory_size=1, db_size=10)
+        first, second = YouTubeId.of("4KdvcQKNfbQ"), YouTubeId.of("dQw4w9WgXcQ")
+
+        self.assertIsNone(await cache.get(first))
+
+        await cache.set(first, make_transcript("first"))
+        await cache.set(second, make_transcript("second"))
+
+        # second 仍在内存中，first 已被 LRU 淘汰但仍在 SQLite 中
+        self.assertEqual((await cache.get(second)).get_full_text(), "second")
+        self.assertEqual((await cache.get(first)).get_full_text(), "first")
+
+        stats = cache.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["db_hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    async def test_memory_char_cap(self):
+        """测试内存层按文本大小淘汰，淘汰后仍可从 SQLite 命中"""
+        cache = TranscriptCache(engine=self.engine, memory_chars=30, db_size=10)
+        first, second = YouTubeId.of("4KdvcQKNfbQ"), YouTubeId.of("dQw4w9WgXcQ")
+
+        await cache.set(first, make_transcript("a" * 10))
+        await cache.set(second, make_transcript("b" * 10))
+
+        stats = cache.stats()
+        self.assertEqual(stats["memory_entries"], 1)
+        self.assertEqual(stats["memory_chars"], 20)
+        self.assertEqual((await cache.get(first)).get_full_text(), "a" * 10)
+        self.assertEqual(cache.stats()["db_hits"], 1)
+
+    async def test_ttl_expiry(self):
+        """测试过期条目视为未命中"""
+        cache = TranscriptCache(engine=self.engine, ttl=-1)
+        video_id = YouTubeId.of("4KdvcQKNfbQ")
+
+        await cache.set(video_id, make_transcript("stale"))
+        self.assertIsNone(await cache.get(video_id))
+
+    async def test_db_size_eviction(self):
+        """测试 SQLite 按最近访问时间淘汰"""
+        cache = TranscriptCache(engine=self.engine, memory_size=1, db_size=1)
+        first, second = YouTubeId.of("4KdvcQKNfbQ"), YouTubeId.of("dQw4w9WgXcQ")
+
+        await cache.set(first, make_transcript("first"))
+        await cache.set(second, make_transcript("second"))
+
+        self.assertIsNone(await cache.get(first))
+        self.assertIsNotNone(await cache.get(second))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+import httpx
+
+from app.core.http_clients import close_provider_clients, init_provider_clients
+from app.lib.tools.fake_provider_server import (
+    FakeProviderBehavior,
+    FakeProviderSettings,
+    create_fake_provider_app,
+)
+from app.lib.tools.transcript_providers import (
+    CircuitOpenError,
+    CircuitState,
+    ProviderHealth,
+    ProviderHealthRegistry,
+    TranscriptProvider,
+    TranscriptProviderChain,
+    TranscriptUnavailableError,
+)
+from app.lib.rate_limit import RateLimitExceeded, RateLimiterRegistry, TokenBucket
+from app.lib.tools.youtube_info import (
+    NoteGPTProvider,
+    YouTubeId,
+    YouTubeToTranscriptProvider,
+)
+from app.lib.youtube_models import TranscriptData, TranscriptEntry
+
+VIDEO_ID = YouTubeId.of("4KdvcQKNfbQ")
+
+
+class StubProvider(TranscriptProvider):
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = False
+
+    async def fetch(self, video_id: YouTubeId) -> TranscriptData:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+        if self.fail:
+            raise ValueError(f"{self.name} failed")
+        return TranscriptData(
+            custom=[TranscriptEntry(start="00:00:00", end="00:00:01", text=self.name)]
+        )
+
+
+class TestTranscriptProviderChain(unittest.IsolatedAsyncioTestCase):
+    async def test_failover_in_order(self):
+        """测试第一个 provider 失败时回退到下一个"""
+        first, second = StubProvider("first", fail=True), StubProvider("second")
+        chain = TranscriptProviderChain([first, second])
+
+        transcript = await chain.fetch(VIDEO_ID)
+
+        self.assertEqual(transcript.get_full_text(), "second")
+        self.assertEqual((first.calls, second.calls), (1, 1))
+
+    async def test_first_success_skips_others(self):
+        """测试第一个 provider 成功时不调用后续 provider"""
+        first, second = StubProvider("first"), StubProvider("second")
+        transcript = await TranscriptProviderChain([first, second]).fetch(VIDEO_ID)
+
+        self.assertEqual(transcript.get_full_text(), "first")
+        self.assertEqual(second.calls, 0)
+
+    async def test_all_failed(self):
+        """测试所有 provider 都失败时抛出 TranscriptUnavailableError"""
+        chain = TranscriptProviderChain(
+            [StubProvider("first", fail=True), StubProvider("second", fail=True)]
+        )
+
+        with self.assertRaises(TranscriptUnavailableError) as context:
+            await chain.fetch(VIDEO_ID)
+
+        self.assertEqual(
+            [name for name, _ in context.exception.errors], ["first", "second"]
+        )
+
+    async def test_hedged_request_takes_fastest(self):
+        """测试对冲模式下慢 provider 会被更快的 provider 超越并取消"""
+        slow, fast = StubProvider("slow", delay=1.0), StubProvider("fast", delay=0.01)
+        chain = TranscriptProviderChain([slow, fast], hedge_delay=0.02)
+
+        transcript = await chain.fetch(VIDEO_ID)
+        await asyncio.sleep(0)
+
+        self.assertEqual(transcript.get_full_text(), "fast")
+        self.assertTrue(slow.cancelled)
+
+
+class TestProviderHealth(unittest.TestCase):
+    def test_circuit_opens_after_consecutive_failures(self):
+        """测试连续失败后熔断，冷却后进入 half-open 并在探测成功后恢复"""
+        health = ProviderHealth("notegpt", failure_threshold=3, open_seconds=0.0)
+
+        for _ in range(3):
+            health.acquire()
+            health.record_failure()
+        self.assertIs(health.state, CircuitState.OPEN)
+
+        # 冷却结束，只放行一个探测请求
+        health.acquire()
+        self.assertIs(health.state, CircuitState.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            health.acquire()
+
+        health.record_success(0.1)
+        self.assertIs(health.state, CircuitState.CLOSED)
+
+    def test_open_circuit_rejects_requests(self):
+        """测试熔断期间直接拒绝请求"""
+        health = ProviderHealth("notegpt", failure_threshold=1, open_seconds=60.0)
+        health.record_failure()
+
+        with self.assertRaises(CircuitOpenError):
+            health.acquire()
+
+    def test_adaptive_timeout(self):
+        """测试超时时间由最近延迟分位数推算"""
+        health = ProviderHealth(
+            "notegpt", min_samples=5, min_timeout=0.5, max_timeout=10.0
+        )
+        self.assertEqual(health.timeout(), 10.0)
+
+        for latency in [0.4, 0.5, 0.6, 0.7, 0.8]:
+            health.record_success(latency)
+
+        self.assertAlmostEqual(health.percentile(0.95), 0.8)
+        self.assertAlmostEqual(health.timeout(), 1.6)
+
+
+class TestChainWithHealth(unittest.IsolatedAsyncioTestCase):
+    async def test_open_circuit_is_skipped(self):
+        """测试熔断中的 provider 被跳过而不是等待超时"""
+        health = ProviderHealthRegistry(failure_threshold=1, open_seconds=60.0)
+        broken, backup = StubProvider("broken", fail=True), StubProvider("backup")
+        chain = TranscriptProviderChain([broken, backup], health=health)
+
+        await chain.fetch(VIDEO_ID)
+        await chain.fetch(VIDEO_ID)
+
+        self.assertEqual(broken.calls, 1)
+        self.assertEqual(backup.calls, 2)
+
+    async def test_timeout_counts_as_failure(self):
+        """测试超过自适应超时的请求被计为失败"""
+        health = ProviderHealthRegistry(max_timeout=0.01)
+        slow, backup = StubProvider("slow", delay=1.0), StubProvider("backup")
+        chain = TranscriptProviderChain([slow, backup], health=health)
+
+        transcript = await chain.fetch(VIDEO_ID)
+
+        self.assertEqual(transcript.get_full_text(), "backup")
+        self.assertEqual(health.get("slow").consecutive_failures, 1)
+
+    async def test_rate_limited_chain_raises_rate_limit(self):
+        """测试所有 provider 限流排队已满时抛出 RateLimitExceeded"""
+        limiters = RateLimiterRegistry()
+        for name in ["first", "second"]:
+            bucket = TokenBucket(name, rate=0.1, capacity=1, max_queue=0)
+            await bucket.acquire()
+            limiters.set(bucket)
+
+        chain = TranscriptProviderChain(
+            [StubProvider("first"), StubProvider("second")], limiters=limiters
+        )
+
+        with self.assertRaises(RateLimitExceeded):
+            chain.check_admission()
+        with self.assertRaises(RateLimitExceeded):
+            await chain.fetch(VIDEO_ID)
+
+
+class TestFakeProviderServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.settings = FakeProviderSettings(entries=3)
+        await init_provider_clients(
+            transport=httpx.ASGITransport(app=create_fake_provider_app(self.settings))
+        )
+
+    async def asyncTearDown(self):
+        await close_provider_clients()
+
+    async def test_notegpt_provider(self):
+        """测试 NoteGPT provider 解析假服务响应"""
+        transcript = await NoteGPTProvider("http://fake").fetch(VIDEO_ID)
+
+        self.assertEqual(len(transcript.custom), 3)
+        self.assertEqual(transcript.custom[1].start, "00:00:05")
+
+    async def test_youtubetotranscript_provider(self):
+        """测试 youtubetotranscript provider 解析假服务 HTML"""
+        transcript = await YouTubeToTranscriptProvider("http://fake").fetch(VIDEO_ID)
+
+        self.assertEqual(len(transcript.custom), 3)
+        self.assertEqual(transcript.custom[2].end, "00:00:15")
+        self.assertIn("exclusive or operation", transcript.get_full_text())
+
+    async def test_chain_against_failing_fake_provider(self):
+        """测试假服务返回 503 时回退到 NoteGPT"""
+        self.settings.youtubetotranscript = FakeProviderBehavior(fail=True)
+        chain = TranscriptProviderChain(
+            [YouTubeToTranscriptProvider("http://fake"), NoteGPTProvider("http://fake")]
+        )
+
+        transcript = await chain.fetch(VIDEO_ID)
+        self.assertEqual(len(transcript.custom), 3)
+
+
+class TestNoteGPTResponse(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        await close_provider_clients()
+
+    async def test_response_without_data(self):
+        """测试没有 data 的错误响应仍然报告原始内容"""
+        await init_provider_clients(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, json={"code": 0, "message": "login required", "data": None}
+                )
+            )
+        )
+
+        with self.assertRaisesRegex(
+            ValueError, "Unexpected response format.*login required"
+        ):
+            await NoteGPTProvider("http://fake").fetch(VIDEO_ID)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -6,7 +6,12 @@ import unittest
 # Add the parent directory to the path so we can import youtube_info and youtube_models
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 
-from app.lib.tools.youtube_info import fetch_transcript, YouTubeId
+from app.lib.tools.youtube_info import (
+    SingleFlight,
+    _TranscriptSegmentParser,
+    fetch_transcript,
+    YouTubeId,
+)
 
 
 class TestYouTubeTranscript(unittest.TestCase):
@@ -19,6 +24,75 @@ class TestYouTubeTranscript(unittest.TestCase):
         self.assertEqual(transcript, expected)
 
 
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_fetch(self):
+        """测试同一 key 的并发调用只执行一次"""
+        flights: SingleFlight[str] = SingleFlight()
+        calls = 0
+
+        async def fetch() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "transcript"
+
+        results = await asyncio.gather(
+            *[flights.do("4KdvcQKNfbQ", fetch) for _ in range(10)]
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertEqual(results, ["transcript"] * 10)
+        self.assertEqual(len(flights), 0)
+
+    async def test_concurrent_calls_share_exception(self):
+        """测试并发调用共享同一个异常"""
+        flights: SingleFlight[str] = SingleFlight()
+
+        async def fetch() -> str:
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[flights.do("4KdvcQKNfbQ", fetch) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertIs(results[0], results[1])
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """测试某个调用方取消不会影响其他调用方"""
+        flights: SingleFlight[str] = SingleFlight()
+
+        async def fetch() -> str:
+            await asyncio.sleep(0.02)
+            return "transcript"
+
+        first = asyncio.create_task(flights.do("4KdvcQKNfbQ", fetch))
+        second = asyncio.create_task(flights.do("4KdvcQKNfbQ", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "transcript")
+
+
+class TestTranscriptSegmentParser(unittest.TestCase):
+    def test_entities_decoded_once(self):
+        """测试 HTML 实体只解码一次：字面量 `&amp;lt;` 保留为 `&lt;`"""
+        parser = _TranscriptSegmentParser()
+        parser.feed(
+            '<span class="transcript-segment" data-start="61.5" data-duration="2">'
+            "Tom &amp;amp; Jerry &amp;lt;3\n  &lt;b&gt; &#39;hi&#39;</span>"
+            '<span data-start="63.5" data-duration="1">   </span>'
+        )
+        parser.close()
+
+        self.assertEqual(len(parser.entries), 1)
+        entry = parser.entries[0]
+        self.assertEqual(entry.text, "Tom &amp; Jerry &lt;3 <b> 'hi'")
+        self.assertEqual((entry.start, entry.end), ("00:01:01", "00:01:03"))
+
+
 if __name__ == "__main__":
     # 运行所有测试
     unittest.main(verbosity=2)
@@ -0,0 +1,82 @@
+"""
+Transcript 缓存：进程内 LRU + SQLite 两级缓存，按 YouTube 视频 ID 存取
+"""
+
+from typing import TYPE_CHECKING
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Field, SQLModel
+
+from app.core.config import env_float, env_int
+from app.lib.two_tier_cache import TwoTierCache
+from app.lib.youtube_models import TranscriptData
+
+if TYPE_CHECKING:
+    from app.lib.tools.youtube_info import YouTubeId
+
+TRANSCRIPT_CACHE_TTL = env_float("YAG_TRANSCRIPT_CACHE_TTL", 7 * 24 * 3600)
+TRANSCRIPT_CACHE_MEMORY_SIZE = env_int("YAG_TRANSCRIPT_CACHE_MEMORY_SIZE", 256)
+TRANSCRIPT_CACHE_MEMORY_CHARS = env_int(
+    "YAG_TRANSCRIPT_CACHE_MEMORY_CHARS", 32 * 1024 * 1024
+)
+"""进程内缓存的容量（字符数）；每个条目按条目文本加上缓存的完整文本计两份"""
+TRANSCRIPT_CACHE_DB_SIZE = env_int("YAG_TRANSCRIPT_CACHE_DB_SIZE", 10_000)
+
+
+class TranscriptCacheEntry(SQLModel, table=True):
+    """SQLite 中的 transcript 缓存记录"""
+
+    __tablename__ = "transcript_cache"
+
+    video_id: str = Field(primary_key=True, description="YouTube视频ID")
+    transcript: str = Field(description="TranscriptData JSON")
+    created_at: float = Field(index=True, description="写入时间（时间戳）")
+    accessed_at: float = Field(index=True, description="最近访问时间（时间戳）")
+
+
+class TranscriptCache(TwoTierCache[TranscriptData]):
+    """两级 transcript 缓存，按视频 ID 存取"""
+
+    name = "transcript_cache"
+    entry_model = TranscriptCacheEntry
+    key_field = "video_id"
+    value_field = "transcript"
+    weight_unit = "chars"
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None = None,
+        memory_size: int = TRANSCRIPT_CACHE_MEMORY_SIZE,
+        memory_chars: int = TRANSCRIPT_CACHE_MEMORY_CHARS,
+        db_size: int = TRANSCRIPT_CACHE_DB_SIZE,
+        ttl: float = TRANSCRIPT_CACHE_TTL,
+    ):
+        super().__init__(
+            engine,
+            memory_size=memory_size,
+            memory_weight=memory_chars,
+            weigher=lambda transcript: 2 * len(transcript.get_full_text()),
+            db_size=db_size,
+            ttl=ttl,
+        )
+
+    def _dump(self, transcript: TranscriptData) -> str:
+        return transcript.model_dump_json()
+
+    def _load(self, text: str) -> TranscriptData:
+        return TranscriptData.model_validate_json(text)
+
+    def in_memory(self, video_id: "YouTubeId") -> bool:
+        """是否已在进程内缓存中（不计入命中统计）"""
+        return super().in_memory(video_id.id)
+
+    async def get(self, video_id: "YouTubeId") -> TranscriptData | None:
+        """读取缓存；未命中返回 None"""
+        return await super().get(video_id.id)
+
+    async def set(self, video_id: "YouTubeId", transcript: TranscriptData) -> None:
+        """写入两级缓存，并按 TTL / 容量淘汰 SQLite 中的旧记录"""
+        await super().set(video_id.id, transcript)
+
+
+__all__ = ["TranscriptCache", "TranscriptCacheEntry"]
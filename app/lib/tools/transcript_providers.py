@@ -0,0 +1,380 @@
+"""
+Transcript 服务商（provider）接口与按优先级回退的调用链
+
+设计文档：先调用 youtubetotranscript.com，失败则回退到 notegpt.io，
+都失败时提醒用户自行获取 transcript。
+"""
+
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Iterator, Sequence
+
+from app.core.config import env_float, env_int
+from app.core.metrics import TRANSCRIPT_FETCH_ERRORS, TRANSCRIPT_FETCH_SECONDS
+from app.core.tracing import span
+from app.lib.rate_limit import RateLimitExceeded, RateLimiterRegistry
+from app.lib.youtube_models import TranscriptData
+
+if TYPE_CHECKING:
+    from app.lib.tools.youtube_info import YouTubeId
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_HEALTH_WINDOW = env_int("YAG_PROVIDER_HEALTH_WINDOW", 50)
+PROVIDER_FAILURE_THRESHOLD = env_int("YAG_PROVIDER_FAILURE_THRESHOLD", 5)
+PROVIDER_ERROR_RATE_THRESHOLD = env_float("YAG_PROVIDER_ERROR_RATE_THRESHOLD", 0.5)
+PROVIDER_MIN_SAMPLES = env_int("YAG_PROVIDER_MIN_SAMPLES", 10)
+PROVIDER_OPEN_SECONDS = env_float("YAG_PROVIDER_OPEN_SECONDS", 30.0)
+PROVIDER_MIN_TIMEOUT = env_float("YAG_PROVIDER_MIN_TIMEOUT", 2.0)
+PROVIDER_MAX_TIMEOUT = env_float("YAG_PROVIDER_MAX_TIMEOUT", 10.0)
+PROVIDER_TIMEOUT_MULTIPLIER = env_float("YAG_PROVIDER_TIMEOUT_MULTIPLIER", 2.0)
+
+
+class TranscriptUnavailableError(ValueError):
+    """所有 provider 均获取失败"""
+
+    def __init__(self, video_id: str, errors: list[tuple[str, BaseException]]):
+        self.video_id = video_id
+        self.errors = errors
+
+        reasons = "; ".join(f"{name}: {error!r}" for name, error in errors)
+        super().__init__(
+            f"所有 transcript 服务均获取失败，请自行获取 transcript 后重试 ({video_id}): {reasons}"
+        )
+
+
+class CircuitOpenError(RuntimeError):
+    """provider 熔断中，请求被直接拒绝"""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(
+            f"Circuit for provider {name!r} is open, retry in {retry_in:.1f}s"
+        )
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """
+    单个 provider 的健康状况
+
+    记录最近窗口内的延迟与成功率：连续失败或错误率过高时熔断（open），
+    冷却后放行一个探测请求（half-open），探测成功则恢复（closed）。
+    超时时间由最近成功请求的 p99 延迟推算，而不是固定常量。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = PROVIDER_HEALTH_WINDOW,
+        failure_threshold: int = PROVIDER_FAILURE_THRESHOLD,
+        error_rate_threshold: float = PROVIDER_ERROR_RATE_THRESHOLD,
+        min_samples: int = PROVIDER_MIN_SAMPLES,
+        open_seconds: float = PROVIDER_OPEN_SECONDS,
+        min_timeout: float = PROVIDER_MIN_TIMEOUT,
+        max_timeout: float = PROVIDER_MAX_TIMEOUT,
+        timeout_multiplier: float = PROVIDER_TIMEOUT_MULTIPLIER,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+
+        # 同名 provider 共用子指标
+        self._latency_metric = TRANSCRIPT_FETCH_SECONDS.labels(name)
+        self._error_metric = TRANSCRIPT_FETCH_ERRORS.labels(name)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, q: float) -> float | None:
+        """最近成功请求延迟的分位数（秒）"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def timeout(self) -> float:
+        """根据最近 p99 延迟推算的超时时间"""
+        p99 = self.percentile(0.99)
+        if p99 is None or len(self.latencies) < self.min_samples:
+            return self.max_timeout
+        return min(
+            self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier)
+        )
+
+    def acquire(self) -> None:
+        """请求前检查熔断状态，不允许时抛出 CircuitOpenError"""
+        if self.state is CircuitState.OPEN:
+            retry_in = self.opened_at + self.open_seconds - time.monotonic()
+            if retry_in > 0:
+                raise CircuitOpenError(self.name, retry_in)
+            self.state = CircuitState.HALF_OPEN
+
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(self.name, self.open_seconds)
+            self._probing = True
+
+    def is_open(self) -> bool:
+        """熔断中且尚未到探测时间"""
+        return (
+            self.state is CircuitState.OPEN
+            and time.monotonic() < self.opened_at + self.open_seconds
+        )
+
+    def release(self) -> None:
+        """请求被取消或限流时释放 half-open 探测名额，不计入统计"""
+        self._probing = False
+
+    def record_success(self, latency: float) -> None:
+        self._probing = False
+        self._latency_metric.observe(latency)
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        if self.state is not CircuitState.CLOSED:
+            logger.info(f"[provider_health] {self.name} recovered, closing circuit")
+            self.state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self._error_metric.inc()
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+
+        should_open = (
+            self.state is CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+            or (
+                len(self.outcomes) >= self.min_samples
+                and self.error_rate >= self.error_rate_threshold
+            )
+        )
+        if should_open:
+            if self.state is not CircuitState.OPEN:
+                logger.warning(f"[provider_health] opening circuit for {self.name}")
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "error_rate": self.error_rate,
+            "consecutive_failures": self.consecutive_failures,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "timeout": self.timeout(),
+        }
+
+
+class ProviderHealthRegistry:
+    """按 provider 名称管理 ProviderHealth"""
+
+    def __init__(self, **health_options: Any):
+        self._health_options = health_options
+        self._providers: dict[str, ProviderHealth] = {}
+
+    def get(self, name: str) -> ProviderHealth:
+        health = self._providers.get(name)
+        if health is None:
+            health = self._providers[name] = ProviderHealth(
+                name, **self._health_options
+            )
+        return health
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {name: health.snapshot() for name, health in self._providers.items()}
+
+
+class TranscriptProvider(ABC):
+    """Transcript provider 接口"""
+
+    name: str
+
+    @abstractmethod
+    async def fetch(self, video_id: "YouTubeId") -> TranscriptData:
+        """获取指定视频的 transcript，失败时抛出异常"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r})"
+
+
+class TranscriptProviderChain:
+    """
+    按顺序调用 provider，失败时回退到下一个
+
+    设置 `hedge_delay` 后进入对冲模式：当前 provider 超过该时长仍未返回时，
+    并行启动下一个 provider，取最先成功的结果并取消其余请求。
+    设置 `hedge_percentile`（如 0.95）时，对冲延迟取当前 provider 最近延迟的
+    该分位数，样本不足时使用 `hedge_delay`。
+
+    每次调用经过 provider 的熔断检查和令牌桶限流，并使用其自适应超时。
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[TranscriptProvider],
+        hedge_delay: float | None = None,
+        hedge_percentile: float | None = None,
+        health: ProviderHealthRegistry | None = None,
+        limiters: RateLimiterRegistry | None = None,
+    ):
+        if not providers:
+            raise ValueError("At least one transcript provider is required")
+
+        self.providers = list(providers)
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.health = health or ProviderHealthRegistry()
+        self.limiters = limiters or RateLimiterRegistry()
+
+    def check_admission(self) -> None:
+        """
+        快速检查是否还能受理新的请求
+
+        所有可用（未熔断）provider 的限流队列都已满时抛出 `RateLimitExceeded`，
+        避免发出注定被拒绝的请求。
+        """
+        retry_after: list[float] = []
+        for provider in self.providers:
+            if self.health.get(provider.name).is_open():
+                continue
+
+            bucket = self.limiters.get(provider.name)
+            if not bucket.is_full():
+                return
+            retry_after.append(bucket.retry_after())
+
+        if retry_after:
+            raise RateLimitExceeded("transcript", min(retry_after))
+
+    async def _call(
+        self, provider: TranscriptProvider, video_id: "YouTubeId"
+    ) -> TranscriptData:
+        health = self.health.get(provider.name)
+        health.acquire()
+
+        try:
+            await self.limiters.get(provider.name).acquire()
+        except BaseException:
+            health.release()
+            raise
+
+        started = time.monotonic()
+        try:
+            with span(f"provider.{provider.name}"):
+                transcript = await asyncio.wait_for(
+                    provider.fetch(video_id), timeout=health.timeout()
+                )
+        except asyncio.CancelledError:
+            health.release()
+            raise
+        except Exception:
+            health.record_failure()
+            raise
+
+        health.record_success(time.monotonic() - started)
+        return transcript
+
+    def _hedge_delay(self, provider: TranscriptProvider) -> float | None:
+        if self.hedge_percentile is not None:
+            delay = self.health.get(provider.name).percentile(self.hedge_percentile)
+            if delay is not None:
+                return delay
+        return self.hedge_delay
+
+    async def fetch(self, video_id: "YouTubeId") -> TranscriptData:
+        errors: list[tuple[str, BaseException]] = []
+        pending: dict[asyncio.Task[TranscriptData], TranscriptProvider] = {}
+        remaining: Iterator[TranscriptProvider] = iter(self.providers)
+        has_remaining = True
+        latest: TranscriptProvider = self.providers[0]
+
+        def launch_next() -> None:
+            nonlocal has_remaining, latest
+            provider = next(remaining, None)
+            if provider is None:
+                has_remaining = False
+                return
+
+            logger.info(f"[transcript] fetching {video_id.id} from {provider.name}")
+            pending[asyncio.ensure_future(self._call(provider, video_id))] = provider
+            latest = provider
+
+        launch_next()
+        try:
+            while pending:
+                timeout = self._hedge_delay(latest) if has_remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # 对冲：当前 provider 太慢，并行启动下一个
+                    launch_next()
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+
+                    logger.warning(
+                        f"[transcript] {provider.name} failed for {video_id.id}: {error!r}"
+                    )
+                    errors.append((provider.name, error))
+                    launch_next()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        rate_limited = [e for _, e in errors if isinstance(e, RateLimitExceeded)]
+        if rate_limited and all(
+            isinstance(e, RateLimitExceeded | CircuitOpenError) for _, e in errors
+        ):
+            raise RateLimitExceeded(
+                "transcript", min(e.retry_after for e in rate_limited)
+            )
+
+        raise TranscriptUnavailableError(video_id.id, errors)
+
+
+__all__ = [
+    "CircuitOpenError",
+    "CircuitState",
+    "ProviderHealth",
+    "ProviderHealthRegistry",
+    "TranscriptProvider",
+    "TranscriptProviderChain",
+    "TranscriptUnavailableError",
+]
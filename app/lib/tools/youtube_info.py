@@ -1,11 +1,31 @@
+import asyncio
+import json
 import os
 import re
+from html.parser import HTMLParser
+from typing import Awaitable, Callable, Generic, TypeVar
 
-import httpx
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from dotenv import load_dotenv
 
-from app.lib.youtube_models import YouTubeTranscriptResponse
+from app.core.config import env_str
+from app.core.http_clients import provider_client
+from app.core.metrics import observe_cache
+from app.core.tracing import span
+from app.lib.compact_transcript import format_timestamp
+from app.lib.rate_limit import RateLimiterRegistry
+from app.lib.tools.transcript_cache import TranscriptCache
+from app.lib.tools.transcript_providers import (
+    ProviderHealthRegistry,
+    TranscriptProvider,
+    TranscriptProviderChain,
+    TranscriptUnavailableError,
+)
+from app.lib.youtube_models import (
+    TranscriptData,
+    TranscriptEntry,
+    YouTubeTranscriptResponse,
+)
 
 load_dotenv()
 
@@ -14,6 +34,19 @@ YAG_VERBOSE = os.getenv("YAG_VERBOSE")
 
 verbose = YAG_VERBOSE == "True"
 
+T = TypeVar("T")
+
+NOTEGPT_BASE_URL = env_str("YAG_NOTEGPT_BASE_URL", "https://notegpt.io")
+YOUTUBETOTRANSCRIPT_BASE_URL = env_str(
+    "YAG_YOUTUBETOTRANSCRIPT_BASE_URL", "https://youtubetotranscript.com"
+)
+# 按优先级排列，逗号分隔
+TRANSCRIPT_PROVIDERS = env_str(
+    "YAG_TRANSCRIPT_PROVIDERS", "youtubetotranscript,notegpt"
+)
+# 对冲延迟：秒数，或 "p95" 这类分位数（取当前 provider 最近延迟），为空则只在失败时回退
+TRANSCRIPT_HEDGE_DELAY = os.getenv("YAG_TRANSCRIPT_HEDGE_DELAY")
+
 
 class YouTubeId(BaseModel):
     """YouTube视频ID"""
@@ -80,6 +113,7 @@ class YouTubeURL(BaseModel):
 
 async def fetch_video_info_using_notegpt_api(
     video_id_instance: YouTubeId,
+    base_url: str = NOTEGPT_BASE_URL,
 ) -> YouTubeTranscriptResponse:
     """Fetch YouTube transcript using NoteGPT API"""
 
@@ -108,26 +142,31 @@ async def fetch_video_info_using_notegpt_api(
         cookies = dict(
             item.split("=") for item in cookie_str.split("; ") if "=" in item
         )
+        # 连接池客户端在多个请求间共享，cookie 按请求以 header 形式发送
+        headers["cookie"] = cookie_str
 
     # Make the API request
-    url = f"https://notegpt.io/api/v2/video-transcript?platform=youtube&video_id={video_id}"
+    url = f"{base_url}/api/v2/video-transcript?platform=youtube&video_id={video_id}"
 
     if verbose:
         print(f"\nfetch {url=}")
         print(f"{cookies=}")
 
-    async with httpx.AsyncClient(
-        timeout=10.0, headers=headers, cookies=cookies
-    ) as client:
-        response = await client.get(url)
+    async with provider_client("notegpt") as client:
+        response = await client.get(url, headers=headers)
         response.raise_for_status()
 
-        resp = response.json()
+        # 直接从响应体校验，一次完成解析，不先解码成 dict
+        body = response.content
+        try:
+            with span("parse", provider="notegpt"):
+                return YouTubeTranscriptResponse.from_json(body)
+        except ValidationError:
+            # 只在失败时才解码一次，用于判断是不是没有 data 的错误响应
+            resp = json.loads(body)
+            if not isinstance(resp, dict) or resp.get("data"):
+                raise
 
-        # Extract transcript from response
-        if resp.get("data"):
-            return YouTubeTranscriptResponse.from_dict(resp)
-        else:
             invalid_format_msg = f"Unexpected response format: {resp}"
             if not cookie_str:
                 raise ValueError(
@@ -137,33 +176,295 @@ async def fetch_video_info_using_notegpt_api(
             raise ValueError(invalid_format_msg)
 
 
+def to_youtube_id(youtube_id_or_youtube_url: YouTubeId | YouTubeURL) -> YouTubeId:
+    """Normalize a YouTube ID or URL into a YouTubeId"""
+    if isinstance(youtube_id_or_youtube_url, YouTubeId):
+        return youtube_id_or_youtube_url
+
+    return YouTubeId.of(youtube_id_or_youtube_url.video_id)
+
+
+async def fetch_transcript_data_using_notegpt_api(
+    youtube_id_or_youtube_url: YouTubeId | YouTubeURL,
+) -> TranscriptData:
+    """Fetch structured YouTube transcript using NoteGPT API"""
+    video_id = to_youtube_id(youtube_id_or_youtube_url)
+
+    return (await fetch_video_info_using_notegpt_api(video_id)).data.transcripts.en_auto
+
+
 async def fetch_transcript_using_notegpt_api(
     youtube_id_or_youtube_url: YouTubeId | YouTubeURL,
 ) -> str:
     """Fetch YouTube transcript using NoteGPT API"""
+    return (
+        await fetch_transcript_data_using_notegpt_api(youtube_id_or_youtube_url)
+    ).get_full_text()
+
+
+class _TranscriptSegmentParser(HTMLParser):
+    """
+    Collect `<span class="transcript-segment" data-start data-duration>` segments
+
+    `convert_charrefs=True` (the default) already unescapes entities in `handle_data`;
+    unescaping again would turn a literal `&amp;lt;` into `<`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entries: list[TranscriptEntry] = []
+        self._segment: tuple[float, float] | None = None
+        self._text: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        attributes = dict(attrs)
+        if tag != "span" or "data-start" not in attributes:
+            return
+
+        start = float(attributes["data-start"] or 0)
+        duration = float(attributes.get("data-duration") or 0)
+        self._segment = (start, start + duration)
+        self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._segment is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "span" or self._segment is None:
+            return
+
+        text = " ".join("".join(self._text).split())
+        if text:
+            start, end = self._segment
+            self.entries.append(
+                TranscriptEntry(
+                    start=format_timestamp(start),
+                    end=format_timestamp(end),
+                    text=text,
+                )
+            )
+        self._segment = None
 
-    # Extract video ID from YouTube URL
-    # Since YouTubeId is a NewType of str, we check if it's a valid video ID or a URL
 
-    # Check if input looks like a YouTube video ID (11 characters with allowed chars)
-    video_id: YouTubeId
-    if isinstance(youtube_id_or_youtube_url, YouTubeId):
-        # It's a video ID
-        video_id = youtube_id_or_youtube_url
-    else:
-        # It's a URL, extract video ID
-        video_id = YouTubeId.of(youtube_id_or_youtube_url.video_id)
+async def fetch_transcript_data_using_youtubetotranscript(
+    video_id_instance: YouTubeId,
+    base_url: str = YOUTUBETOTRANSCRIPT_BASE_URL,
+) -> TranscriptData:
+    """Fetch YouTube transcript by scraping youtubetotranscript.com"""
+    url = f"{base_url}/transcript"
+
+    verbose and print(f"\nfetch {url=} v={video_id_instance.id}")
+
+    async with provider_client("youtubetotranscript") as client:
+        response = await client.get(
+            url,
+            params={"v": video_id_instance.id},
+            headers={"accept": "text/html,application/xhtml+xml"},
+        )
+        response.raise_for_status()
 
-    return (
-        await fetch_video_info_using_notegpt_api(video_id)
-    ).data.transcripts.en_auto.get_full_text()
+    with span("parse", provider="youtubetotranscript"):
+        parser = _TranscriptSegmentParser()
+        parser.feed(response.text)
+        parser.close()
+
+    if not parser.entries:
+        raise ValueError(f"No transcript found on {url} for {video_id_instance.id}")
+
+    return TranscriptData(custom=parser.entries)
+
+
+class NoteGPTProvider(TranscriptProvider):
+    """notegpt.io transcript provider"""
+
+    name = "notegpt"
+
+    def __init__(self, base_url: str = NOTEGPT_BASE_URL):
+        self.base_url = base_url
+
+    async def fetch(self, video_id: YouTubeId) -> TranscriptData:
+        response = await fetch_video_info_using_notegpt_api(video_id, self.base_url)
+        return response.data.transcripts.en_auto
+
+
+class YouTubeToTranscriptProvider(TranscriptProvider):
+    """youtubetotranscript.com transcript provider"""
+
+    name = "youtubetotranscript"
+
+    def __init__(self, base_url: str = YOUTUBETOTRANSCRIPT_BASE_URL):
+        self.base_url = base_url
+
+    async def fetch(self, video_id: YouTubeId) -> TranscriptData:
+        return await fetch_transcript_data_using_youtubetotranscript(
+            video_id, self.base_url
+        )
+
+
+PROVIDERS: dict[str, type[TranscriptProvider]] = {
+    NoteGPTProvider.name: NoteGPTProvider,
+    YouTubeToTranscriptProvider.name: YouTubeToTranscriptProvider,
+}
+
+
+provider_health = ProviderHealthRegistry()
+"""各 provider 的延迟、错误率与熔断状态"""
+
+provider_limiters = RateLimiterRegistry()
+"""各 provider 的出站请求限流（令牌桶）"""
+
+
+def build_transcript_provider_chain(
+    names: str = TRANSCRIPT_PROVIDERS,
+    hedge_delay: str | None = TRANSCRIPT_HEDGE_DELAY,
+) -> TranscriptProviderChain:
+    """Build the provider chain from a comma separated list of provider names"""
+    providers = [PROVIDERS[name.strip()]() for name in names.split(",") if name.strip()]
+
+    delay: float | None = None
+    percentile: float | None = None
+    if hedge_delay and hedge_delay.startswith("p"):
+        # 样本不足时先用 1 秒对冲
+        percentile, delay = float(hedge_delay[1:]) / 100, 1.0
+    elif hedge_delay:
+        delay = float(hedge_delay)
+
+    return TranscriptProviderChain(
+        providers,
+        hedge_delay=delay,
+        hedge_percentile=percentile,
+        health=provider_health,
+        limiters=provider_limiters,
+    )
+
+
+class _Flight(Generic[T]):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[T]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent calls for the same key into one in-flight call.
+
+    Every caller awaiting the same key shares the result or the exception of
+    that single call. A caller being cancelled does not cancel the shared
+    call unless it was the last one waiting for it.
+    """
+
+    def __init__(self):
+        self._flights: dict[str, _Flight[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._forget(key, task))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task:
+            del self._flights[key]
+
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+
+transcript_cache = TranscriptCache()
+"""按视频 ID 缓存的 transcript（进程内 LRU + SQLite）"""
+
+observe_cache("transcript", transcript_cache)
+
+transcript_flights: SingleFlight[TranscriptData] = SingleFlight()
+"""按视频 ID 合并并发的 transcript 请求"""
+
+transcript_providers = build_transcript_provider_chain()
+"""按优先级回退的 transcript provider 调用链"""
+
+
+async def _fetch_and_cache_transcript_data(video_id: YouTubeId) -> TranscriptData:
+    transcript = await transcript_providers.fetch(video_id)
+    await transcript_cache.set(video_id, transcript)
+
+    return transcript
+
+
+async def fetch_transcript_data(
+    youtube_id_or_youtube_url: YouTubeURL | YouTubeId,
+) -> TranscriptData:
+    """Fetch structured YouTube transcript, served from cache when possible"""
+    video_id = to_youtube_id(youtube_id_or_youtube_url)
+
+    with span("transcript_cache") as attributes:
+        cached = await transcript_cache.get(video_id)
+        attributes["hit"] = cached is not None
+    if cached is not None:
+        verbose and print(f"[fetch_transcript] cache hit: {video_id.id}")
+        return cached
+
+    with span("transcript_fetch", video_id=video_id.id):
+        return await transcript_flights.do(
+            video_id.id, lambda: _fetch_and_cache_transcript_data(video_id)
+        )
+
+
+def check_transcript_admission(
+    youtube_id_or_youtube_url: YouTubeURL | YouTubeId,
+) -> None:
+    """
+    Fail fast with RateLimitExceeded when a fetch would only queue behind full
+    provider rate limits. Transcripts already in memory or in flight are always
+    admitted.
+    """
+    video_id = to_youtube_id(youtube_id_or_youtube_url)
+    if transcript_cache.in_memory(video_id) or transcript_flights.in_flight(
+        video_id.id
+    ):
+        return
+
+    transcript_providers.check_admission()
 
 
 async def fetch_transcript(
     youtube_id_or_youtube_url: YouTubeURL | YouTubeId,
 ) -> str:
     """Fetch YouTube transcript"""
-    return await fetch_transcript_using_notegpt_api(youtube_id_or_youtube_url)
-
-
-__all__ = ["fetch_transcript", "YouTubeId", "YouTubeURL"]
+    return (await fetch_transcript_data(youtube_id_or_youtube_url)).get_full_text()
+
+
+__all__ = [
+    "fetch_transcript",
+    "fetch_transcript_data",
+    "transcript_cache",
+    "transcript_providers",
+    "provider_health",
+    "provider_limiters",
+    "check_transcript_admission",
+    "NoteGPTProvider",
+    "YouTubeToTranscriptProvider",
+    "TranscriptProvider",
+    "TranscriptUnavailableError",
+    "YouTubeId",
+    "YouTubeURL",
+]
@@ -1,6 +1,8 @@
 import uuid
 import hashlib
 
+from app.core.profiling import timed
+
 __all__ = ["QuickFragmentCheck"]
 
 url = "http://www.youtube.com/watch?v=4KdvcQKNfbQ 水电费水电费"
@@ -81,6 +83,7 @@ class QuickFragmentCheck:
         self.min_sample_length = min_sample_length
         self.max_sample_length = max_sample_length
 
+    @timed()
     def is_similar(
         self,
         short_text: str,
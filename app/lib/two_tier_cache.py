@@ -0,0 +1,177 @@
+"""
+进程内 LRU + SQLite 两级缓存的公共实现，支持 TTL、容量淘汰和命中统计
+
+子类指定 SQLModel 表（主键列 `key_field`、值列 `value_field`，另有 `created_at` /
+`accessed_at` 两列）以及值与数据库中文本之间的转换。内存层有自己的条目数和权重上限，
+只保存最近用到的一小部分；SQLite 层按 `db_size` 和 TTL 淘汰。
+"""
+
+import logging
+import time
+from typing import Callable, Generic, TypeVar
+
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlmodel import SQLModel, select
+
+from app.lib.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TwoTierCache(Generic[V]):
+    """两级缓存：先查进程内 LRU，再查 SQLite；SQLite 读写失败时只记录日志"""
+
+    name = "cache"
+    """日志前缀"""
+    entry_model: type[SQLModel]
+    key_field = "key"
+    value_field = "value"
+    weight_unit = "weight"
+    """`stats()` 中内存层权重的单位，如 bytes、chars"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine | None,
+        memory_size: int,
+        memory_weight: int | None,
+        weigher: Callable[[V], int] | None,
+        db_size: int,
+        ttl: float,
+    ):
+        self._engine = engine
+        self.db_size = db_size
+        self.ttl = ttl
+        self._memory: LRUCache[str, tuple[float, V]] = LRUCache(
+            max_size=memory_size,
+            max_weight=memory_weight,
+            weigher=(lambda entry: weigher(entry[1])) if weigher else None,
+        )
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from app.core.database import get_async_engine
+
+            self._engine = get_async_engine()
+        return self._engine
+
+    def _dump(self, value: V) -> str:
+        """值 -> 数据库中的文本"""
+        return value
+
+    def _load(self, text: str) -> V:
+        """数据库中的文本 -> 值"""
+        return text
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl
+
+    def in_memory(self, key: str) -> bool:
+        """是否已在进程内缓存中（不计入命中统计）"""
+        entry = self._memory.get(key, count=False)
+        return entry is not None and not self._expired(entry[0], time.time())
+
+    async def get(self, key: str) -> V | None:
+        """读取缓存；未命中返回 None"""
+        now = time.time()
+
+        entry = self._memory.get(key, count=False)
+        if entry is not None:
+            created_at, value = entry
+            if not self._expired(created_at, now):
+                self.memory_hits += 1
+                return value
+            self._memory.pop(key)
+
+        try:
+            value = await self._get_from_db(key, now)
+        except Exception as exception:
+            logger.warning(f"[{self.name}] SQLite read failed: {exception}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.db_hits += 1
+        return value
+
+    async def _get_from_db(self, key: str, now: float) -> V | None:
+        async with AsyncSession(self.engine) as session:
+            row = await session.get(self.entry_model, key)
+            if row is None:
+                return None
+
+            if self._expired(row.created_at, now):
+                await session.delete(row)
+                await session.commit()
+                return None
+
+            value = self._load(getattr(row, self.value_field))
+            self._memory.set(key, (row.created_at, value))
+
+            row.accessed_at = now
+            await session.commit()
+            return value
+
+    async def set(self, key: str, value: V) -> None:
+        """写入两级缓存，并按 TTL / 容量淘汰 SQLite 中的旧记录"""
+        now = time.time()
+        self._memory.set(key, (now, value))
+
+        try:
+            await self._set_to_db(key, value, now)
+        except Exception as exception:
+            logger.warning(f"[{self.name}] SQLite write failed: {exception}")
+
+    async def _set_to_db(self, key: str, value: V, now: float) -> None:
+        model = self.entry_model
+        key_column = getattr(model, self.key_field)
+        async with AsyncSession(self.engine) as session:
+            await session.merge(
+                model(
+                    **{self.key_field: key, self.value_field: self._dump(value)},
+                    created_at=now,
+                    accessed_at=now,
+                )
+            )
+
+            await session.execute(
+                delete(model).where(model.created_at < now - self.ttl)
+            )
+
+            count = (
+                await session.execute(select(func.count()).select_from(model))
+            ).scalar_one()
+            if count > self.db_size:
+                oldest = (
+                    select(key_column)
+                    .order_by(model.accessed_at)
+                    .limit(count - self.db_size)
+                )
+                await session.execute(delete(model).where(key_column.in_(oldest)))
+
+            await session.commit()
+
+    def stats(self) -> dict[str, int | float]:
+        """命中/未命中统计"""
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+            f"memory_{self.weight_unit}": self._memory.weight,
+        }
+
+
+__all__ = ["TwoTierCache"]
@@ -1,7 +1,10 @@
-import json
+import bisect
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.core.profiling import timed
+from app.lib.compact_transcript import CompactTranscript, parse_timestamp
 
 
 class TranscriptEntry(BaseModel):
@@ -13,17 +16,7 @@ class TranscriptEntry(BaseModel):
 
     def get_duration_seconds(self) -> float:
         """获取该条目的持续时间（秒）"""
-        start_parts = self.start.split(":")
-        end_parts = self.end.split(":")
-
-        start_seconds = (
-            int(start_parts[0]) * 3600 + int(start_parts[1]) * 60 + int(start_parts[2])
-        )
-        end_seconds = (
-            int(end_parts[0]) * 3600 + int(end_parts[1]) * 60 + int(end_parts[2])
-        )
-
-        return end_seconds - start_seconds
+        return parse_timestamp(self.end) - parse_timestamp(self.start)
 
 
 class LanguageCode(BaseModel):
@@ -69,20 +62,88 @@ class VideoInfo(BaseModel):
 
 
 class TranscriptData(BaseModel):
-    """转录数据"""
+    """
+    转录数据
 
-    custom: List[TranscriptEntry] = Field(description="转录条目列表")
+    完整文本与列式存储在第一次使用时生成并缓存，两者共用同一个字符串。同一个
+    对象会在 transcript 缓存中被多个请求共享，因此第一次调用 `get_full_text`、
+    `get_preview`、`get_text_between` 或 `to_compact` 之后不能再修改 `custom`
+    （包括其中的条目），需要不同的条目时创建新的 TranscriptData。
+    """
 
+    custom: List[TranscriptEntry] = Field(
+        description="转录条目列表（生成文本视图后不可修改）"
+    )
+
+    _full_text: str | None = PrivateAttr(default=None)
+    _compact: CompactTranscript | None = PrivateAttr(default=None)
+
+    def __eq__(self, other: object) -> bool:
+        # 缓存是派生数据，不参与比较（pydantic 默认会比较私有属性）
+        if not isinstance(other, TranscriptData):
+            return NotImplemented
+        return self.custom == other.custom
+
+    @timed()
     def get_full_text(self) -> str:
         """获取完整的转录文本"""
-        return " ".join([entry.text for entry in self.custom])
+        if self._full_text is None:
+            if self._compact is not None:
+                self._full_text = self._compact.text
+            else:
+                self._full_text = " ".join([entry.text for entry in self.custom])
+        return self._full_text
+
+    def get_preview(self, max_chars: int = 200) -> str:
+        """完整文本的前 max_chars 个字符，只拼接需要的前几个条目"""
+        if self._full_text is not None:
+            return self._full_text[:max_chars]
+
+        texts: list[str] = []
+        length = 0
+        for entry in self.custom:
+            if length > max_chars:
+                break
+            texts.append(entry.text)
+            length += len(entry.text) + 1
+        return " ".join(texts)[:max_chars]
+
+    def get_text_between(self, start_seconds: float, end_seconds: float) -> str:
+        """
+        时间区间 [start_seconds, end_seconds) 内的文本，如第 10 到 20 分钟
+
+        已有列式存储时直接切片；否则按时间二分查找条目，只拼接区间内的条目。
+        """
+        if self._compact is not None:
+            return self._compact.text_window(start_seconds, end_seconds)
+
+        first = bisect.bisect_right(
+            self.custom, start_seconds, key=lambda entry: parse_timestamp(entry.end)
+        )
+        stop = bisect.bisect_left(
+            self.custom,
+            end_seconds,
+            lo=first,
+            key=lambda entry: parse_timestamp(entry.start),
+        )
+        return " ".join([entry.text for entry in self.custom[first:stop]])
 
     def get_total_duration(self) -> float:
         """获取总转录时长"""
         if not self.custom:
             return 0.0
+        if self._compact is not None:
+            return self._compact.get_total_duration()
         return sum([entry.get_duration_seconds() for entry in self.custom])
 
+    def to_compact(self) -> CompactTranscript:
+        """转换为列式存储（时间只解析一次，文本拼接为一个字符串），结果会被缓存"""
+        if self._compact is None:
+            # 已拼接过完整文本时复用，不再生成第二份
+            self._compact = CompactTranscript.from_entries(self.custom, self._full_text)
+            self._full_text = self._compact.text
+        return self._compact
+
 
 class Transcripts(BaseModel):
     """转录数据容器"""
@@ -115,11 +176,18 @@ class YouTubeTranscriptResponse(BaseModel):
     data: VideoData = Field(description="视频数据")
 
     @classmethod
-    def from_json(cls, json_data: str) -> "YouTubeTranscriptResponse":
-        """从JSON字符串创建对象"""
-        return cls(**json.loads(json_data))
+    @timed()
+    def from_json(cls, json_data: str | bytes) -> "YouTubeTranscriptResponse":
+        """
+        从JSON字符串或原始响应体创建对象
+
+        由 pydantic-core 一次完成解析与校验，不经过中间的 dict，
+        比 `json.loads` + `from_dict` 快得多（见 `app.benchmarks.parse`）。
+        """
+        return cls.model_validate_json(json_data)
 
     @classmethod
+    @timed()
     def from_dict(cls, data: Dict[str, Any]) -> "YouTubeTranscriptResponse":
         """从字典创建对象"""
         return cls(**data)
@@ -148,8 +216,7 @@ class YouTubeTranscriptResponse(BaseModel):
             video_url=video_data.get_video_url(),
             transcript_entries=len(video_data.transcripts.en_auto.custom),
             transcript_duration=video_data.transcripts.en_auto.get_total_duration(),
-            transcript_preview=video_data.transcripts.en_auto.get_full_text()[:200]
-            + "...",
+            transcript_preview=video_data.transcripts.en_auto.get_preview(200) + "...",
         )
 
 
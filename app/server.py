@@ -7,13 +7,29 @@ import logging
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableLambda
 from langserve import add_routes
 
+from app.api.youtube_articles.generate import ARTICLE_PROMPT
+from app.api.youtube_articles.jobs import article_jobs
 from app.core.database import create_db_and_tables
+from app.core.http_clients import close_provider_clients, init_provider_clients
+from app.core.startup_profiler import startup_profiler
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware, metrics_endpoint
+from app.core.tracing import RequestTraceMiddleware
 from app.api.v1 import api_v1_router
-from app.core.exceptions import validation_exception_handler
-from .lib.llms import chatModel
+from app.core.exceptions import (
+    input_too_long_exception_handler,
+    rate_limit_exception_handler,
+    validation_exception_handler,
+)
+from app.lib.prompt_registry import PROMPT_REFRESH, prompt_registry
+from app.lib.rate_limit import RateLimitExceeded
+from app.lib.tools.fake_provider_server import FAKE_PROVIDERS, fake_provider_transport
+from app.lib.tokens import InputTooLongError
+from .lib.llms import get_chat_model
 
 logging.basicConfig(
     level=logging.INFO, format="%(levelname)s - %(asctime)s - %(name)s - %(message)s"
@@ -25,11 +41,40 @@ logger = logging.getLogger(__name__)
 # # Create a LANGSMITH_API_KEY in Settings > API Keys
 
 
+def lazy_chat_model() -> Runnable:
+    """
+    /openai 路由使用的模型：第一次调用时才创建
+
+    路由在创建应用时注册，模型不在导入或启动时构造；缺少 ARK 凭证时该请求失败，
+    不影响启动。
+    """
+    return RunnableLambda(
+        lambda _input: get_chat_model(), name="chat_model"
+    ).with_types(input_type=LanguageModelInput, output_type=BaseMessage)
+
+
 async def lifespan(app: FastAPI):
     logger.info("[lifespan] Starting up...")
-    await create_db_and_tables()
+    with startup_profiler.stage("database"):
+        await create_db_and_tables()
+    with startup_profiler.stage("provider_clients"):
+        await init_provider_clients(
+            transport=fake_provider_transport() if FAKE_PROVIDERS else None
+        )
+    with startup_profiler.stage("article_jobs"):
+        await article_jobs.start()
+    # 与 Hub 同步都在后台进行，启动时不联网
+    if PROMPT_REFRESH:
+        prompt_registry.start_refresh([ARTICLE_PROMPT])
+    else:
+        prompt_registry.start_sync_unverified([ARTICLE_PROMPT])
+    startup_profiler.mark_ready()
+    startup_profiler.log_report()
     yield
     logger.info("[lifespan] Shutting down...")
+    await prompt_registry.stop_refresh()
+    await article_jobs.stop()
+    await close_provider_clients()
 
 
 def create_application() -> FastAPI:
@@ -43,17 +88,33 @@ def create_application() -> FastAPI:
     def _(request: Request, exc: RequestValidationError):
         return validation_exception_handler(request, exc)
 
+    @app.exception_handler(RateLimitExceeded)
+    def _(request: Request, exc: RateLimitExceeded):
+        return rate_limit_exception_handler(request, exc)
+
+    @app.exception_handler(InputTooLongError)
+    def _(request: Request, exc: InputTooLongError):
+        return input_too_long_exception_handler(request, exc)
+
     # app.exception_handler(RequestValidationError)(
     #     lambda request, exc: validation_exception_handler(request, exc)
     # )
 
+    # 按请求记录各阶段耗时，并生成 request ID
+    app.add_middleware(RequestTraceMiddleware)
+
+    # Prometheus 指标：按路由统计 /api/v1 的请求数，在 /metrics 输出
+    app.add_middleware(MetricsMiddleware, prefix=api_v1_router.prefix)
+    if METRICS_ENABLED:
+        app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
     # 注册路由
     app.include_router(api_v1_router)
 
     # Edit this to add the chain you want to add
     add_routes(
         app,
-        chatModel,
+        lazy_chat_model(),
         path="/openai",
     )
 
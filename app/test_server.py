@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from starlette.testclient import TestClient
+
+from app import server
+from app.lib.fake_llm import FakeStreamingChatModel
+
+
+class TestOpenAIRoutes(unittest.TestCase):
+    def test_mounted_at_creation_and_model_built_lazily(self):
+        """测试 /openai 在创建应用时注册，模型在第一次请求时才创建"""
+        model = FakeStreamingChatModel(time_to_first_token=0, tokens_per_second=0)
+        get_chat_model = mock.Mock(return_value=model)
+        with mock.patch.object(server, "get_chat_model", get_chat_model):
+            app = server.create_application()
+            paths = TestClient(app).get("/openapi.json").json()["paths"]
+            self.assertIn("/openai/invoke", paths)
+            get_chat_model.assert_not_called()
+
+            response = TestClient(app).post("/openai/invoke", json={"input": "hello"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["output"]["content"])
+        get_chat_model.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)